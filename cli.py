@@ -6,20 +6,43 @@ import sys
 from pathlib import Path
 from typing import List, Optional
 
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
+from sources import SOURCE_CLASSES
 
 __version__ = "0.1.0"
-from metrics_extractor import MetricsExtractor
-from sources import ALL_SOURCES
 
+# Sources extracted at once on threads when --jobs is not given
+DEFAULT_JOBS = 4
 
-console = Console()
+# Commands import what they use (rich, extractors, metrics) when they run,
+# so cheap commands and --help start quickly
+
+
+class _LazyConsole:
+    """Stand-in for a rich Console, created on first use."""
+
+    _console = None
+
+    def get(self):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+
+            _LazyConsole._console = Console()
+        return _LazyConsole._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = _LazyConsole()
 
 
 def cmd_extract(args):
     """Extract metrics from Claude Code data."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+
+    from metrics_extractor import MetricsExtractor
+
     output_dir = Path(args.output_dir)
 
     # Determine which sources to extract
@@ -35,7 +58,7 @@ def cmd_extract(args):
     if sources:
         console.print(f"Sources: [cyan]{', '.join(sources)}[/cyan]")
     else:
-        console.print(f"Sources: [cyan]all ({len(ALL_SOURCES)})[/cyan]")
+        console.print(f"Sources: [cyan]all ({len(SOURCE_CLASSES)})[/cyan]")
 
     console.print()
 
@@ -44,13 +67,22 @@ def cmd_extract(args):
         output_dir=output_dir,
         include_sensitive=args.include_sensitive,
         sources=sources,
+        stream=args.stream,
+        full_text=args.fts,
+        shard_by=args.shard_by,
+        jobs=DEFAULT_JOBS if args.jobs is None else args.jobs,
+        # Sessions go to a worker process only when --jobs asks for it
+        process_pool=args.jobs is not None,
+        raw_global_state=not args.no_raw_state,
+        history_days=args.history_days,
+        detail=args.detail,
     )
 
     # Extract with progress
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console,
+        console=console.get(),
     ) as progress:
         task = progress.add_task("Extracting...", total=None)
 
@@ -67,13 +99,30 @@ def cmd_extract(args):
     # Write output
     console.print("\n[bold]Writing output...[/bold]")
 
+    json_options = {
+        "compact": args.compact,
+        "compress": args.gzip or args.xz,
+        "compression": "xz" if args.xz else "gzip",
+    }
+    if args.format == "both":
+        # One pass over streamed sources feeds both outputs
+        written = extractor.write_all(**json_options)
+        json_files, db_path = written["json_files"], written["database"]
+    elif args.format == "json":
+        json_files = extractor.write_json(**json_options)
+    else:
+        db_path = extractor.write_sqlite()
+
     if args.format in ("json", "both"):
-        json_files = extractor.write_json()
         console.print(f"  JSON files: [green]{len(json_files)} files[/green]")
 
     if args.format in ("sqlite", "both"):
-        db_path = extractor.write_sqlite()
         console.print(f"  SQLite database: [green]{db_path}[/green]")
+        if args.fts:
+            if extractor.full_text_indexed:
+                console.print("  Full-text index: [green]built[/green]")
+            else:
+                console.print("  Full-text index: [yellow]unavailable (SQLite lacks FTS5)[/yellow]")
 
     # Show summary
     console.print("\n[bold]Extraction Summary[/bold]\n")
@@ -115,6 +164,10 @@ def cmd_extract(args):
 
 def cmd_sources(args):
     """List available data sources."""
+    from rich.table import Table
+
+    from metrics_extractor import MetricsExtractor
+
     console.print(f"\n[bold]Claude Metrics - Available Sources[/bold]\n")
 
     table = Table(show_header=True)
@@ -134,7 +187,7 @@ def cmd_sources(args):
         )
 
     console.print(table)
-    console.print(f"\nTotal: [cyan]{len(ALL_SOURCES)}[/cyan] sources\n")
+    console.print(f"\nTotal: [cyan]{len(SOURCE_CLASSES)}[/cyan] sources\n")
 
 
 def cmd_summary(args):
@@ -167,9 +220,12 @@ def cmd_summary(args):
 
 def cmd_metrics_calculate(args):
     """Calculate derived metrics from Claude Code data."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+
     from extraction import TimeFilteredExtractor
     from metrics import DerivedMetricsEngine
-    from metrics.definitions import METRIC_DEFINITIONS
+    from metrics.definitions import METRIC_DEFINITIONS, required_fields
 
     console.print(f"\n[bold]Claude Metrics - Derived Metrics Calculator[/bold]\n")
     console.print(f"Time window: [cyan]{args.days} days[/cyan]")
@@ -186,10 +242,14 @@ def cmd_metrics_calculate(args):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console,
+        console=console.get(),
     ) as progress:
         task = progress.add_task("Extracting data...", total=None)
-        extractor = TimeFilteredExtractor(days=args.days)
+        extractor = TimeFilteredExtractor(
+            days=args.days,
+            use_store=args.use_store,
+            fields=required_fields(categories),
+        )
         data = extractor.extract()
         progress.update(task, description="[green]Data extracted[/green]")
 
@@ -204,7 +264,7 @@ def cmd_metrics_calculate(args):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console,
+        console=console.get(),
     ) as progress:
         task = progress.add_task("Calculating metrics...", total=None)
 
@@ -279,8 +339,11 @@ def cmd_metrics_calculate(args):
 
 def cmd_metrics_report(args):
     """Generate a metrics report."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
     from extraction import TimeFilteredExtractor
     from metrics import DerivedMetricsEngine
+    from metrics.definitions import required_fields
 
     console.print(f"\n[bold]Claude Metrics - Report Generator[/bold]\n")
     console.print(f"Time window: [cyan]{args.days} days[/cyan]")
@@ -296,10 +359,14 @@ def cmd_metrics_report(args):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console,
+        console=console.get(),
     ) as progress:
         task = progress.add_task("Extracting data...", total=None)
-        extractor = TimeFilteredExtractor(days=args.days)
+        extractor = TimeFilteredExtractor(
+            days=args.days,
+            use_store=args.use_store,
+            fields=required_fields(),
+        )
         data = extractor.extract()
         progress.update(task, description="[green]Data extracted[/green]")
 
@@ -307,7 +374,7 @@ def cmd_metrics_report(args):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console,
+        console=console.get(),
     ) as progress:
         task = progress.add_task("Calculating metrics...", total=None)
         engine = DerivedMetricsEngine(data)
@@ -325,7 +392,7 @@ def cmd_metrics_report(args):
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console,
+            console=console.get(),
         ) as progress:
             task = progress.add_task("Generating HTML dashboard...", total=None)
             generator = DashboardGenerator(data, metrics)
@@ -339,7 +406,7 @@ def cmd_metrics_report(args):
         from visualizations.terminal import TerminalReport, get_theme
 
         theme = get_theme(args.theme)
-        report = TerminalReport(data, metrics, theme=theme, console=console)
+        report = TerminalReport(data, metrics, theme=theme, console=console.get())
 
         if args.detail:
             report.print_all_metrics()
@@ -349,6 +416,8 @@ def cmd_metrics_report(args):
 
 def cmd_metrics_list(args):
     """List available derived metrics."""
+    from rich.table import Table
+
     from metrics.definitions import METRIC_DEFINITIONS, get_metrics_by_category
 
     console.print(f"\n[bold]Claude Metrics - Available Derived Metrics[/bold]\n")
@@ -409,7 +478,7 @@ def main():
     extract_parser.add_argument(
         "--source", "-s",
         action="append",
-        choices=list(ALL_SOURCES.keys()),
+        choices=list(SOURCE_CLASSES),
         help="Specific source(s) to extract (can repeat, default: all)",
     )
     extract_parser.add_argument(
@@ -423,6 +492,63 @@ def main():
         action="store_true",
         help="Include sensitive data (tokens, keys) - use with caution",
     )
+    extract_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse sessions while writing output instead of loading them all first",
+    )
+    extract_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write JSON without indentation",
+    )
+    compression_group = extract_parser.add_mutually_exclusive_group()
+    compression_group.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip-compress JSON output files",
+    )
+    compression_group.add_argument(
+        "--xz",
+        action="store_true",
+        help="Xz-compress JSON output files (smaller, slower)",
+    )
+    extract_parser.add_argument(
+        "--shard-by",
+        choices=["project", "date"],
+        default=None,
+        help="Write sessions as JSON lines shards per project or month, with an offset index",
+    )
+    extract_parser.add_argument(
+        "--fts",
+        action="store_true",
+        help="Build a full-text search index of transcripts in the SQLite database",
+    )
+    extract_parser.add_argument(
+        "--no-raw-state",
+        action="store_true",
+        help="Decode only the used sections of ~/.claude.json and omit its raw copy",
+    )
+    extract_parser.add_argument(
+        "--history-days",
+        type=int,
+        default=None,
+        help="Only extract input history from the last N days (default: all)",
+    )
+    extract_parser.add_argument(
+        "--detail",
+        action="store_true",
+        help="List every backed-up version in file history, not just per-file totals",
+    )
+    extract_parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help=(
+            f"Number of sources to extract concurrently (default: {DEFAULT_JOBS} threads,"
+            " 1 = one at a time); when given, sessions are also parsed in a worker process"
+        ),
+    )
     extract_parser.set_defaults(func=cmd_extract)
 
     # Sources command
@@ -459,6 +585,11 @@ def main():
         default=30,
         help="Time window in days (default: 30)",
     )
+    metrics_calc_parser.add_argument(
+        "--use-store",
+        action="store_true",
+        help="Read per-message cost and model from ~/.claude/__store.db",
+    )
     metrics_calc_parser.add_argument(
         "--category", "-c",
         action="append",
@@ -501,6 +632,11 @@ def main():
         default=30,
         help="Time window in days (default: 30)",
     )
+    metrics_report_parser.add_argument(
+        "--use-store",
+        action="store_true",
+        help="Read per-message cost and model from ~/.claude/__store.db",
+    )
     metrics_report_parser.add_argument(
         "--format", "-f",
         choices=["terminal", "html"],
@@ -4,7 +4,7 @@ import json
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
 # SQL schema for the metrics database
@@ -328,6 +328,42 @@ CREATE TABLE IF NOT EXISTS mcp_log_summaries (
     error_count INTEGER DEFAULT 0
 );
 
+-- Daily rollups, maintained incrementally as sessions/messages/tool calls load
+CREATE TABLE IF NOT EXISTS daily_model_usage (
+    date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    message_count INTEGER DEFAULT 0,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cache_read_tokens INTEGER DEFAULT 0,
+    cost_usd REAL DEFAULT 0,
+    PRIMARY KEY (date, model)
+);
+
+CREATE TABLE IF NOT EXISTS daily_tool_usage (
+    date TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    call_count INTEGER DEFAULT 0,
+    error_count INTEGER DEFAULT 0,
+    interrupted_count INTEGER DEFAULT 0,
+    total_duration_ms INTEGER DEFAULT 0,
+    PRIMARY KEY (date, tool_name)
+);
+
+CREATE TABLE IF NOT EXISTS daily_project_sessions (
+    date TEXT NOT NULL,
+    project TEXT NOT NULL,
+    session_count INTEGER DEFAULT 0,
+    agent_session_count INTEGER DEFAULT 0,
+    message_count INTEGER DEFAULT 0,
+    tool_call_count INTEGER DEFAULT 0,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cost_usd REAL DEFAULT 0,
+    total_duration_ms INTEGER DEFAULT 0,
+    PRIMARY KEY (date, project)
+);
+
 -- Create indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_sessions_project ON sessions(project);
 CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time);
@@ -339,21 +375,45 @@ CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
 CREATE INDEX IF NOT EXISTS idx_daily_activity_date ON daily_activity(date);
 """
 
+ROLLUP_TABLES = ("daily_model_usage", "daily_tool_usage", "daily_project_sessions")
+
+# Optional full-text index over transcript text (requires SQLite FTS5)
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+    content,
+    kind UNINDEXED,
+    session_id UNINDEXED,
+    message_uuid UNINDEXED,
+    timestamp UNINDEXED,
+    tokenize = 'unicode61'
+);
+"""
+
 
 class MetricsDatabase:
     """SQLite database for Claude metrics."""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, read_only: bool = False):
         """Initialize the database.
 
         Args:
             db_path: Path to the SQLite database file
+            read_only: If True, open an existing database for queries only
         """
         self.db_path = db_path
+        self.read_only = read_only
         self.conn: Optional[sqlite3.Connection] = None
+        self.fts_enabled = False
 
     def connect(self) -> sqlite3.Connection:
         """Open database connection and initialize schema."""
+        if self.read_only:
+            self.conn = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True
+            )
+            self.conn.row_factory = sqlite3.Row
+            return self.conn
+
         self.conn = sqlite3.connect(str(self.db_path))
         self.conn.row_factory = sqlite3.Row
         self._init_schema()
@@ -364,8 +424,21 @@ class MetricsDatabase:
         if self.conn is None:
             raise RuntimeError("Database not connected")
         self.conn.executescript(SCHEMA)
+        # A database written before the rollups existed has rows the
+        # incremental updates never counted: fill the rollups once
+        if not self._has_rows(*ROLLUP_TABLES) and self._has_rows(
+            "sessions", "messages", "tool_calls"
+        ):
+            self.rebuild_rollups()
         self.conn.commit()
 
+    def _has_rows(self, *tables: str) -> bool:
+        """Whether any of the tables has at least one row."""
+        return any(
+            self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in tables
+        )
+
     def close(self):
         """Close the database connection."""
         if self.conn:
@@ -488,6 +561,19 @@ class MetricsDatabase:
         """Insert a session record."""
         if self.conn is None:
             raise RuntimeError("Database not connected")
+
+        # A replaced session must first be removed from the rollup
+        previous = self.conn.execute(
+            """
+            SELECT project, start_time, is_agent, message_count, tool_call_count,
+                   total_input_tokens, total_output_tokens, cost_usd, duration_ms
+            FROM sessions WHERE session_id = ?
+            """,
+            (session.get("session_id"),),
+        ).fetchone()
+        if previous is not None:
+            self._rollup_session(dict(previous), sign=-1)
+
         self.conn.execute(
             """
             INSERT OR REPLACE INTO sessions
@@ -517,12 +603,13 @@ class MetricsDatabase:
                 session.get("file_path"),
             ),
         )
+        self._rollup_session(session)
 
     def insert_message(self, message: Dict[str, Any]):
         """Insert a message record."""
         if self.conn is None:
             raise RuntimeError("Database not connected")
-        self.conn.execute(
+        cursor = self.conn.execute(
             """
             INSERT OR IGNORE INTO messages
             (uuid, session_id, parent_uuid, timestamp, type, role, model,
@@ -547,12 +634,18 @@ class MetricsDatabase:
                 message.get("tool_call_count", 0),
             ),
         )
+        if cursor.rowcount == 1:
+            self._rollup_message(message)
 
     def insert_tool_call(self, tool_call: Dict[str, Any]):
-        """Insert a tool call record."""
+        """Insert a tool call record.
+
+        The daily rollup uses the tool call's "timestamp" (the timestamp of
+        the message that issued it); tool calls without one are not rolled up.
+        """
         if self.conn is None:
             raise RuntimeError("Database not connected")
-        self.conn.execute(
+        cursor = self.conn.execute(
             """
             INSERT OR IGNORE INTO tool_calls
             (id, message_uuid, session_id, tool_name, duration_ms,
@@ -571,6 +664,100 @@ class MetricsDatabase:
                 tool_call.get("file_path"),
             ),
         )
+        if cursor.rowcount == 1:
+            self._rollup_tool_call(tool_call)
+
+    def _rollup_message(self, message: Dict[str, Any]):
+        """Add a message to the daily model usage rollup."""
+        day = _date_of(message.get("timestamp"))
+        model = message.get("model")
+        if day is None or not model:
+            return
+        self.conn.execute(
+            """
+            INSERT INTO daily_model_usage
+            (date, model, message_count, input_tokens, output_tokens,
+             cache_read_tokens, cost_usd)
+            VALUES (?, ?, 1, ?, ?, ?, ?)
+            ON CONFLICT(date, model) DO UPDATE SET
+                message_count = message_count + 1,
+                input_tokens = input_tokens + excluded.input_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,
+                cost_usd = cost_usd + excluded.cost_usd
+            """,
+            (
+                day,
+                model,
+                message.get("input_tokens", 0) or 0,
+                message.get("output_tokens", 0) or 0,
+                message.get("cache_read_tokens", 0) or 0,
+                message.get("cost_usd", 0) or 0,
+            ),
+        )
+
+    def _rollup_tool_call(self, tool_call: Dict[str, Any]):
+        """Add a tool call to the daily tool usage rollup."""
+        day = _date_of(tool_call.get("timestamp"))
+        tool_name = tool_call.get("tool_name")
+        if day is None or not tool_name:
+            return
+        self.conn.execute(
+            """
+            INSERT INTO daily_tool_usage
+            (date, tool_name, call_count, error_count, interrupted_count,
+             total_duration_ms)
+            VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT(date, tool_name) DO UPDATE SET
+                call_count = call_count + 1,
+                error_count = error_count + excluded.error_count,
+                interrupted_count = interrupted_count + excluded.interrupted_count,
+                total_duration_ms = total_duration_ms + excluded.total_duration_ms
+            """,
+            (
+                day,
+                tool_name,
+                1 if tool_call.get("is_error") else 0,
+                1 if tool_call.get("is_interrupted") else 0,
+                tool_call.get("duration_ms") or 0,
+            ),
+        )
+
+    def _rollup_session(self, session: Dict[str, Any], sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) a session from the project rollup."""
+        day = _date_of(session.get("start_time"))
+        if day is None:
+            return
+        self.conn.execute(
+            """
+            INSERT INTO daily_project_sessions
+            (date, project, session_count, agent_session_count, message_count,
+             tool_call_count, input_tokens, output_tokens, cost_usd,
+             total_duration_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date, project) DO UPDATE SET
+                session_count = session_count + excluded.session_count,
+                agent_session_count = agent_session_count + excluded.agent_session_count,
+                message_count = message_count + excluded.message_count,
+                tool_call_count = tool_call_count + excluded.tool_call_count,
+                input_tokens = input_tokens + excluded.input_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                cost_usd = cost_usd + excluded.cost_usd,
+                total_duration_ms = total_duration_ms + excluded.total_duration_ms
+            """,
+            (
+                day,
+                session.get("project") or "",
+                sign,
+                sign if session.get("is_agent") else 0,
+                sign * (session.get("message_count", 0) or 0),
+                sign * (session.get("tool_call_count", 0) or 0),
+                sign * (session.get("total_input_tokens", 0) or 0),
+                sign * (session.get("total_output_tokens", 0) or 0),
+                sign * (session.get("cost_usd", 0) or 0),
+                sign * (session.get("duration_ms", 0) or 0),
+            ),
+        )
 
     def insert_history(self, records: List[Dict[str, Any]]):
         """Insert history records."""
@@ -924,7 +1111,234 @@ class MetricsDatabase:
                 )
         self.conn.commit()
 
+    def enable_fts(self) -> bool:
+        """Create the transcript full-text index if SQLite supports FTS5.
+
+        Returns:
+            True if the index is available for inserts
+        """
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5
+            self.fts_enabled = False
+            return False
+        self.fts_enabled = True
+        return True
+
+    def has_fts(self) -> bool:
+        """Check whether this database contains the full-text index."""
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+        row = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transcript_fts'"
+        ).fetchone()
+        return row is not None
+
+    def clear_search_documents(self):
+        """Remove all documents from the full-text index."""
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+        self.conn.execute("DELETE FROM transcript_fts")
+
+    def insert_search_documents(
+        self, documents: Iterable[Dict[str, Any]], batch_size: int = 1000
+    ) -> int:
+        """Insert documents into the full-text index.
+
+        Args:
+            documents: Dicts with content, kind, session_id, message_uuid
+                and timestamp; may be a generator
+            batch_size: Rows per executemany call
+
+        Returns:
+            Number of documents inserted
+        """
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+
+        sql = """
+            INSERT INTO transcript_fts
+            (content, kind, session_id, message_uuid, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        count = 0
+        batch = []
+        for doc in documents:
+            batch.append((
+                doc.get("content"),
+                doc.get("kind"),
+                doc.get("session_id"),
+                doc.get("message_uuid"),
+                doc.get("timestamp"),
+            ))
+            if len(batch) >= batch_size:
+                self.conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        kind: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Ranked full-text search over transcript documents.
+
+        Args:
+            query: Search words; each is matched as a term and a trailing
+                "*" makes it a prefix match
+            limit: Maximum results
+            kind: Optional document kind filter (user, assistant, bash,
+                grep, web_search)
+
+        Returns:
+            List of matches ordered by BM25 relevance (best first)
+        """
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+
+        match = fts_query(query)
+        if not match:
+            return []
+
+        where, params = "transcript_fts MATCH ?", [match]
+        if kind is not None:
+            where += " AND kind = ?"
+            params.append(kind)
+        rows = self.conn.execute(
+            f"""
+            SELECT kind, session_id, message_uuid, timestamp,
+                   snippet(transcript_fts, 0, '[', ']', '...', 16) AS snippet,
+                   bm25(transcript_fts) AS score
+            FROM transcript_fts
+            WHERE {where}
+            ORDER BY score
+            LIMIT ?
+            """,
+            (*params, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def rebuild_rollups(self):
+        """Recompute all daily rollup tables from the base tables.
+
+        Runs on connect for databases written before the rollups existed;
+        normal loads keep them up to date incrementally.
+        """
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+        self.conn.executescript(
+            """
+            DELETE FROM daily_model_usage;
+            DELETE FROM daily_tool_usage;
+            DELETE FROM daily_project_sessions;
+
+            INSERT INTO daily_model_usage
+            (date, model, message_count, input_tokens, output_tokens,
+             cache_read_tokens, cost_usd)
+            SELECT substr(timestamp, 1, 10), model, COUNT(*),
+                   SUM(input_tokens), SUM(output_tokens),
+                   SUM(cache_read_tokens), SUM(cost_usd)
+            FROM messages
+            WHERE timestamp IS NOT NULL AND model IS NOT NULL AND model != ''
+            GROUP BY 1, 2;
+
+            INSERT INTO daily_tool_usage
+            (date, tool_name, call_count, error_count, interrupted_count,
+             total_duration_ms)
+            SELECT substr(m.timestamp, 1, 10), t.tool_name, COUNT(*),
+                   SUM(t.is_error), SUM(t.is_interrupted),
+                   SUM(COALESCE(t.duration_ms, 0))
+            FROM tool_calls t JOIN messages m ON m.uuid = t.message_uuid
+            WHERE m.timestamp IS NOT NULL
+            GROUP BY 1, 2;
+
+            INSERT INTO daily_project_sessions
+            (date, project, session_count, agent_session_count, message_count,
+             tool_call_count, input_tokens, output_tokens, cost_usd,
+             total_duration_ms)
+            SELECT substr(start_time, 1, 10), COALESCE(project, ''), COUNT(*),
+                   SUM(is_agent), SUM(message_count), SUM(tool_call_count),
+                   SUM(total_input_tokens), SUM(total_output_tokens),
+                   SUM(cost_usd), SUM(COALESCE(duration_ms, 0))
+            FROM sessions
+            WHERE start_time IS NOT NULL
+            GROUP BY 1, 2;
+            """
+        )
+        self.conn.commit()
+
+    def _query_rollup(
+        self,
+        table: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Read rollup rows with start_date <= date <= end_date (YYYY-MM-DD)."""
+        if self.conn is None:
+            raise RuntimeError("Database not connected")
+        # Only the given bounds are added, so the date key is used as a range
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(
+            f"SELECT * FROM {table} {where} ORDER BY date", params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_daily_model_usage(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get per-day, per-model token and cost totals for a date range."""
+        return self._query_rollup("daily_model_usage", start_date, end_date)
+
+    def get_daily_tool_usage(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get per-day, per-tool call, error and duration totals for a date range."""
+        return self._query_rollup("daily_tool_usage", start_date, end_date)
+
+    def get_daily_project_sessions(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get per-day, per-project session totals for a date range."""
+        return self._query_rollup("daily_project_sessions", start_date, end_date)
+
     def commit(self):
         """Commit pending changes."""
         if self.conn:
             self.conn.commit()
+
+
+def _date_of(timestamp: Optional[str]) -> Optional[str]:
+    """Get the YYYY-MM-DD day of an ISO timestamp, or None."""
+    if not timestamp or not isinstance(timestamp, str) or len(timestamp) < 10:
+        return None
+    return timestamp[:10]
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches all of its words.
+
+    Each word is quoted so punctuation and FTS5 operators in user input are
+    treated literally; a trailing "*" is kept as a prefix match.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
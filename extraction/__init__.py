@@ -9,6 +9,7 @@ from .data_classes import (
     ExtractedData30Day,
 )
 from .time_filtered import TimeFilteredExtractor
+from .change_detector import ChangeSet, SessionChangeDetector
 
 __all__ = [
     "SessionData",
@@ -18,4 +19,6 @@ __all__ = [
     "ModelUsageData",
     "ExtractedData30Day",
     "TimeFilteredExtractor",
+    "ChangeSet",
+    "SessionChangeDetector",
 ]
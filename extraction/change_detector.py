@@ -0,0 +1,271 @@
+"""Change detection for session transcripts in ~/.claude/projects.
+
+Tracks ``(mtime_ns, size)`` for every ``projects/*/*.jsonl`` file so that
+cached data is only invalidated when a session file was actually added,
+modified or removed. When the optional ``watchdog`` package is installed
+(inotify on Linux), file events tell the detector which files to re-stat;
+otherwise the directory tree is re-scanned at most every ``min_interval``
+seconds.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+FileState = Tuple[int, int]  # (mtime_ns, size)
+
+
+@dataclass
+class ChangeSet:
+    """Session files that differ from the last consumed state."""
+
+    changed: Set[Path] = field(default_factory=set)  # added or modified
+    removed: Set[Path] = field(default_factory=set)
+
+    @property
+    def paths(self) -> Set[Path]:
+        return self.changed | self.removed
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def scan_session_files(projects_dir: Path) -> Dict[Path, FileState]:
+    """Stat every ``<project>/<session>.jsonl`` under a projects directory.
+
+    Args:
+        projects_dir: Path to ~/.claude/projects
+
+    Returns:
+        Dict mapping file path to (mtime_ns, size)
+    """
+    states: Dict[Path, FileState] = {}
+    try:
+        projects = list(os.scandir(projects_dir))
+    except OSError:
+        return states
+
+    for project in projects:
+        try:
+            if not project.is_dir():
+                continue
+            entries = list(os.scandir(project.path))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.endswith(".jsonl"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            states[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+    return states
+
+
+def stat_session_file(path: Path) -> Optional[FileState]:
+    """(mtime_ns, size) of one file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forward watchdog events for session files to the detector."""
+
+    def __init__(self, detector: "SessionChangeDetector"):
+        super().__init__()
+        self.detector = detector
+
+    def on_any_event(self, event) -> None:
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        if event.is_directory:
+            # A project directory appeared, moved or vanished
+            self.detector._mark(None)
+            return
+        for path in paths:
+            if path and str(path).endswith(".jsonl"):
+                self.detector._mark(Path(os.fsdecode(path)))
+
+
+class SessionChangeDetector:
+    """Detect added, modified and removed session transcripts.
+
+    Usage::
+
+        detector = SessionChangeDetector()
+        detector.start()          # baseline, before extracting
+        ...
+        if detector.poll():       # cheap; rate limited
+            changes = detector.consume()
+    """
+
+    def __init__(
+        self,
+        projects_dir: Optional[Path] = None,
+        min_interval: float = 1.0,
+        use_watcher: bool = True,
+    ):
+        """Initialize the detector.
+
+        Args:
+            projects_dir: Directory to watch (default: ~/.claude/projects,
+                resolved on start())
+            min_interval: Minimum seconds between directory scans when
+                polling
+            use_watcher: Use watchdog file events when it is installed
+        """
+        self.projects_dir = projects_dir
+        self.min_interval = min_interval
+        self.use_watcher = use_watcher
+        self._lock = threading.Lock()
+        self._baseline: Optional[Dict[Path, FileState]] = None
+        self._pending = ChangeSet()
+        self._last_scan = 0.0
+        self._observer = None
+        # Files reported by the watcher since the last poll; None = rescan
+        self._touched: Optional[Set[Path]] = set()
+
+    @property
+    def mode(self) -> str:
+        """"watch" when driven by file events, else "poll"."""
+        return "watch" if self._observer is not None else "poll"
+
+    @property
+    def is_started(self) -> bool:
+        return self._baseline is not None
+
+    def start(self) -> None:
+        """Record the current file states as the baseline (idempotent)."""
+        with self._lock:
+            if self._baseline is not None:
+                return
+            if self.projects_dir is None:
+                from utils import get_claude_dir
+
+                self.projects_dir = get_claude_dir() / "projects"
+            self._baseline = scan_session_files(self.projects_dir)
+            self._last_scan = time.monotonic()
+            self._start_watcher()
+
+    def _start_watcher(self) -> None:
+        if not self.use_watcher or Observer is None or not self.projects_dir.is_dir():
+            return
+        try:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), str(self.projects_dir), recursive=True)
+            observer.daemon = True
+            observer.start()
+        except Exception:
+            # inotify watch limits and the like: fall back to polling
+            return
+        self._observer = observer
+
+    def stop(self) -> None:
+        """Stop the file watcher, if any."""
+        observer, self._observer = self._observer, None
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=5)
+
+    def _mark(self, path: Optional[Path]) -> None:
+        with self._lock:
+            if path is None or self._touched is None:
+                self._touched = None
+            else:
+                self._touched.add(path)
+
+    def _record(self, path: Path, state: Optional[FileState]) -> None:
+        # Caller holds the lock
+        previous = self._baseline.get(path)
+        if state == previous:
+            return
+        if state is None:
+            self._baseline.pop(path, None)
+            self._pending.changed.discard(path)
+            self._pending.removed.add(path)
+        else:
+            self._baseline[path] = state
+            self._pending.removed.discard(path)
+            self._pending.changed.add(path)
+
+    def poll(self) -> bool:
+        """Check for changes since the last consume().
+
+        Returns:
+            True if there are pending changes
+        """
+        with self._lock:
+            if self._baseline is None:
+                return False
+
+            if self._observer is not None and self._touched is not None:
+                touched, self._touched = self._touched, set()
+                for path in touched:
+                    self._record(path, stat_session_file(path))
+                return bool(self._pending)
+
+            now = time.monotonic()
+            if self._observer is None and now - self._last_scan < self.min_interval:
+                return bool(self._pending)
+            self._last_scan = now
+            self._touched = set()
+
+            current = scan_session_files(self.projects_dir)
+            for path in set(self._baseline) - set(current):
+                self._record(path, None)
+            for path, state in current.items():
+                self._record(path, state)
+            return bool(self._pending)
+
+    def scan(self) -> Dict[Path, FileState]:
+        """Current state of every session file (starts the detector)."""
+        self.start()
+        return scan_session_files(self.projects_dir)
+
+    def add_changes_since(self, states: Dict[Path, FileState]) -> None:
+        """Queue every file that differs from ``states`` as changed.
+
+        Used when adopting data extracted elsewhere (e.g. by another
+        process), so files changed since that extraction are re-read.
+
+        Args:
+            states: File states the adopted data was extracted from
+        """
+        current = self.scan()
+        with self._lock:
+            for path in set(states) | set(current):
+                if states.get(path) == current.get(path):
+                    continue
+                if path in current:
+                    self._pending.removed.discard(path)
+                    self._pending.changed.add(path)
+                else:
+                    self._pending.changed.discard(path)
+                    self._pending.removed.add(path)
+
+    def consume(self) -> ChangeSet:
+        """Return pending changes and reset them.
+
+        Returns:
+            ChangeSet of files added, modified or removed
+        """
+        self.poll()
+        with self._lock:
+            changes, self._pending = self._pending, ChangeSet()
+            return changes
@@ -22,6 +22,10 @@ class MessageData:
     has_thinking: bool
     thinking_length: int
     tool_call_count: int
+    content: Optional[str] = None
+    parent_uuid: Optional[str] = None
+    stop_reason: Optional[str] = None
+    is_sidechain: bool = False
 
 
 @dataclass
@@ -38,6 +42,37 @@ class ToolCallData:
     is_error: bool
     is_interrupted: bool
     file_path: Optional[str]  # For Read/Edit/Write tools
+    tool_use_id: Optional[str] = None
+    edit_old_string: Optional[str] = None
+    edit_new_string: Optional[str] = None
+    edit_replace_all: bool = False
+    web_url: Optional[str] = None
+    search_query: Optional[str] = None
+    question_header: Optional[str] = None
+    question_text: Optional[str] = None
+    question_options: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ToolChainLink:
+    tool_use_id: Optional[str]
+    tool_name: str
+    message_uuid: str
+    session_id: str
+    timestamp: datetime
+    is_error: bool
+    duration_ms: Optional[int]
+
+
+@dataclass
+class ConversationThread:
+    session_id: str
+    root_uuid: str
+    max_depth: int
+    branch_count: int
+    message_count: int
+    sidechain_count: int
+    stop_reasons: Dict[str, int] = field(default_factory=dict)
 
 
 @dataclass
@@ -132,6 +167,19 @@ class ExtractedData30Day:
     # Active days tracking
     active_dates: List[str] = field(default_factory=list)  # YYYY-MM-DD format
 
+    web_urls_fetched: List[str] = field(default_factory=list)
+    search_queries: List[str] = field(default_factory=list)
+    questions_asked: List[Dict[str, Any]] = field(default_factory=list)
+    edit_operations: List[Dict[str, Any]] = field(default_factory=list)
+    tool_chains: List[List[ToolChainLink]] = field(default_factory=list)
+    conversation_threads: List[ConversationThread] = field(default_factory=list)
+    custom_agents: int = 0
+    custom_commands: int = 0
+    custom_skills: int = 0
+    hook_executions: int = 0
+    hook_errors: int = 0
+    hook_preventions: int = 0
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
         return {
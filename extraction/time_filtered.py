@@ -3,7 +3,7 @@
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Generator
+from typing import Any, Dict, Generator, Iterable, List, Optional, Set, Tuple
 
 from .data_classes import (
     ExtractedData30Day,
@@ -16,6 +16,18 @@ from .data_classes import (
     ConversationThread,
 )
 
+# Extracted fields that cost extra work and are only built when requested:
+# message text, tool input payloads, and the structures derived from them
+OPTIONAL_FIELDS = frozenset({
+    "message_content",
+    "edit_operations",
+    "questions_asked",
+    "web_urls_fetched",
+    "search_queries",
+    "conversation_threads",
+    "tool_chains",
+})
+
 
 class TimeFilteredExtractor:
     """Extract data from all sources within a time window.
@@ -24,15 +36,31 @@ class TimeFilteredExtractor:
     efficient derived metrics calculation.
     """
 
-    def __init__(self, days: int = 30, include_sensitive: bool = False):
+    def __init__(
+        self,
+        days: int = 30,
+        include_sensitive: bool = False,
+        use_store: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ):
         """Initialize the time-filtered extractor.
 
         Args:
             days: Number of days to include in the time window
             include_sensitive: If True, include sensitive data without redaction
+            use_store: If True, take per-message cost and model from
+                ~/.claude/__store.db where it has them, instead of the
+                JSONL transcripts
+            fields: Extracted fields needed, e.g. from
+                metrics.definitions.required_fields(); optional fields
+                not listed are left empty (default: all fields)
         """
         self.days = days
         self.include_sensitive = include_sensitive
+        self.use_store = use_store
+        self.fields = OPTIONAL_FIELDS if fields is None else OPTIONAL_FIELDS.intersection(fields)
+        # uuid -> (model, cost_usd) from __store.db, loaded by extract()
+        self._store_costs: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
         # Use UTC timezone-aware datetime to match parsed timestamps
         self._now_utc = datetime.now(timezone.utc)
         self.cutoff = self._now_utc - timedelta(days=days)
@@ -74,6 +102,9 @@ class TimeFilteredExtractor:
             window_days=self.days,
         )
 
+        if self.use_store:
+            self._load_store_costs()
+
         # Extract from each source
         self._extract_sessions(data)
         self._extract_stats_cache(data)
@@ -83,11 +114,18 @@ class TimeFilteredExtractor:
         self._compute_hourly_distribution(data)
         self._compute_active_dates(data)
         self._extract_config(data)
-        self._build_conversation_threads(data)
-        self._build_tool_chains(data)
+        self._build_derived(data)
 
         return data
 
+    def _load_store_costs(self) -> None:
+        """Load in-window assistant message costs and models from __store.db."""
+        from sources.sqlite_store import SqliteStoreSource
+
+        self._store_costs = SqliteStoreSource().get_message_costs(
+            since_ms=self.cutoff_unix_ms
+        )
+
     def _extract_sessions(self, data: ExtractedData30Day) -> None:
         """Extract sessions from JSONL files within the time window."""
         from utils import (
@@ -113,43 +151,191 @@ class TimeFilteredExtractor:
                     jsonl_file, project_path
                 )
                 if session is not None:
-                    data.sessions.append(session)
-                    data.total_sessions += 1
-                    data.total_messages += session.message_count
-                    data.total_cost_usd += session.cost_usd
-                    data.total_tokens["input"] += session.total_input_tokens
-                    data.total_tokens["output"] += session.total_output_tokens
-                    data.total_tokens["cache_read"] += session.total_cache_read_tokens
-
-                    # Aggregate tool calls directly (fixes path conversion bug)
-                    data.tool_calls.extend(tool_calls)
-                    data.total_tool_calls += len(tool_calls)
-                    for tc in tool_calls:
-                        data.tool_counts[tc.tool_name] = (
-                            data.tool_counts.get(tc.tool_name, 0) + 1
-                        )
-
-                        # Aggregate enhanced extraction data for K-N metrics
-                        if tc.web_url:
-                            data.web_urls_fetched.append(tc.web_url)
-                        if tc.search_query:
-                            data.search_queries.append(tc.search_query)
-                        if tc.question_text:
-                            data.questions_asked.append({
-                                "header": tc.question_header,
-                                "text": tc.question_text,
-                                "options": tc.question_options,
-                            })
-                        if tc.tool_name == "Edit" and tc.edit_old_string is not None:
-                            data.edit_operations.append({
-                                "old_string": tc.edit_old_string,
-                                "new_string": tc.edit_new_string,
-                                "replace_all": tc.edit_replace_all,
-                                "file_path": tc.file_path,
-                            })
-
-                    # Aggregate messages
-                    data.messages.extend(messages)
+                    self._add_session(data, session, tool_calls, messages)
+
+    def _add_session(
+        self,
+        data: ExtractedData30Day,
+        session: SessionData,
+        tool_calls: List[ToolCallData],
+        messages: List[MessageData],
+    ) -> None:
+        """Add one session with its tool calls and messages to the totals."""
+        data.sessions.append(session)
+        data.total_sessions += 1
+        data.total_messages += session.message_count
+        data.total_cost_usd += session.cost_usd
+        data.total_tokens["input"] += session.total_input_tokens
+        data.total_tokens["output"] += session.total_output_tokens
+        data.total_tokens["cache_read"] += session.total_cache_read_tokens
+
+        # Aggregate tool calls directly (fixes path conversion bug)
+        data.tool_calls.extend(tool_calls)
+        data.total_tool_calls += len(tool_calls)
+        for tc in tool_calls:
+            data.tool_counts[tc.tool_name] = (
+                data.tool_counts.get(tc.tool_name, 0) + 1
+            )
+
+            # Aggregate enhanced extraction data for K-N metrics
+            if tc.web_url:
+                data.web_urls_fetched.append(tc.web_url)
+            if tc.search_query:
+                data.search_queries.append(tc.search_query)
+            if tc.question_text:
+                data.questions_asked.append({
+                    "header": tc.question_header,
+                    "text": tc.question_text,
+                    "options": tc.question_options,
+                })
+            if tc.tool_name == "Edit" and tc.edit_old_string is not None:
+                data.edit_operations.append({
+                    "old_string": tc.edit_old_string,
+                    "new_string": tc.edit_new_string,
+                    "replace_all": tc.edit_replace_all,
+                    "file_path": tc.file_path,
+                })
+
+        # Aggregate messages
+        data.messages.extend(messages)
+
+    def narrow(self, wider: ExtractedData30Day) -> ExtractedData30Day:
+        """Derive this extractor's window from already extracted wider data.
+
+        Messages and tool calls are filtered in memory and sessions are
+        rebuilt from the messages left in the window, giving the same
+        result as extract() without re-reading the transcripts.
+
+        Args:
+            wider: Data extracted for a window of at least ``self.days``
+
+        Returns:
+            ExtractedData30Day for this extractor's window
+        """
+        return self._rebuild(wider)
+
+    def extract_incremental(
+        self,
+        previous: ExtractedData30Day,
+        changed_files: Iterable[Path],
+    ) -> ExtractedData30Day:
+        """Update previously extracted data after some session files changed.
+
+        Only the changed files are parsed again; every other session is
+        carried over from ``previous`` and filtered to this window as in
+        narrow(). Files that no longer exist drop their session.
+
+        Args:
+            previous: Data extracted for a window of at least ``self.days``
+            changed_files: Session JSONL files that were added, modified
+                or removed since ``previous`` was extracted
+
+        Returns:
+            ExtractedData30Day for this extractor's window
+        """
+        from utils import dir_name_to_project_path
+
+        if self.use_store:
+            self._load_store_costs()
+
+        replaced = set()
+        fresh = []
+        for path in changed_files:
+            path = Path(path)
+            replaced.add(path.stem)
+            if not path.is_file():
+                continue
+            session, tool_calls, messages = self._extract_single_session(
+                path, dir_name_to_project_path(path.parent.name)
+            )
+            if session is not None:
+                fresh.append((session, tool_calls, messages))
+
+        return self._rebuild(previous, replaced, fresh)
+
+    def _rebuild(
+        self,
+        wider: ExtractedData30Day,
+        replaced: Optional[Set[str]] = None,
+        fresh: Iterable[Tuple[SessionData, List[ToolCallData], List[MessageData]]] = (),
+    ) -> ExtractedData30Day:
+        """Filter ``wider`` to this window, swapping in re-extracted sessions."""
+        replaced = replaced or set()
+        data = ExtractedData30Day(
+            window_start=self.cutoff,
+            window_end=self._now,
+            window_days=self.days,
+        )
+
+        session_messages: Dict[str, List[MessageData]] = defaultdict(list)
+        for m in wider.messages:
+            if self._is_within_window(m.timestamp):
+                session_messages[m.session_id].append(m)
+
+        session_tools: Dict[str, List[ToolCallData]] = defaultdict(list)
+        for tc in wider.tool_calls:
+            if self._is_within_window(tc.timestamp):
+                session_tools[tc.session_id].append(tc)
+
+        for source in wider.sessions:
+            if source.session_id in replaced:
+                continue
+            messages = session_messages.get(source.session_id)
+            if not messages:
+                continue
+            tool_calls = session_tools.get(source.session_id, [])
+            models_used = sorted({m.model for m in messages if m.model})
+            first, last = messages[0].timestamp, messages[-1].timestamp
+
+            session = SessionData(
+                session_id=source.session_id,
+                project_path=source.project_path,
+                start_time=first,
+                end_time=last,
+                duration_ms=int((last - first).total_seconds() * 1000),
+                message_count=len(messages),
+                user_message_count=sum(1 for m in messages if m.message_type == "user"),
+                assistant_message_count=sum(
+                    1 for m in messages if m.message_type == "assistant"
+                ),
+                tool_call_count=len(tool_calls),
+                cost_usd=sum(m.cost_usd for m in messages),
+                model=models_used[-1] if models_used else None,
+                models_used=models_used,
+                total_input_tokens=sum(m.input_tokens for m in messages),
+                total_output_tokens=sum(m.output_tokens for m in messages),
+                total_cache_read_tokens=sum(m.cache_read_tokens for m in messages),
+                is_agent=source.is_agent,
+            )
+            self._add_session(data, session, tool_calls, messages)
+
+        for session, tool_calls, messages in fresh:
+            self._add_session(data, session, tool_calls, messages)
+
+        # stats-cache.json is small; re-reading it keeps daily activity and
+        # hour counts identical to a full extract
+        self._extract_stats_cache(data)
+
+        for name in (
+            "custom_agents", "custom_commands", "custom_skills",
+            "hook_executions", "hook_errors", "hook_preventions",
+        ):
+            setattr(data, name, getattr(wider, name))
+
+        self._aggregate_file_operations(data)
+        self._aggregate_model_usage(data)
+        self._compute_hourly_distribution(data)
+        self._compute_active_dates(data)
+        self._build_derived(data)
+
+        return data
+
+    def _build_derived(self, data: ExtractedData30Day) -> None:
+        """Build the requested structures derived from messages and tool calls."""
+        if "conversation_threads" in self.fields:
+            self._build_conversation_threads(data)
+        if "tool_chains" in self.fields:
+            self._build_tool_chains(data)
 
     def _build_conversation_threads(self, data: ExtractedData30Day) -> None:
         """Build conversation thread trees from uuid/parentUuid linkage."""
@@ -290,6 +476,12 @@ class TimeFilteredExtractor:
         last_timestamp = None
         session_in_window = False
 
+        want_content = "message_content" in self.fields
+        want_edits = "edit_operations" in self.fields
+        want_questions = "questions_asked" in self.fields
+        want_urls = "web_urls_fetched" in self.fields
+        want_queries = "search_queries" in self.fields
+
         for record in read_jsonl_file(file_path):
             msg_type = record.get("type")
 
@@ -329,6 +521,19 @@ class TimeFilteredExtractor:
             stop_reason = message.get("stop_reason") or record.get("stopReason")
             is_sidechain = record.get("isSidechain", False)
 
+            # Extract cost
+            cost_usd = record.get("costUSD", 0) or 0
+
+            # The store is authoritative for cost where it has one; JSONL model
+            # wins if present
+            stored = self._store_costs.get(record.get("uuid")) if self._store_costs else None
+            if stored is not None:
+                model = model or stored[0]
+                if stored[1] is not None:
+                    cost_usd = stored[1]
+
+            total_cost += cost_usd
+
             if model:
                 models_used.add(model)
 
@@ -342,10 +547,6 @@ class TimeFilteredExtractor:
             total_output_tokens += output_tokens
             total_cache_read += cache_read
 
-            # Extract cost
-            cost_usd = record.get("costUSD", 0) or 0
-            total_cost += cost_usd
-
             # Extract thinking info and text content
             content = message.get("content", [])
             has_thinking = False
@@ -359,7 +560,8 @@ class TimeFilteredExtractor:
                         block_type = block.get("type")
 
                         if block_type == "text":
-                            text_parts.append(block.get("text", ""))
+                            if want_content:
+                                text_parts.append(block.get("text", ""))
 
                         elif block_type == "thinking":
                             has_thinking = True
@@ -384,15 +586,15 @@ class TimeFilteredExtractor:
                             question_text = None
                             question_options = []
 
-                            if tool_name == "Edit":
+                            if tool_name == "Edit" and want_edits:
                                 edit_old_string = tool_input.get("old_string")
                                 edit_new_string = tool_input.get("new_string")
                                 edit_replace_all = tool_input.get("replace_all", False)
-                            elif tool_name == "WebFetch":
+                            elif tool_name == "WebFetch" and want_urls:
                                 web_url = tool_input.get("url")
-                            elif tool_name == "WebSearch":
+                            elif tool_name == "WebSearch" and want_queries:
                                 search_query = tool_input.get("query")
-                            elif tool_name == "AskUserQuestion":
+                            elif tool_name == "AskUserQuestion" and want_questions:
                                 questions = tool_input.get("questions", [])
                                 if questions:
                                     q = questions[0]  # First question
@@ -428,12 +630,13 @@ class TimeFilteredExtractor:
 
             # Assemble text content from blocks
             text_content = None
-            if isinstance(content, str):
-                text_content = content
-            elif text_parts:
-                text_content = "\n".join(text_parts)
-            if text_content and len(text_content) > 2000:
-                text_content = text_content[:2000]
+            if want_content:
+                if isinstance(content, str):
+                    text_content = content
+                elif text_parts:
+                    text_content = "\n".join(text_parts)
+                if text_content and len(text_content) > 2000:
+                    text_content = text_content[:2000]
 
             # Extract tool result info (for duration, success status)
             tool_result = record.get("toolUseResult")
@@ -599,6 +802,15 @@ class TimeFilteredExtractor:
                 )
                 model_data[model]["cost_usd"] += session.cost_usd / model_count
 
+        # With per-message costs from the store, attribute cost exactly
+        if self._store_costs:
+            message_costs: Dict[str, float] = defaultdict(float)
+            for m in data.messages:
+                if m.model:
+                    message_costs[m.model] += m.cost_usd
+            for model, stats in model_data.items():
+                stats["cost_usd"] = message_costs.get(model, 0.0)
+
         for model, stats in model_data.items():
             data.model_usage[model] = ModelUsageData(
                 model=model,
@@ -0,0 +1,240 @@
+"""Streaming JSON output for Claude Metrics.
+
+Serializes extracted data record by record instead of building one big
+redacted copy and dumping it in a single call. Dict values are walked
+recursively and every list (or generator) is written one element at a
+time, with redaction applied to each element just before it is encoded.
+"""
+
+import gzip
+import json
+import lzma
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Optional
+
+from redaction import redact_record, redact_stream, redact_value
+
+
+# Supported output compression formats and their file suffixes
+COMPRESSION_SUFFIXES: Dict[str, str] = {
+    "gzip": ".gz",
+    "xz": ".xz",
+}
+
+
+def output_path(path: Path, compress: bool = False, compression: str = "gzip") -> Path:
+    """Get the on-disk path for an output file.
+
+    Args:
+        path: Requested output path
+        compress: If True, the file is compressed and gets a suffix
+        compression: Compression format ("gzip" or "xz")
+
+    Returns:
+        The path that will actually be written
+    """
+    if not compress:
+        return path
+    suffix = COMPRESSION_SUFFIXES[compression]
+    if path.suffix != suffix:
+        return path.with_name(path.name + suffix)
+    return path
+
+
+def open_output(path: Path, compress: bool = False, compression: str = "gzip") -> IO[str]:
+    """Open an output file for text writing, optionally compressed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if compress and compression == "xz":
+        return lzma.open(path, "wt", encoding="utf-8")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def compress_bytes(data: bytes, compression: str = "gzip") -> bytes:
+    """Compress data as one self-contained gzip member or xz stream.
+
+    Members can be concatenated into a single file that still decompresses
+    as a whole, while each one can also be decompressed on its own.
+    """
+    if compression == "xz":
+        return lzma.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def read_record(
+    path: Path,
+    offset: int,
+    length: int,
+    compression: Optional[str] = None,
+) -> Any:
+    """Read one JSON record from a shard file by byte offset.
+
+    Args:
+        path: Shard file
+        offset: Byte offset of the record
+        length: Byte length of the record (compressed size if compressed)
+        compression: "gzip", "xz" or None for plain JSON lines
+
+    Returns:
+        The decoded record
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    if compression == "xz":
+        data = lzma.decompress(data)
+    elif compression == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+class StreamingJSONWriter:
+    """Write JSON documents incrementally to a text stream.
+
+    The output is byte-for-byte what ``json.dump`` would produce for the
+    redacted data, but only one list element is held in its encoded and
+    redacted form at any time. Keys ``json.dump`` rejects (neither str,
+    int, float, bool nor None) are written as ``str(key)``.
+    """
+
+    def __init__(
+        self,
+        fp: IO[str],
+        indent: Optional[int] = 2,
+        compact: bool = False,
+        include_sensitive: bool = False,
+    ):
+        """Initialize the writer.
+
+        Args:
+            fp: Text stream to write to
+            indent: JSON indentation level (ignored when compact)
+            compact: If True, write without whitespace
+            include_sensitive: If True, skip redaction
+        """
+        self.fp = fp
+        self.include_sensitive = include_sensitive
+        self.indent = None if compact else indent
+        if compact:
+            self._item_sep, self._key_sep = ",", ":"
+        elif self.indent is None:
+            self._item_sep, self._key_sep = ", ", ": "
+        else:
+            self._item_sep, self._key_sep = ",", ": "
+        self._encoder = json.JSONEncoder(
+            ensure_ascii=False,
+            indent=self.indent,
+            separators=(self._item_sep, self._key_sep),
+            default=str,
+        )
+
+    def _newline(self, depth: int) -> str:
+        if self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * depth)
+
+    def _encode(self, value: Any, depth: int) -> None:
+        """Encode a complete value at the given nesting depth."""
+        encoded = self._encoder.encode(value)
+        if self.indent is not None and depth:
+            # Raw newlines only appear between tokens, never inside strings
+            encoded = encoded.replace("\n", self._newline(depth))
+        self.fp.write(encoded)
+
+    def write(self, data: Any) -> None:
+        """Write a complete JSON document.
+
+        Args:
+            data: Value to write; dicts are walked and lists or iterators
+                are streamed element by element
+        """
+        self._write_value(data, 0)
+
+    def _write_value(self, value: Any, depth: int) -> None:
+        if isinstance(value, dict):
+            self._write_dict(value, depth)
+        elif isinstance(value, (list, tuple, Iterator)):
+            self._write_items(value, depth)
+        else:
+            self._encode(redact_record(value, self.include_sensitive), depth)
+
+    def _write_dict(self, data: Dict[str, Any], depth: int) -> None:
+        if not data:
+            self.fp.write("{}")
+            return
+
+        self.fp.write("{")
+        first = True
+        for key, value in data.items():
+            if not first:
+                self.fp.write(self._item_sep)
+            first = False
+            self.fp.write(self._newline(depth + 1))
+            self.fp.write(self._encoder.encode(_key_string(key)))
+            self.fp.write(self._key_sep)
+
+            redacted = redact_value(str(key), value, self.include_sensitive)
+            if redacted is not value:
+                self._encode(redacted, depth + 1)
+            else:
+                self._write_value(value, depth + 1)
+        self.fp.write(self._newline(depth))
+        self.fp.write("}")
+
+    def _write_items(self, items: Iterable[Any], depth: int) -> None:
+        self.fp.write("[")
+        first = True
+        for item in redact_stream(items, self.include_sensitive):
+            if not first:
+                self.fp.write(self._item_sep)
+            first = False
+            self.fp.write(self._newline(depth + 1))
+            self._encode(item, depth + 1)
+        if not first:
+            self.fp.write(self._newline(depth))
+        self.fp.write("]")
+
+
+def _key_string(key: Any) -> str:
+    """The string ``json.dump`` writes for a dict key (true/null, float repr)."""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (int, float)):
+        return json.dumps(key)
+    return str(key)
+
+
+def write_json_stream(
+    path: Path,
+    data: Any,
+    indent: Optional[int] = 2,
+    compact: bool = False,
+    compress: bool = False,
+    include_sensitive: bool = False,
+    compression: str = "gzip",
+) -> Path:
+    """Stream a JSON document to a file.
+
+    Args:
+        path: Path to write (a .gz/.xz suffix is added when compressing)
+        data: Value to write; lists and generators are streamed
+        indent: JSON indentation level
+        compact: If True, use compact separators and no indentation
+        compress: If True, compress the output
+        include_sensitive: If True, skip redaction
+        compression: Compression format ("gzip" or "xz")
+
+    Returns:
+        Path to the written file
+    """
+    path = output_path(path, compress, compression)
+    with open_output(path, compress, compression) as f:
+        StreamingJSONWriter(
+            f,
+            indent=indent,
+            compact=compact,
+            include_sensitive=include_sensitive,
+        ).write(data)
+    return path
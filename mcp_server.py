@@ -5,89 +5,618 @@ Exposes claude_metrics as an MCP server so Claude Code can introspect
 on its own usage patterns in real-time during any conversation.
 """
 
+import asyncio
+import base64
+import contextvars
+import heapq
 import json
+import os
+import pickle
 import threading
 import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 try:
     from mcp.server.fastmcp import FastMCP
 except ImportError:
     FastMCP = None
 
-from extraction import TimeFilteredExtractor
+from database import MetricsDatabase
+from extraction import ChangeSet, SessionChangeDetector, TimeFilteredExtractor
+from extraction.change_detector import FileState, stat_session_file
 from extraction.data_classes import ExtractedData30Day
 from metrics import DerivedMetricsEngine
+from metrics.search import MetricSearchIndex
 from metrics.definitions.base import (
     METRIC_DEFINITIONS,
     MetricDefinition,
     get_metric,
     get_metrics_by_category,
 )
+from server_stats import ServerStats, add_phase, phase
+from snapshot_store import PersistedSnapshot, SnapshotStore
 
 # ---------------------------------------------------------------------------
 # Caching layer
 # ---------------------------------------------------------------------------
 
+@dataclass
+class _Snapshot:
+    """Extracted data and engine for one time window."""
+
+    days: int
+    data: ExtractedData30Day
+    engine: DerivedMetricsEngine
+    refreshed_at: float  # time.monotonic() of the underlying extraction
+    duration: float  # seconds the extraction (or derivation) took
+    size_bytes: int
+    derived_from: Optional[int] = None  # wider window this was filtered from
+    from_disk: bool = False  # loaded from a persisted snapshot
+    extracted_at: float = 0.0  # time.time() of the underlying extraction
+    # Session file states the data was extracted from (with change detection)
+    file_states: Optional[Dict[Path, FileState]] = None
+
+
+def _estimate_size(data: ExtractedData30Day) -> int:
+    """Rough in-memory size of extracted data, for the cache memory cap."""
+    content = sum(len(m.content) for m in data.messages if m.content)
+    return (
+        600 * len(data.messages)
+        + 500 * len(data.tool_calls)
+        + 400 * len(data.sessions)
+        + content
+    )
+
+
+class _SharedLockBusy(Exception):
+    """Another holder has a window's cross-process lock (see _get_snapshot)."""
+
+
 class MetricsCache:
-    """Lazy, TTL-based cache for extracted data and metrics engine.
+    """Lazy, TTL-based cache for extracted data and metrics engines.
 
     - Lazy: only extracts on first access, not on server startup.
     - TTL: cached data expires after ``ttl_seconds`` (default 300 = 5 min).
+    - Multi-window: snapshots are kept per ``days`` in an LRU bounded by
+      ``max_windows`` and an estimated ``max_bytes``. A window narrower than
+      a fresh cached one is derived from it in memory instead of re-reading
+      transcripts.
+    - Stale-while-revalidate: with ``background_refresh``, expired data keeps
+      being served while a background thread re-extracts, then the new data
+      and engine are swapped in together.
+    - Change detection: with a ``change_detector``, cached windows are
+      updated as soon as session files change, re-parsing only those files.
+      ``ttl_seconds`` then only bounds how long a window goes without a
+      full re-extraction. Metric results whose inputs did not change are
+      carried over to the updated engine.
+    - Warm start: with a ``snapshot_store`` (and ``background_refresh``),
+      extracted windows are saved to disk and a new process serves them
+      straight away while re-extracting in the background. Incremental
+      updates are saved at most once per ``persist_interval`` seconds.
+    - Shared between processes: servers using the same ``snapshot_store``
+      extract one at a time under its lock file, and a server that finds a
+      fresher window written by another loads it instead of extracting.
+    - Warmup: with a ``warmup`` hot set, every newly installed window has
+      those metrics calculated in a background thread, in the hot set's
+      order, so requests for them are answered from the engine cache.
     - Thread-safe via a reentrant lock.
     """
 
-    def __init__(self, ttl_seconds: int = 300):
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        background_refresh: bool = False,
+        max_windows: int = 4,
+        max_bytes: int = 512 * 1024 * 1024,
+        change_detector: Optional[SessionChangeDetector] = None,
+        snapshot_store: Optional[SnapshotStore] = None,
+        warmup: Optional[Callable[[], List[str]]] = None,
+        persist_interval: float = 60.0,
+    ):
         self.ttl_seconds = ttl_seconds
+        self.persist_interval = persist_interval
+        self.warmup = warmup
+        self.change_detector = change_detector
+        self.snapshot_store = snapshot_store
+        self.background_refresh = background_refresh
+        self.max_windows = max_windows
+        self.max_bytes = max_bytes
         self._lock = threading.RLock()
-        self._data: Optional[ExtractedData30Day] = None
-        self._engine: Optional[DerivedMetricsEngine] = None
-        self._days: int = 30
-        self._last_refresh: float = 0.0
+        self._windows: "OrderedDict[int, _Snapshot]" = OrderedDict()
+        self._current: Optional[_Snapshot] = None
+        self._last_refresh_error: Optional[str] = None
+        self._refresh_threads: Dict[Any, threading.Thread] = {}
+        self._warmup_threads: Dict[int, threading.Thread] = {}
+        # Per window: time.monotonic() of the last save, and a pending save
+        self._persisted_at: Dict[int, float] = {}
+        self._persist_timers: Dict[int, threading.Timer] = {}
+        # Per thread: the window whose cross-process lock it already holds
+        self._shared_window = threading.local()
+
+    def _is_stale(self, snapshot: _Snapshot) -> bool:
+        return (time.monotonic() - snapshot.refreshed_at) > self.ttl_seconds
+
+    def _has_changes(self) -> bool:
+        return self.change_detector is not None and self.change_detector.poll()
+
+    def _extract(self, days: int) -> _Snapshot:
+        started = time.monotonic()
+        file_states = None
+        if self.change_detector is not None:
+            # Baseline before reading, so nothing written meanwhile is missed
+            file_states = self.change_detector.scan()
+        extractor = TimeFilteredExtractor(days=days)
+        with phase("extract"):
+            data = extractor.extract()
+        engine = DerivedMetricsEngine(data)
+        now = time.monotonic()
+        snapshot = _Snapshot(
+            days,
+            data,
+            engine,
+            now,
+            now - started,
+            _estimate_size(data),
+            extracted_at=time.time(),
+            file_states=file_states,
+        )
+        self._persist(snapshot)
+        return snapshot
 
-    def _is_stale(self) -> bool:
-        if self._data is None:
-            return True
-        return (time.monotonic() - self._last_refresh) > self.ttl_seconds
+    def _extract_shared(self, days: int, adopt: bool = True, wait: bool = True) -> _Snapshot:
+        """Extract as the single writer, or adopt what another process wrote.
 
-    def _refresh(self, days: int) -> None:
-        extractor = TimeFilteredExtractor(days=days)
-        self._data = extractor.extract()
-        self._engine = DerivedMetricsEngine(self._data)
-        self._days = days
-        self._last_refresh = time.monotonic()
+        With ``wait=False``, for callers holding the process-wide lock, the
+        cross-process lock is only tried: _SharedLockBusy is raised if it is
+        taken, unless this thread already waited for it.
+        """
+        if self.snapshot_store is None:
+            return self._extract(days)
+        with ExitStack() as stack:
+            # A thread that waited in _get_snapshot already holds the lock
+            if getattr(self._shared_window, "days", None) != days:
+                if wait:
+                    with phase("shared_lock_wait"):
+                        stack.enter_context(self.snapshot_store.lock(days))
+                elif not stack.enter_context(self.snapshot_store.lock(days, timeout=0)):
+                    if self.snapshot_store.locking:
+                        raise _SharedLockBusy(days)
+            if adopt:
+                # Whoever held the lock before us may just have written it
+                snapshot = self._adopt(days)
+                if snapshot is not None:
+                    return snapshot
+            return self._extract(days)
+
+    def _adopt(self, days: int) -> Optional[_Snapshot]:
+        extracted_at = self.snapshot_store.extracted_at(days)
+        if extracted_at is None or time.time() - extracted_at > self.ttl_seconds:
+            return None
+        current = self._windows.get(days)
+        if current is not None and current.derived_from is None:
+            if extracted_at <= current.extracted_at:
+                return None
+        snapshot = self._load(days)
+        if snapshot is None:
+            return None
+        if self.change_detector is not None and snapshot.file_states is None:
+            # Cannot tell which session files changed since it was written
+            return None
+        return snapshot
+
+    def _derive(self, source: _Snapshot, days: int) -> _Snapshot:
+        started = time.monotonic()
+        with phase("derive"):
+            data = TimeFilteredExtractor(days=days).narrow(source.data)
+        engine = DerivedMetricsEngine(data)
+        return _Snapshot(
+            days,
+            data,
+            engine,
+            source.refreshed_at,  # expires together with its source
+            time.monotonic() - started,
+            _estimate_size(data),
+            derived_from=source.days,
+            extracted_at=source.extracted_at,
+        )
 
-    def get_data(self, days: int = 30, force_refresh: bool = False) -> ExtractedData30Day:
+    def _update(self, source: _Snapshot, changes: ChangeSet) -> _Snapshot:
+        started = time.monotonic()
+        file_states = None
+        if source.file_states is not None:
+            # Stat before reading, as for a full extraction
+            file_states = dict(source.file_states)
+            for path in changes.paths:
+                state = stat_session_file(path)
+                if state is None:
+                    file_states.pop(path, None)
+                else:
+                    file_states[path] = state
+        with phase("update"):
+            data = TimeFilteredExtractor(days=source.days).extract_incremental(
+                source.data, changes.paths
+            )
+        engine = DerivedMetricsEngine(data)
+        with phase("reuse_metrics"):
+            engine.reuse(source.engine)
+        return _Snapshot(
+            source.days,
+            data,
+            engine,
+            source.refreshed_at,  # still due a full re-extract at the TTL
+            time.monotonic() - started,
+            _estimate_size(data),
+            extracted_at=source.extracted_at,
+            file_states=file_states,
+        )
+
+    def _persist(self, snapshot: _Snapshot) -> None:
+        if self.snapshot_store is None:
+            return
+        self._persisted_at[snapshot.days] = time.monotonic()
+        try:
+            self.snapshot_store.save(PersistedSnapshot(
+                snapshot.days,
+                snapshot.data,
+                dict(snapshot.engine.cache),
+                snapshot.extracted_at,
+                snapshot.file_states or {},
+            ))
+        except (OSError, pickle.PicklingError):
+            # An unwritable cache directory must not break serving
+            pass
+
+    def _persist_later(self, days: int) -> None:
+        """Save window ``days`` on a timer, at most once per persist_interval."""
+        if self.snapshot_store is None:
+            return
+        with self._lock:
+            if days in self._persist_timers:
+                return  # the pending save will write the latest data
+            due = self._persisted_at.get(days, float("-inf")) + self.persist_interval
+            timer = threading.Timer(
+                max(0.0, due - time.monotonic()), self._persist_window, (days,)
+            )
+            timer.daemon = True
+            self._persist_timers[days] = timer
+        timer.start()
+
+    def _persist_window(self, days: int) -> None:
         with self._lock:
-            if force_refresh or self._is_stale() or days != self._days:
-                self._refresh(days)
-            assert self._data is not None
-            return self._data
+            self._persist_timers.pop(days, None)
+            snapshot = self._windows.get(days)
+        if snapshot is not None and snapshot.derived_from is None:
+            self._persist(snapshot)
+
+    def _load(self, days: int) -> Optional[_Snapshot]:
+        if self.snapshot_store is None:
+            return None
+        started = time.monotonic()
+        with phase("snapshot_load"):
+            stored = self.snapshot_store.load(days)
+        if stored is None:
+            return None
+        engine = DerivedMetricsEngine(stored.data)
+        engine.cache.update(stored.metrics)
+        file_states = stored.file_states or None
+        if self.change_detector is not None and file_states is not None:
+            # Session files changed since that extraction are re-read
+            self.change_detector.add_changes_since(file_states)
+        now = time.monotonic()
+        return _Snapshot(
+            days,
+            stored.data,
+            engine,
+            now - stored.age,
+            now - started,
+            _estimate_size(stored.data),
+            from_disk=True,
+            extracted_at=stored.extracted_at,
+            file_states=file_states,
+        )
+
+    def _warm_start(self, days: int) -> Optional[_Snapshot]:
+        """Serve a persisted snapshot while re-extracting in the background."""
+        if not self.background_refresh or self._find_source(days) is not None:
+            return None
+        snapshot = self._load(days)
+        if snapshot is None:
+            return None
+        self._install(snapshot)
+        self._start_background_refresh(days)
+        return snapshot
+
+    def _apply_changes(self) -> None:
+        """Re-extract changed session files into every extracted window."""
+        changes = self.change_detector.consume()
+        if not changes:
+            return
+        with self._lock:
+            sources = [s for s in self._windows.values() if s.derived_from is None]
+        updated = [(source, self._update(source, changes)) for source in sources]
+        with self._lock:
+            for source, snapshot in updated:
+                # Skip windows fully re-extracted while we were updating
+                if self._windows.get(source.days) is source:
+                    self._replace(snapshot)
+                    self._persist_later(snapshot.days)
+
+    def _find_source(self, days: int) -> Optional[_Snapshot]:
+        """Smallest fresh cached window wider than ``days``."""
+        candidates = [
+            snap for snap in self._windows.values()
+            if snap.days > days and not self._is_stale(snap)
+        ]
+        return min(candidates, key=lambda snap: snap.days, default=None)
+
+    def _install(self, snapshot: _Snapshot) -> None:
+        # Caller holds the lock; data and engine are replaced together
+        self._windows[snapshot.days] = snapshot
+        self._windows.move_to_end(snapshot.days)
+        if snapshot.derived_from is None:
+            self._last_refresh_error = None
+
+        # Evict least recently used windows over the count/memory caps
+        while len(self._windows) > 1 and (
+            len(self._windows) > self.max_windows
+            or self.cached_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._windows))
+            if oldest == snapshot.days:
+                break
+            del self._windows[oldest]
+
+        if self.warmup is not None:
+            self._start_warmup(snapshot.days)
+
+    def _replace(self, snapshot: _Snapshot) -> None:
+        # Windows derived from the old data are re-derived on next use
+        stale = [k for k, s in self._windows.items() if s.derived_from == snapshot.days]
+        for key in stale:
+            del self._windows[key]
+        self._install(snapshot)
+
+    def _refresh(self, days: int) -> _Snapshot:
+        # Caller holds the lock
+        source = self._find_source(days)
+        if source is not None:
+            snapshot = self._derive(source, days)
+        else:
+            snapshot = self._extract_shared(days, wait=False)
+        self._install(snapshot)
+        return snapshot
+
+    def _background_refresh(self, days: int) -> None:
+        try:
+            snapshot = self._extract_shared(days)
+        except Exception as e:
+            with self._lock:
+                self._last_refresh_error = str(e)
+            return
+        with self._lock:
+            self._replace(snapshot)
+
+    def _background_apply_changes(self) -> None:
+        try:
+            self._apply_changes()
+        except Exception as e:
+            with self._lock:
+                self._last_refresh_error = str(e)
+
+    def _start_thread(self, key: Any, name: str, target, *args) -> None:
+        thread = self._refresh_threads.get(key)
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self._refresh_threads[key] = thread
+        thread.start()
+
+    def _start_background_refresh(self, days: int) -> None:
+        self._start_thread(
+            days, f"metrics-cache-refresh-{days}d", self._background_refresh, days
+        )
+
+    def _start_warmup(self, days: int) -> None:
+        # Caller holds the lock; a running warmup picks up the new snapshot
+        thread = self._warmup_threads.get(days)
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(
+            target=self._warmup, args=(days,), name=f"metrics-cache-warmup-{days}d",
+            daemon=True,
+        )
+        self._warmup_threads[days] = thread
+        thread.start()
+
+    def _warmup(self, days: int) -> None:
+        """Calculate the hot set for a window until its latest snapshot is warm."""
+        warmed = None
+        while True:
+            with self._lock:
+                snapshot = self._windows.get(days)
+                if snapshot is None or snapshot is warmed:
+                    # Exit under the lock so a new install starts a new thread
+                    self._warmup_threads.pop(days, None)
+                    return
+            try:
+                metric_ids = list(self.warmup())
+            except Exception:
+                metric_ids = []
+            for metric_id in metric_ids:
+                if self._windows.get(days) is not snapshot:
+                    break  # superseded; warm the new snapshot instead
+                snapshot.engine.calculate_metric(metric_id)
+            warmed = snapshot
+
+    def _get_snapshot(self, days: int, force_refresh: bool) -> _Snapshot:
+        with ExitStack() as shared_lock:
+            while True:
+                with phase("lock_wait"):
+                    self._lock.acquire()
+                try:
+                    return self._serve(days, force_refresh)
+                except _SharedLockBusy:
+                    pass
+                finally:
+                    self._lock.release()
+                # Another process or thread is extracting this window: wait for
+                # it without the process-wide lock, so other windows are still
+                # served, then serve again holding its lock
+                with phase("shared_lock_wait"):
+                    shared_lock.enter_context(self.snapshot_store.lock(days))
+                self._shared_window.days = days
+                shared_lock.callback(setattr, self._shared_window, "days", None)
+
+    def _serve(self, days: int, force_refresh: bool) -> _Snapshot:
+        # Caller holds the lock
+        snapshot = self._windows.get(days)
+        if force_refresh:
+            snapshot = self._extract_shared(days, adopt=False, wait=False)
+            self._replace(snapshot)
+        elif snapshot is None:
+            snapshot = self._warm_start(days) or self._refresh(days)
+        elif self._is_stale(snapshot):
+            if self.background_refresh:
+                self._start_background_refresh(snapshot.derived_from or days)
+            else:
+                snapshot = self._refresh(days)
+        elif self._has_changes():
+            if self.background_refresh:
+                self._start_thread(
+                    "changes", "metrics-cache-changes", self._background_apply_changes
+                )
+            else:
+                self._apply_changes()
+                snapshot = self._windows.get(days) or self._refresh(days)
+        self._windows.move_to_end(days)
+        self._current = snapshot
+        return snapshot
+
+    def get_data(self, days: int = 30, force_refresh: bool = False) -> ExtractedData30Day:
+        return self._get_snapshot(days, force_refresh).data
 
     def get_engine(self, days: int = 30, force_refresh: bool = False) -> DerivedMetricsEngine:
+        return self._get_snapshot(days, force_refresh).engine
+
+    def preload(self, days: int = 30) -> None:
+        """Load the persisted snapshot for ``days`` ahead of the first request."""
         with self._lock:
-            if force_refresh or self._is_stale() or days != self._days:
-                self._refresh(days)
-            assert self._engine is not None
-            return self._engine
+            if days not in self._windows:
+                self._warm_start(days)
+
+    def persist(self) -> None:
+        """Save every extracted window with the metrics calculated so far."""
+        with self._lock:
+            for timer in self._persist_timers.values():
+                timer.cancel()
+            self._persist_timers.clear()
+            snapshots = [s for s in self._windows.values() if s.derived_from is None]
+        for snapshot in snapshots:
+            self._persist(snapshot)
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Wait for running background refreshes; True if none is running."""
+        for thread in list(self._refresh_threads.values()):
+            thread.join(timeout)
+        return not self.is_refreshing
+
+    def wait_for_warmup(self, timeout: Optional[float] = None) -> bool:
+        """Wait for running warmups; True if none is running."""
+        for thread in list(self._warmup_threads.values()):
+            thread.join(timeout)
+        return not self.is_warming_up
+
+    @property
+    def data(self) -> Optional[ExtractedData30Day]:
+        """Data of the most recently served window (no refresh)."""
+        return self._current.data if self._current else None
+
+    @property
+    def is_refreshing(self) -> bool:
+        return any(t.is_alive() for t in list(self._refresh_threads.values()))
+
+    @property
+    def is_warming_up(self) -> bool:
+        return any(t.is_alive() for t in list(self._warmup_threads.values()))
+
+    @property
+    def snapshot_age(self) -> Optional[float]:
+        """Seconds since the current data was extracted."""
+        if self._current is None:
+            return None
+        return time.monotonic() - self._current.refreshed_at
+
+    @property
+    def last_refresh_duration(self) -> Optional[float]:
+        """Seconds the current window's extraction or derivation took."""
+        return self._current.duration if self._current else None
+
+    @property
+    def cached_bytes(self) -> int:
+        """Estimated memory held by all cached windows."""
+        return sum(snap.size_bytes for snap in self._windows.values())
+
+    @property
+    def cached_windows(self) -> List[Dict[str, Any]]:
+        """Cached windows, least recently used first."""
+        with self._lock:
+            return [
+                {
+                    "days": snap.days,
+                    "derived_from": snap.derived_from,
+                    "from_disk": snap.from_disk,
+                    "age_seconds": round(time.monotonic() - snap.refreshed_at, 1),
+                    "estimated_mb": round(snap.size_bytes / (1024 * 1024), 2),
+                }
+                for snap in self._windows.values()
+            ]
 
     @property
     def last_refresh_iso(self) -> Optional[str]:
-        if self._last_refresh == 0.0:
+        if self._current is None:
             return None
         # Convert monotonic offset to wall-clock approximation
-        age = time.monotonic() - self._last_refresh
+        age = time.monotonic() - self._current.refreshed_at
         ts = datetime.now(timezone.utc).timestamp() - age
         return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
 
     @property
     def cached_days(self) -> int:
-        return self._days
+        return self._current.days if self._current else 30
 
     @property
     def is_loaded(self) -> bool:
-        return self._data is not None
+        return self._current is not None
+
+
+def _warmup_policy(spec: str, stats: ServerStats) -> Optional[Callable[[], List[str]]]:
+    """Hot set of metrics to calculate after each refresh.
+
+    Args:
+        spec: "off", "all" (most requested first, then by ID) or "top[:N]"
+            (the N most requested metrics, default 20)
+        stats: Server stats holding the per-metric request counts
+
+    Returns:
+        Callable listing metric IDs in priority order, or None for "off"
+    """
+    name, _, count = spec.strip().lower().partition(":")
+    if name in ("", "off"):
+        return None
+    if name == "all":
+        return lambda: list(dict.fromkeys(stats.most_requested() + sorted(METRIC_DEFINITIONS)))
+    if name == "top":
+        limit = int(count) if count else 20
+        return lambda: stats.most_requested(limit)
+    raise ValueError(f"Unknown warmup policy: {spec!r} (expected off, all or top[:N])")
 
 
 # ---------------------------------------------------------------------------
@@ -102,7 +631,94 @@ if FastMCP is not None:
 else:
     mcp = None
 
-_cache = MetricsCache()
+# Handler latency stats, optionally logged as JSONL (CLAUDE_METRICS_STATS_LOG)
+_stats = ServerStats(log_path=os.environ.get("CLAUDE_METRICS_STATS_LOG"))
+
+# Session changes are picked up as they happen; the TTL only forces an
+# occasional full re-extract (config, stats cache, window start drift).
+# CLAUDE_METRICS_WARMUP precomputes a hot set of metrics after each refresh.
+_cache = MetricsCache(
+    ttl_seconds=3600,
+    background_refresh=True,
+    change_detector=SessionChangeDetector(),
+    snapshot_store=SnapshotStore(),
+    warmup=_warmup_policy(os.environ.get("CLAUDE_METRICS_WARMUP", "off"), _stats),
+)
+
+
+# ---------------------------------------------------------------------------
+# Executor offload for heavy tools
+# ---------------------------------------------------------------------------
+
+# Maximum concurrent calls per tool; unlisted offloaded tools get the default.
+# Cheap catalog and status tools run directly on the event loop.
+TOOL_CONCURRENCY: Dict[str, int] = {
+    "calculate_category": 2,
+    "calculate_metrics": 2,
+    "refresh_data": 1,
+}
+DEFAULT_TOOL_CONCURRENCY = 4
+
+# Threads, not processes: the cache lives in this process. Extraction and
+# calculation still contend for the GIL, but the event loop stays free to
+# answer cheap calls and to notice cancellations.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CLAUDE_METRICS_MCP_WORKERS", "4")),
+    thread_name_prefix="metrics-tool",
+)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class ToolCancelled(Exception):
+    """Raised inside offloaded work once its call has been cancelled."""
+
+
+def _check_cancelled(cancelled: threading.Event) -> None:
+    if cancelled.is_set():
+        raise ToolCancelled()
+
+
+def _semaphore(tool: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    if tool not in per_loop:
+        per_loop[tool] = asyncio.Semaphore(
+            TOOL_CONCURRENCY.get(tool, DEFAULT_TOOL_CONCURRENCY)
+        )
+    return per_loop[tool]
+
+
+async def _offload(tool: str, work: Callable[[threading.Event], str]) -> str:
+    """Run blocking tool work in the executor under the tool's limit.
+
+    ``work`` receives an event that is set when the call is cancelled (the
+    client aborted it), so long loops can stop early. Work still queued
+    for the executor is dropped without running.
+    """
+    cancelled = threading.Event()
+    semaphore = _semaphore(tool)
+    with phase("throttle"):
+        await semaphore.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+
+        def timed_work(cancelled: threading.Event) -> str:
+            add_phase("queue", (time.perf_counter() - submitted) * 1000)
+            return work(cancelled)
+
+        # Run in a copy of this context so phases timed in the worker
+        # thread are recorded against this call
+        context = contextvars.copy_context()
+        try:
+            return await loop.run_in_executor(_executor, context.run, timed_work, cancelled)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    finally:
+        semaphore.release()
 
 
 # ---------------------------------------------------------------------------
@@ -135,6 +751,46 @@ def _metric_result(metric_id: str, engine: DerivedMetricsEngine) -> Dict[str, An
     return result
 
 
+# ---------------------------------------------------------------------------
+# Helpers: pagination cursors and field projection
+# ---------------------------------------------------------------------------
+
+# Fields calculate_category returns unless ``fields`` asks for others
+CATEGORY_FIELDS = ["id", "name", "value", "unit"]
+
+
+def _encode_cursor(key: List[Any]) -> str:
+    """Opaque cursor for the sort key of the last item on a page."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> List[Any]:
+    """Sort key from a cursor; raises ValueError if it is malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(key, list) or not key:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return key
+
+
+def _project(
+    record: Dict[str, Any], fields: Optional[List[str]], id_key: str
+) -> Dict[str, Any]:
+    """Keep only the requested fields of a record (always keeps its id)."""
+    if fields is None:
+        return record
+    return {k: v for k, v in record.items() if k == id_key or k in fields}
+
+
+def _metrics_db_path() -> Path:
+    """Database written by ``claude-metrics extract`` (override: CLAUDE_METRICS_DB)."""
+    return Path(
+        os.environ.get("CLAUDE_METRICS_DB", "./claude_metrics_output/claude_metrics.db")
+    )
+
+
 def _definition_summary(d: MetricDefinition) -> Dict[str, str]:
     return {
         "id": d.id,
@@ -209,6 +865,38 @@ CATEGORY_THEMES: Dict[str, str] = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Static payloads (definitions do not change while the server runs)
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def _search_index() -> MetricSearchIndex:
+    return MetricSearchIndex(METRIC_DEFINITIONS.values(), CATEGORY_THEMES)
+
+
+@lru_cache(maxsize=1)
+def _catalog_json() -> str:
+    catalog = [_definition_summary(d) for d in sorted(METRIC_DEFINITIONS.values(), key=lambda x: x.id)]
+    return json.dumps(catalog)
+
+
+@lru_cache(maxsize=1)
+def _categories_json() -> str:
+    categories = []
+    for cat_id in DerivedMetricsEngine.CATEGORY_ORDER:
+        defs = get_metrics_by_category(cat_id)
+        if not defs:
+            continue
+        ids = sorted(d.id for d in defs)
+        categories.append({
+            "category": cat_id,
+            "theme": CATEGORY_THEMES.get(cat_id, ""),
+            "count": len(defs),
+            "id_range": f"{ids[0]}-{ids[-1]}" if ids else "",
+        })
+    return json.dumps(categories)
+
+
 # ===================================================================
 # Tools and Resources (only defined when mcp package is available)
 # ===================================================================
@@ -216,7 +904,8 @@ CATEGORY_THEMES: Dict[str, str] = {
 if mcp is not None:
 
     @mcp.tool()
-    def get_metric(metric_id: str, days: int = 30) -> str:
+    @_stats.instrument
+    async def get_metric(metric_id: str, days: int = 30) -> str:
         """Get a single metric value by ID.
 
         Args:
@@ -226,50 +915,110 @@ if mcp is not None:
         Returns:
             JSON with metric_id, name, value, unit, description, breakdown, trend.
         """
-        engine = _cache.get_engine(days=days)
-        return json.dumps(_metric_result(metric_id, engine), default=str)
+        if metric_id in METRIC_DEFINITIONS:
+            _stats.count_metric(metric_id)
+
+        def work(cancelled: threading.Event) -> str:
+            engine = _cache.get_engine(days=days)
+            with phase("calculate"):
+                result = _metric_result(metric_id, engine)
+            with phase("serialize"):
+                return json.dumps(result, default=str)
+
+        return await _offload("get_metric", work)
 
 
     @mcp.tool()
-    def calculate_category(category: str, days: int = 30) -> str:
+    @_stats.instrument
+    async def calculate_category(
+        category: str,
+        days: int = 30,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> str:
         """Calculate all metrics in a category.
 
         Args:
             category: Category letter(s), e.g. "A", "D", "AA", "BC".
             days: Time window in days (default 30).
+            limit: Metrics per page; only that page is calculated
+                (default: the whole category).
+            cursor: next_cursor from the previous page.
+            fields: Fields per metric, from id, name, value, unit,
+                description, type, breakdown, trend (default: id, name,
+                value, unit).
 
         Returns:
-            JSON with category, theme, metrics list, and count.
+            JSON with category, theme, metrics list, count, total and
+            next_cursor (null on the last page).
         """
         category = category.upper()
         definitions = get_metrics_by_category(category)
         if not definitions:
             return json.dumps({"error": f"Unknown category: {category}"})
 
-        engine = _cache.get_engine(days=days)
-        engine.calculate_all(categories=[category])
-
-        metrics = []
-        for d in sorted(definitions, key=lambda x: x.id):
-            mv = engine.cache.get(d.id)
-            if mv is not None:
-                metrics.append({
-                    "id": d.id,
-                    "name": d.name,
-                    "value": mv.value,
-                    "unit": d.unit or "",
-                })
-
-        return json.dumps({
-            "category": category,
-            "theme": CATEGORY_THEMES.get(category, ""),
-            "metrics": metrics,
-            "count": len(metrics),
-        }, default=str)
+        ordered = sorted(definitions, key=lambda x: x.id)
+        if cursor:
+            try:
+                after_id = _decode_cursor(cursor)[0]
+            except ValueError as e:
+                return json.dumps({"error": str(e)})
+            ordered = [d for d in ordered if d.id > after_id]
+        page = ordered if limit is None else ordered[:max(1, limit)]
+        next_cursor = _encode_cursor([page[-1].id]) if len(page) < len(ordered) else None
+
+        def work(cancelled: threading.Event) -> str:
+            engine = _cache.get_engine(days=days)
+            _check_cancelled(cancelled)
+            with phase("calculate"):
+                if len(page) == len(definitions):
+                    engine.calculate_all(
+                        categories=[category],
+                        # Only before a metric starts: a finished one stays cached
+                        progress_callback=lambda metric_id, status: (
+                            status == "calculating" and _check_cancelled(cancelled)
+                        ),
+                    )
+                else:
+                    for d in page:
+                        _check_cancelled(cancelled)
+                        engine.calculate_metric(d.id)
+
+            metrics = []
+            for d in page:
+                mv = engine.cache.get(d.id)
+                if mv is not None:
+                    record = {
+                        "id": d.id,
+                        "name": d.name,
+                        "value": mv.value,
+                        "unit": d.unit or "",
+                        "description": d.description,
+                        "type": d.metric_type.value,
+                    }
+                    if mv.breakdown:
+                        record["breakdown"] = mv.breakdown
+                    if mv.trend is not None:
+                        record["trend"] = mv.trend
+                    metrics.append(_project(record, fields or CATEGORY_FIELDS, "id"))
+
+            with phase("serialize"):
+                return json.dumps({
+                    "category": category,
+                    "theme": CATEGORY_THEMES.get(category, ""),
+                    "metrics": metrics,
+                    "count": len(metrics),
+                    "total": len(definitions),
+                    "next_cursor": next_cursor,
+                }, default=str)
+
+        return await _offload("calculate_category", work)
 
 
     @mcp.tool()
-    def get_usage_summary(days: int = 30) -> str:
+    @_stats.instrument
+    async def get_usage_summary(days: int = 30) -> str:
         """High-level usage overview -- fast, no metric calculation needed.
 
         Args:
@@ -279,117 +1028,207 @@ if mcp is not None:
             JSON with sessions, messages, tool_calls, cost, active_days,
             top_tools, top_models, window start/end.
         """
-        data = _cache.get_data(days=days)
-
-        # Top tools (sorted by count descending)
-        top_tools = dict(
-            sorted(data.tool_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        )
-
-        # Top models (sorted by cost descending)
-        top_models = {
-            m.model: {"messages": m.message_count, "cost_usd": round(m.cost_usd, 4)}
-            for m in sorted(
-                data.model_usage.values(), key=lambda x: x.cost_usd, reverse=True
-            )[:5]
-        }
-
-        return json.dumps({
-            "sessions": data.total_sessions,
-            "messages": data.total_messages,
-            "tool_calls": data.total_tool_calls,
-            "cost_usd": round(data.total_cost_usd, 4),
-            "active_days": len(data.active_dates),
-            "top_tools": top_tools,
-            "top_models": top_models,
-            "total_tokens": data.total_tokens,
-            "window_start": data.window_start.isoformat(),
-            "window_end": data.window_end.isoformat(),
-            "window_days": data.window_days,
-        }, default=str)
+        def work(cancelled: threading.Event) -> str:
+            data = _cache.get_data(days=days)
+
+            # Top tools (sorted by count descending)
+            top_tools = dict(
+                sorted(data.tool_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+            )
+
+            # Top models (sorted by cost descending)
+            top_models = {
+                m.model: {"messages": m.message_count, "cost_usd": round(m.cost_usd, 4)}
+                for m in sorted(
+                    data.model_usage.values(), key=lambda x: x.cost_usd, reverse=True
+                )[:5]
+            }
+
+            return json.dumps({
+                "sessions": data.total_sessions,
+                "messages": data.total_messages,
+                "tool_calls": data.total_tool_calls,
+                "cost_usd": round(data.total_cost_usd, 4),
+                "active_days": len(data.active_dates),
+                "top_tools": top_tools,
+                "top_models": top_models,
+                "total_tokens": data.total_tokens,
+                "window_start": data.window_start.isoformat(),
+                "window_end": data.window_end.isoformat(),
+                "window_days": data.window_days,
+            }, default=str)
+
+        return await _offload("get_usage_summary", work)
 
 
     @mcp.tool()
-    def search_metrics(query: str) -> str:
-        """Find metrics by keyword search in name and description.
+    @_stats.instrument
+    def search_metrics(query: str, limit: int = 20) -> str:
+        """Find metrics by keyword search, best matches first.
+
+        Searches id, name, description, unit and category theme. Every word
+        must match, exactly, as a prefix ("effic" finds "efficiency") or
+        with a small typo.
 
         Args:
-            query: Search term (case-insensitive substring match).
+            query: Search words (case-insensitive).
+            limit: Maximum results (default 20, max 100).
 
         Returns:
-            JSON list of matching metric definitions (max 20).
+            JSON list of matching metric definitions, ranked by relevance.
         """
-        query_lower = query.lower()
-        results: List[Dict[str, str]] = []
-
-        for d in METRIC_DEFINITIONS.values():
-            if query_lower in d.name.lower() or query_lower in d.description.lower():
-                results.append(_definition_summary(d))
-                if len(results) >= 20:
-                    break
-
-        return json.dumps(results)
+        definitions = _search_index().search(query, limit=max(1, min(limit, 100)))
+        return json.dumps([_definition_summary(d) for d in definitions])
 
 
     @mcp.tool()
-    def calculate_metrics(metric_ids: list[str], days: int = 30) -> str:
+    @_stats.instrument
+    async def calculate_metrics(
+        metric_ids: list[str],
+        days: int = 30,
+        fields: Optional[List[str]] = None,
+    ) -> str:
         """Batch calculate specific metrics by ID.
 
         Args:
             metric_ids: List of metric IDs to calculate (e.g. ["D001", "D029"]).
             days: Time window in days (default 30).
+            fields: Fields per metric, e.g. ["value"] to leave out large
+                breakdowns (default: all; metric_id is always included).
 
         Returns:
             JSON with metrics list and any errors.
         """
-        engine = _cache.get_engine(days=days)
-        metrics: List[Dict[str, Any]] = []
-        errors: List[str] = []
-
         for mid in metric_ids:
-            result = _metric_result(mid, engine)
-            if "error" in result:
-                errors.append(result["error"])
-            else:
-                metrics.append(result)
+            if mid in METRIC_DEFINITIONS:
+                _stats.count_metric(mid)
+
+        def work(cancelled: threading.Event) -> str:
+            engine = _cache.get_engine(days=days)
+            metrics: List[Dict[str, Any]] = []
+            errors: List[str] = []
+
+            with phase("calculate"):
+                for mid in metric_ids:
+                    _check_cancelled(cancelled)
+                    result = _metric_result(mid, engine)
+                    if "error" in result:
+                        errors.append(result["error"])
+                    else:
+                        metrics.append(_project(result, fields, "metric_id"))
+
+            with phase("serialize"):
+                return json.dumps({"metrics": metrics, "errors": errors}, default=str)
 
-        return json.dumps({"metrics": metrics, "errors": errors}, default=str)
+        return await _offload("calculate_metrics", work)
 
 
     @mcp.tool()
-    def get_session_details(days: int = 7, limit: int = 10) -> str:
-        """Detailed breakdown of recent sessions.
+    @_stats.instrument
+    async def get_session_details(
+        days: int = 7,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """Detailed breakdown of recent sessions, newest first.
 
         Args:
             days: Time window in days (default 7).
-            limit: Maximum sessions to return (default 10).
+            limit: Sessions per page (default 10, max 200).
+            cursor: next_cursor from the previous page.
+            fields: Fields per session, from project, start, duration_min,
+                messages, tools, cost_usd, model, is_agent (default: all;
+                session_id is always included).
 
         Returns:
-            JSON list of session details (project, duration, messages,
-            tools, cost, model).
+            JSON with a sessions list and next_cursor (null on the last
+            page).
         """
-        data = _cache.get_data(days=days)
-        sessions = sorted(data.sessions, key=lambda s: s.start_time, reverse=True)[:limit]
-
-        result = []
-        for s in sessions:
-            result.append({
-                "session_id": s.session_id,
-                "project": s.project_path,
-                "start": s.start_time.isoformat(),
-                "duration_min": round(s.duration_ms / 60_000, 1) if s.duration_ms else 0,
-                "messages": s.message_count,
-                "tools": s.tool_call_count,
-                "cost_usd": round(s.cost_usd, 4),
-                "model": s.model,
-                "is_agent": s.is_agent,
+        after = None
+        if cursor:
+            try:
+                start, session_id = _decode_cursor(cursor)
+                after = (datetime.fromisoformat(start), session_id)
+            except (ValueError, TypeError) as e:
+                return json.dumps({"error": str(e)})
+        limit = max(1, min(limit, 200))
+
+        def work(cancelled: threading.Event) -> str:
+            data = _cache.get_data(days=days)
+
+            # Keyset pagination: pages stay stable while data is refreshed,
+            # and a top-k heap avoids sorting every session in the window
+            def key(s):
+                return (s.start_time, s.session_id)
+
+            candidates = data.sessions
+            if after is not None:
+                candidates = (s for s in data.sessions if key(s) < after)
+            sessions = heapq.nlargest(limit + 1, candidates, key=key)
+            next_cursor = None
+            if len(sessions) > limit:
+                sessions = sessions[:limit]
+                last = sessions[-1]
+                next_cursor = _encode_cursor([last.start_time.isoformat(), last.session_id])
+
+            result = []
+            for s in sessions:
+                result.append(_project({
+                    "session_id": s.session_id,
+                    "project": s.project_path,
+                    "start": s.start_time.isoformat(),
+                    "duration_min": round(s.duration_ms / 60_000, 1) if s.duration_ms else 0,
+                    "messages": s.message_count,
+                    "tools": s.tool_call_count,
+                    "cost_usd": round(s.cost_usd, 4),
+                    "model": s.model,
+                    "is_agent": s.is_agent,
+                }, fields, "session_id"))
+
+            return json.dumps({"sessions": result, "next_cursor": next_cursor}, default=str)
+
+        return await _offload("get_session_details", work)
+
+
+    @mcp.tool()
+    @_stats.instrument
+    async def search_transcripts(query: str, limit: int = 20, kind: Optional[str] = None) -> str:
+        """Ranked full-text search across all indexed session transcripts.
+
+        Requires a database built with ``claude-metrics extract --fts``.
+
+        Args:
+            query: Words to match (all must appear; "word*" for prefix match).
+            limit: Maximum results (default 20, max 100).
+            kind: Optional filter: user, assistant, bash, grep, web_search.
+
+        Returns:
+            JSON list of matches with session_id, timestamp, kind, snippet.
+        """
+        db_path = _metrics_db_path()
+        if not db_path.exists():
+            return json.dumps({
+                "error": f"No metrics database at {db_path}. Run 'claude-metrics extract --fts'."
             })
 
-        return json.dumps(result, default=str)
+        def work(cancelled: threading.Event) -> str:
+            with MetricsDatabase(db_path, read_only=True) as db:
+                if not db.has_fts():
+                    return json.dumps({
+                        "error": "Database has no full-text index. Run 'claude-metrics extract --fts'."
+                    })
+                with phase("query"):
+                    results = db.search(query, limit=max(1, min(limit, 100)), kind=kind)
+
+            return json.dumps(results, default=str)
+
+        return await _offload("search_transcripts", work)
 
 
     @mcp.tool()
-    def refresh_data(days: int = 30) -> str:
+    @_stats.instrument
+    async def refresh_data(days: int = 30) -> str:
         """Force cache invalidation and re-extraction.
 
         Args:
@@ -398,15 +1237,18 @@ if mcp is not None:
         Returns:
             JSON confirmation with session/message/tool counts.
         """
-        data = _cache.get_data(days=days, force_refresh=True)
-        return json.dumps({
-            "status": "refreshed",
-            "sessions": data.total_sessions,
-            "messages": data.total_messages,
-            "tool_calls": data.total_tool_calls,
-            "window_start": data.window_start.isoformat(),
-            "window_end": data.window_end.isoformat(),
-        }, default=str)
+        def work(cancelled: threading.Event) -> str:
+            data = _cache.get_data(days=days, force_refresh=True)
+            return json.dumps({
+                "status": "refreshed",
+                "sessions": data.total_sessions,
+                "messages": data.total_messages,
+                "tool_calls": data.total_tool_calls,
+                "window_start": data.window_start.isoformat(),
+                "window_end": data.window_end.isoformat(),
+            }, default=str)
+
+        return await _offload("refresh_data", work)
 
 
     # ===================================================================
@@ -414,45 +1256,54 @@ if mcp is not None:
     # ===================================================================
 
     @mcp.resource("metrics://catalog")
+    @_stats.instrument
     def metrics_catalog() -> str:
         """Complete catalog of all 612 metric definitions."""
-        catalog = [_definition_summary(d) for d in sorted(METRIC_DEFINITIONS.values(), key=lambda x: x.id)]
-        return json.dumps(catalog)
+        return _catalog_json()
 
 
     @mcp.resource("metrics://categories")
+    @_stats.instrument
     def metrics_categories() -> str:
         """All 55 categories with ID ranges, counts, and themes."""
-        categories = []
-        for cat_id in DerivedMetricsEngine.CATEGORY_ORDER:
-            defs = get_metrics_by_category(cat_id)
-            if not defs:
-                continue
-            ids = sorted(d.id for d in defs)
-            categories.append({
-                "category": cat_id,
-                "theme": CATEGORY_THEMES.get(cat_id, ""),
-                "count": len(defs),
-                "id_range": f"{ids[0]}-{ids[-1]}" if ids else "",
-            })
-        return json.dumps(categories)
+        return _categories_json()
 
 
     @mcp.resource("metrics://status")
+    @_stats.instrument
     def metrics_status() -> str:
-        """Current cache status: loaded, last refresh, data window."""
+        """Current cache status: loaded, last refresh, refresh state, data window."""
+        age = _cache.snapshot_age
+        duration = _cache.last_refresh_duration
+        data = _cache.data
         return json.dumps({
             "loaded": _cache.is_loaded,
             "last_refresh": _cache.last_refresh_iso,
+            "refreshing": _cache.is_refreshing,
+            "warming_up": _cache.is_warming_up,
+            "snapshot_age_seconds": round(age, 1) if age is not None else None,
+            "last_refresh_duration_ms": round(duration * 1000) if duration is not None else None,
+            "last_refresh_error": _cache._last_refresh_error,
             "cached_days": _cache.cached_days,
-            "sessions": _cache._data.total_sessions if _cache._data else None,
-            "messages": _cache._data.total_messages if _cache._data else None,
-            "tool_calls": _cache._data.total_tool_calls if _cache._data else None,
-            "window_start": _cache._data.window_start.isoformat() if _cache._data else None,
-            "window_end": _cache._data.window_end.isoformat() if _cache._data else None,
+            "cached_windows": _cache.cached_windows,
+            "change_detection": (
+                _cache.change_detector.mode if _cache.change_detector else None
+            ),
+            "sessions": data.total_sessions if data else None,
+            "messages": data.total_messages if data else None,
+            "tool_calls": data.total_tool_calls if data else None,
+            "window_start": data.window_start.isoformat() if data else None,
+            "window_end": data.window_end.isoformat() if data else None,
         })
 
 
+    @mcp.resource("metrics://server-stats")
+    @_stats.instrument
+    def server_stats() -> str:
+        """Per-handler call counts, errors and latency histograms by phase."""
+        return json.dumps(_stats.to_dict())
+
+
 # ===================================================================
 # Entry point
 # ===================================================================
@@ -466,7 +1317,12 @@ def main():
             file=sys.stderr,
         )
         sys.exit(1)
-    mcp.run()
+    # Load the last session's snapshot while the client is still connecting
+    threading.Thread(target=_cache.preload, name="metrics-cache-preload", daemon=True).start()
+    try:
+        mcp.run()
+    finally:
+        _cache.persist()
 
 
 if __name__ == "__main__":
@@ -8,7 +8,6 @@ from .definitions import (
     get_metric,
     get_metrics_by_category,
 )
-from .engine import DerivedMetricsEngine
 
 __all__ = [
     "MetricType",
@@ -19,3 +18,13 @@ __all__ = [
     "get_metrics_by_category",
     "DerivedMetricsEngine",
 ]
+
+
+def __getattr__(name):
+    # The engine pulls in extraction and every calculator module; import it
+    # only when used, so listing definitions stays cheap
+    if name == "DerivedMetricsEngine":
+        from .engine import DerivedMetricsEngine
+
+        return DerivedMetricsEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,19 +8,13 @@ from .base import (
     register_metric,
     get_metric,
     get_metrics_by_category,
+    load_definitions,
+    required_fields,
 )
 
-# Import category modules to register their metrics
-from . import category_a
-from . import category_b
-from . import category_c
-from . import category_d
-from . import category_e
-from . import category_f
-from . import category_g
-from . import category_h
-from . import category_i
-from . import category_j
+# Category modules (category_a ... category_j) register their metrics when
+# first imported, which happens on the first read of METRIC_DEFINITIONS or
+# per category through get_metrics_by_category
 
 __all__ = [
     "MetricType",
@@ -30,4 +24,6 @@ __all__ = [
     "register_metric",
     "get_metric",
     "get_metrics_by_category",
+    "load_definitions",
+    "required_fields",
 ]
@@ -1,9 +1,11 @@
 """Base metric definition and value classes."""
 
+import importlib
+import threading
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 
 class MetricType(str, Enum):
@@ -34,7 +36,7 @@ class MetricDefinition:
     metric_type: MetricType
     description: str  # Human-readable description
     calculation: str  # How to calculate
-    sources: List[str]  # Required data sources
+    sources: List[str]  # Required data sources and extracted fields
     dependencies: List[str] = field(default_factory=list)  # Other metric IDs
     unit: Optional[str] = None  # e.g., "hours", "USD", "%"
     visualization: Optional[str] = None  # Recommended viz type
@@ -75,8 +77,94 @@ class MetricValue:
         return result
 
 
+# Categories, each defined in its own category_<letter> module
+CATEGORIES = "ABCDEFGHIJ"
+
+_load_lock = threading.Lock()
+_loaded_categories: Set[str] = set()
+_all_loaded = False
+
+
+def load_definitions(category: Optional[str] = None) -> None:
+    """Import the definition modules of one category, or of all of them.
+
+    Modules register their metrics when imported; each is imported once.
+
+    Args:
+        category: Category letter (e.g., "A"); None loads every category
+    """
+    global _all_loaded
+    if _all_loaded:
+        return
+    with _load_lock:
+        if _all_loaded:
+            return
+        partial = bool(_loaded_categories)
+        letters = CATEGORIES if category is None else [category.upper()]
+        for letter in letters:
+            # A whole key, not a substring of CATEGORIES such as "AB"
+            if letter in tuple(CATEGORIES) and letter not in _loaded_categories:
+                importlib.import_module(f"{__package__}.category_{letter.lower()}")
+                _loaded_categories.add(letter)
+        if category is None:
+            if partial:
+                # Restore the A..J order an eager import would have given
+                rank = {letter: i for i, letter in enumerate(CATEGORIES)}
+                entries = sorted(
+                    dict.items(METRIC_DEFINITIONS),
+                    key=lambda item: rank.get(item[1].category, len(rank)),
+                )
+                dict.clear(METRIC_DEFINITIONS)
+                dict.update(METRIC_DEFINITIONS, entries)
+            _all_loaded = True
+
+
+class _DefinitionRegistry(dict):
+    """Metric ID -> definition; reading it first loads every category."""
+
+    def _load(self) -> None:
+        if not _all_loaded:
+            load_definitions()
+
+    def __getitem__(self, key):
+        self._load()
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        self._load()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self._load()
+        return super().__len__()
+
+    def get(self, key, default=None):
+        self._load()
+        return super().get(key, default)
+
+    def keys(self):
+        self._load()
+        return super().keys()
+
+    def values(self):
+        self._load()
+        return super().values()
+
+    def items(self):
+        self._load()
+        return super().items()
+
+    def copy(self) -> Dict[str, "MetricDefinition"]:
+        self._load()
+        return dict(super().items())
+
+
 # Registry of all metric definitions
-METRIC_DEFINITIONS: Dict[str, MetricDefinition] = {}
+METRIC_DEFINITIONS: Dict[str, MetricDefinition] = _DefinitionRegistry()
 
 
 def register_metric(definition: MetricDefinition) -> MetricDefinition:
@@ -113,4 +201,39 @@ def get_metrics_by_category(category: str) -> List[MetricDefinition]:
     Returns:
         List of MetricDefinitions in that category
     """
-    return [d for d in METRIC_DEFINITIONS.values() if d.category == category]
+    # Only this category's module has to be imported
+    load_definitions(category)
+    with _load_lock:
+        return [d for d in dict.values(METRIC_DEFINITIONS) if d.category == category]
+
+
+def required_fields(categories: Optional[Iterable[str]] = None) -> Set[str]:
+    """Get the extracted data fields the metrics of some categories read.
+
+    Collects the ``sources`` of every metric in the categories and of the
+    metrics they depend on, for TimeFilteredExtractor(fields=...).
+
+    Args:
+        categories: Category letters (default: all)
+
+    Returns:
+        Set of field names
+    """
+    pending: List[MetricDefinition] = []
+    for category in CATEGORIES if categories is None else categories:
+        pending.extend(get_metrics_by_category(category.upper()))
+
+    fields: Set[str] = set()
+    seen: Set[str] = set()
+    while pending:
+        definition = pending.pop()
+        if definition.id in seen:
+            continue
+        seen.add(definition.id)
+        fields.update(definition.sources)
+        for dep_id in definition.dependencies:
+            # Dependencies are mostly in the same, already loaded, category
+            dependency = dict.get(METRIC_DEFINITIONS, dep_id) or get_metric(dep_id)
+            if dependency is not None:
+                pending.append(dependency)
+    return fields
@@ -26,7 +26,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Number of user messages containing question marks",
     calculation="Count of user messages containing '?'",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -37,7 +37,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.RATIO,
     description="Proportion of user messages that are questions",
     calculation="Messages with '?' / total user messages",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     dependencies=["D111"],
     visualization="gauge",
 ))
@@ -49,7 +49,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Count of imperative/directive user messages",
     calculation="Messages starting with verbs like 'do', 'make', 'create', 'fix'",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -60,7 +60,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Number of user messages containing code blocks or long text",
     calculation="Messages with triple backticks or length > 500 chars",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -71,7 +71,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Number of user messages reporting errors",
     calculation="Messages containing 'error', 'traceback', 'exception', 'failed'",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -82,7 +82,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Count of messages indicating user frustration",
     calculation="Messages with 'wrong', 'still not', 'doesn't work', 'not working'",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -93,7 +93,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Count of messages expressing user satisfaction",
     calculation="Messages with 'thanks', 'perfect', 'great', 'awesome', 'works'",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -118,7 +118,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to bug fixing",
     calculation="Messages with bug/error/fix/debug keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -129,7 +129,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to feature development",
     calculation="Messages with add/create/implement/build keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -140,7 +140,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to code refactoring",
     calculation="Messages with refactor/clean/improve/optimize keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -151,7 +151,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to testing",
     calculation="Messages with test/pytest/unittest/coverage keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -162,7 +162,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to documentation",
     calculation="Messages with document/readme/comment/docstring keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -173,7 +173,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to debugging and investigation",
     calculation="Messages with debug/why/trace/investigate keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -184,7 +184,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Messages related to code review",
     calculation="Messages with review/check/examine/look at keywords",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -207,7 +207,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.TREND,
     description="How topic focus changes over the time window",
     calculation="Slope of dominant topic frequency over sessions",
-    sources=["messages", "sessions"],
+    sources=["messages", "sessions", "message_content"],
     visualization="line_chart",
 ))
 
@@ -289,7 +289,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.INT,
     description="Number of times ULTRATHINK mode was triggered",
     calculation="Count of messages with ULTRATHINK in thinking metadata",
-    sources=["messages"],
+    sources=["messages", "message_content"],
     visualization="counter",
 ))
 
@@ -152,7 +152,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.FLOAT,
     description="Average number of technologies referenced per plan",
     calculation="Mean count of unique tech keywords per plan",
-    sources=["plans"],
+    sources=["plans", "message_content"],
     visualization="bar_chart",
 ))
 
@@ -163,7 +163,7 @@ register_metric(MetricDefinition(
     metric_type=MetricType.FLOAT,
     description="Average implementation verbs per plan",
     calculation="Mean count of action verbs per plan",
-    sources=["plans"],
+    sources=["plans", "message_content"],
     visualization="bar_chart",
 ))
 
@@ -1,9 +1,10 @@
 """Derived metrics calculation engine."""
 
 import json
+from dataclasses import fields
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Type
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Set, Type
 
 from extraction.data_classes import ExtractedData30Day
 from .definitions.base import (
@@ -24,6 +25,40 @@ from .calculators.category_h import CategoryHCalculator
 from .calculators.category_i import CategoryICalculator
 from .calculators.category_j import CategoryJCalculator
 
+_DATA_FIELDS = frozenset(f.name for f in fields(ExtractedData30Day))
+
+
+class _RecordedData:
+    """Extracted data as seen by one calculation, recording the fields read."""
+
+    def __init__(self, data: ExtractedData30Day, reads: Set[str]):
+        self._data = data
+        self._reads = reads
+
+    def __getattr__(self, name: str) -> Any:
+        self._reads.add(name)
+        return getattr(self._data, name)
+
+
+class _RecordedCache:
+    """Metric cache as seen by one calculation, recording the metrics read."""
+
+    def __init__(self, cache: Mapping[str, MetricValue], reads: Set[str]):
+        self._cache = cache
+        self._reads = reads
+
+    def __contains__(self, metric_id: str) -> bool:
+        self._reads.add(metric_id)
+        return metric_id in self._cache
+
+    def __getitem__(self, metric_id: str) -> MetricValue:
+        self._reads.add(metric_id)
+        return self._cache[metric_id]
+
+    def get(self, metric_id: str, default: Any = None) -> Any:
+        self._reads.add(metric_id)
+        return self._cache.get(metric_id, default)
+
 
 class DerivedMetricsEngine:
     """Engine for calculating all derived metrics.
@@ -57,8 +92,63 @@ class DerivedMetricsEngine:
         """
         self.data = data
         self.cache: Dict[str, MetricValue] = {}
+        # metric ID -> data fields and metric IDs its calculation read
+        self.reads: Dict[str, FrozenSet[str]] = {}
         self._errors: List[Dict[str, Any]] = []
 
+    def _run(self, calculator: BaseCalculator, definition: MetricDefinition) -> MetricValue:
+        """Calculate one metric, recording what it reads."""
+        reads: Set[str] = set()
+        calculator.data = _RecordedData(self.data, reads)
+        calculator.cache = _RecordedCache(self.cache, reads)
+        value = calculator.calculate(definition)
+        self.reads[definition.id] = frozenset(reads)
+        return value
+
+    def reuse(self, previous: "DerivedMetricsEngine") -> int:
+        """Take over results of ``previous`` whose inputs this data left unchanged.
+
+        A result is kept when every data field its calculation read is equal
+        in both data sets and every metric it read is kept too.
+
+        Args:
+            previous: Engine over an earlier version of this window's data
+
+        Returns:
+            Number of results taken over
+        """
+        cache = dict(previous.cache)
+        reads = dict(previous.reads)
+        changed: Dict[str, bool] = {}
+        kept: Dict[str, bool] = {}
+
+        def keep(metric_id: str) -> bool:
+            if metric_id not in kept:
+                kept[metric_id] = False  # guards against cycles
+                names = reads.get(metric_id)
+                kept[metric_id] = (
+                    names is not None
+                    and metric_id in cache
+                    and all(
+                        unchanged(name) if name in _DATA_FIELDS else keep(name)
+                        for name in names
+                    )
+                )
+            return kept[metric_id]
+
+        def unchanged(name: str) -> bool:
+            if name not in changed:
+                changed[name] = getattr(previous.data, name) != getattr(self.data, name)
+            return not changed[name]
+
+        taken = 0
+        for metric_id in cache:
+            if metric_id not in self.cache and keep(metric_id):
+                self.cache[metric_id] = cache[metric_id]
+                self.reads[metric_id] = reads[metric_id]
+                taken += 1
+        return taken
+
     def calculate_all(
         self,
         categories: Optional[List[str]] = None,
@@ -114,7 +204,7 @@ class DerivedMetricsEngine:
 
         calculator = calculator_class(self.data, self.cache)
         try:
-            value = calculator.calculate(definition)
+            value = self._run(calculator, definition)
             self.cache[metric_id] = value
             return value
         except Exception as e:
@@ -152,10 +242,7 @@ class DerivedMetricsEngine:
                 progress_callback(definition.id, "calculating")
 
             try:
-                value = calculator.calculate(definition)
-                self.cache[definition.id] = value
-                if progress_callback:
-                    progress_callback(definition.id, "done")
+                value = self._run(calculator, definition)
             except Exception as e:
                 self._errors.append({
                     "metric_id": definition.id,
@@ -163,6 +250,11 @@ class DerivedMetricsEngine:
                 })
                 if progress_callback:
                     progress_callback(definition.id, "error")
+                continue
+            self.cache[definition.id] = value
+            # Outside the try: an exception from the callback is not the metric's
+            if progress_callback:
+                progress_callback(definition.id, "done")
 
     def _topological_sort(
         self, definitions: List[MetricDefinition]
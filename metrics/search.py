@@ -0,0 +1,129 @@
+"""Keyword search over metric definitions.
+
+An inverted index maps each token of a metric's id, name, description,
+unit and category theme to the metrics containing it. Query terms match
+tokens exactly, by prefix or (for longer terms) by close spelling, and
+results are ranked by where and how well each term matched.
+"""
+
+import bisect
+import difflib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .definitions.base import MetricDefinition
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Weight of a token by the field it came from
+FIELD_WEIGHTS: Dict[str, float] = {
+    "id": 8.0,
+    "name": 3.0,
+    "theme": 2.0,
+    "unit": 1.0,
+    "description": 1.0,
+}
+
+# Weight of a query term by how it matched a token
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.3
+MIN_FUZZY_LENGTH = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a string."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class MetricSearchIndex:
+    """Inverted index over metric definitions."""
+
+    def __init__(
+        self,
+        definitions: Iterable[MetricDefinition],
+        themes: Optional[Mapping[str, str]] = None,
+    ):
+        """Build the index.
+
+        Args:
+            definitions: Metric definitions to index
+            themes: Optional category -> theme names, indexed with each
+                metric of the category
+        """
+        themes = themes or {}
+        self._definitions: Dict[str, MetricDefinition] = {}
+        # token -> metric id -> best field weight of the token in that metric
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+        for d in definitions:
+            self._definitions[d.id] = d
+            fields = {
+                "id": d.id,
+                "name": d.name,
+                "theme": themes.get(d.category, ""),
+                "unit": d.unit or "",
+                "description": d.description,
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    postings = self._postings[token]
+                    if weight > postings.get(d.id, 0.0):
+                        postings[d.id] = weight
+
+        self._vocabulary = sorted(self._postings)
+        self._ordered_ids = sorted(self._definitions)
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Index tokens a query term matches, with the match quality."""
+        matches: Dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = EXACT
+
+        start = bisect.bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            matches.setdefault(token, PREFIX)
+
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for token in difflib.get_close_matches(term, self._vocabulary, n=5, cutoff=0.8):
+                matches.setdefault(token, FUZZY)
+        return list(matches.items())
+
+    def search(self, query: str, limit: int = 20) -> List[MetricDefinition]:
+        """Find metrics matching every term of a query, best first.
+
+        Args:
+            query: Free text; an empty query lists metrics by id
+            limit: Maximum number of results
+
+        Returns:
+            Matching definitions ordered by relevance, then id
+        """
+        terms = tokenize(query)
+        if not terms:
+            return [self._definitions[i] for i in self._ordered_ids[:limit]]
+
+        scores: Optional[Dict[str, float]] = None
+        for term in dict.fromkeys(terms):
+            term_scores: Dict[str, float] = {}
+            for token, quality in self._expand(term):
+                for metric_id, weight in self._postings[token].items():
+                    score = weight * quality
+                    if score > term_scores.get(metric_id, 0.0):
+                        term_scores[metric_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                # Every term has to match somewhere
+                scores = {
+                    metric_id: score + term_scores[metric_id]
+                    for metric_id, score in scores.items()
+                    if metric_id in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self._definitions[metric_id] for metric_id, _ in ranked[:limit]]
@@ -1,25 +1,32 @@
 """Main metrics extractor orchestrator."""
 
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 
 __version__ = "0.1.0"
-from database import MetricsDatabase
-from sources import (
-    ALL_SOURCES,
-    BaseSource,
-    StatsCacheSource,
-    SettingsSource,
-    GlobalStateSource,
-    CredentialsSource,
-    HistorySource,
-    SessionsSource,
-    TodosSource,
-    PlansSource,
-    ExtensionsSource,
-)
+from sources import ALL_SOURCES
+from sources.base import BaseSource
+
+# CPU-bound sources, parsed in a worker process when process_pool is set
+PROCESS_SOURCES = frozenset({"sessions"})
+
+# SQLite output file, in the output directory
+DATABASE_NAME = "claude_metrics.db"
+
+
+def _run_extractor(extractor: BaseSource) -> Tuple[BaseSource, float]:
+    """Load an extractor's data (in a worker thread or process).
+
+    Returns:
+        The extractor with its data loaded, and the seconds it took
+    """
+    started = time.perf_counter()
+    extractor.get_data()
+    return extractor, time.perf_counter() - started
 
 
 class MetricsExtractor:
@@ -34,6 +41,14 @@ class MetricsExtractor:
         output_dir: Optional[Path] = None,
         include_sensitive: bool = False,
         sources: Optional[List[str]] = None,
+        stream: bool = False,
+        full_text: bool = False,
+        shard_by: Optional[str] = None,
+        jobs: int = 1,
+        process_pool: bool = False,
+        raw_global_state: bool = True,
+        history_days: Optional[int] = None,
+        detail: bool = False,
     ):
         """Initialize the extractor.
 
@@ -41,12 +56,38 @@ class MetricsExtractor:
             output_dir: Directory for output files (default: ./claude_metrics_output)
             include_sensitive: If True, include sensitive data
             sources: List of source names to extract (default: all)
+            stream: If True, defer parsing of streaming-capable sources
+                (sessions) until output is written, keeping memory flat
+            full_text: If True, build the transcript full-text index
+                (SQLite FTS5) when writing the database
+            shard_by: Session JSON layout: None (one file per session),
+                "project" or "date" (sharded JSON lines with offset index)
+            jobs: Number of sources extracted at once on a thread pool
+            process_pool: If True (and jobs > 1), parse sessions in a worker
+                process. Off by default: sending the parsed sessions back
+                costs more time and memory than the parse saves
+            raw_global_state: If False, decode only the sections of
+                ~/.claude.json that are used and leave out its raw copy
+            history_days: Only extract history entries from the last N days
+                (default: all)
+            detail: If True, list every backed-up version in file history
+                instead of per-file totals only
         """
         self.output_dir = output_dir or Path("./claude_metrics_output")
         self.include_sensitive = include_sensitive
         self.sources_to_extract = sources or list(ALL_SOURCES.keys())
+        self.stream = stream
+        self.full_text = full_text
+        self.full_text_indexed = False
+        self.shard_by = shard_by
+        self.jobs = max(1, jobs)
+        self.process_pool = process_pool
+        self.raw_global_state = raw_global_state
+        self.history_days = history_days
+        self.detail = detail
         self._extractors: Dict[str, BaseSource] = {}
         self._results: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
         self._extraction_time: Optional[str] = None
 
     def _create_extractor(self, name: str) -> Optional[BaseSource]:
@@ -61,6 +102,22 @@ class MetricsExtractor:
             return source_class(
                 include_sensitive=self.include_sensitive,
                 include_full_content=False,  # Don't include full content by default
+                shard_by=self.shard_by,
+            )
+        elif name == "global_state":
+            return source_class(
+                include_sensitive=self.include_sensitive,
+                include_raw=self.raw_global_state,
+            )
+        elif name == "history":
+            return source_class(
+                include_sensitive=self.include_sensitive,
+                days=self.history_days,
+            )
+        elif name == "file_history":
+            return source_class(
+                include_sensitive=self.include_sensitive,
+                detail=self.detail,
             )
         elif name == "plans":
             return source_class(
@@ -77,33 +134,31 @@ class MetricsExtractor:
             progress_callback: Optional callback(source_name, status) for progress
 
         Returns:
-            Dictionary with extraction results and summary
+            Dictionary with extraction results, per-source timings and summary
         """
         self._extraction_time = datetime.now().isoformat()
         self._results = {}
+        self._timings = {}
         errors = []
 
-        for i, source_name in enumerate(self.sources_to_extract):
-            if progress_callback:
-                progress_callback(source_name, "extracting")
-
-            try:
-                extractor = self._create_extractor(source_name)
-                if extractor is None:
-                    errors.append({"source": source_name, "error": "Unknown source"})
-                    continue
-
-                self._extractors[source_name] = extractor
+        if self.jobs > 1 and len(self.sources_to_extract) > 1:
+            outcomes = self._extract_concurrently(progress_callback)
+        else:
+            outcomes = self._extract_sequentially(progress_callback)
+
+        # Results keep the configured source order, whatever finished first
+        for source_name in self.sources_to_extract:
+            error = outcomes.get(source_name)
+            if error is not None:
+                errors.append({"source": source_name, "error": error})
+                continue
+            extractor = self._extractors[source_name]
+            if self.stream and extractor.supports_streaming:
+                # Parsed record by record in write_json/write_sqlite
+                self._results[source_name] = {"streamed": True}
+            else:
                 self._results[source_name] = extractor.get_data()
 
-                if progress_callback:
-                    progress_callback(source_name, "done")
-
-            except Exception as e:
-                errors.append({"source": source_name, "error": str(e)})
-                if progress_callback:
-                    progress_callback(source_name, "error")
-
         return {
             "version": __version__,
             "extracted_at": self._extraction_time,
@@ -111,9 +166,126 @@ class MetricsExtractor:
             "sources_extracted": list(self._results.keys()),
             "sources_failed": [e["source"] for e in errors],
             "errors": errors,
+            "timings": {
+                name: round(self._timings[name], 3)
+                for name in self.sources_to_extract if name in self._timings
+            },
             "data": self._results,
         }
 
+    def _prepare(self, source_name: str) -> Optional[BaseSource]:
+        """Create and register a source's extractor; None if it is streamed later."""
+        extractor = self._create_extractor(source_name)
+        self._extractors[source_name] = extractor
+        if self.stream and extractor.supports_streaming:
+            return None
+        return extractor
+
+    def _extract_sequentially(self, progress_callback) -> Dict[str, Optional[str]]:
+        """Run sources one after another; returns source -> error (or None)."""
+        outcomes: Dict[str, Optional[str]] = {}
+        for source_name in self.sources_to_extract:
+            if progress_callback:
+                progress_callback(source_name, "extracting")
+            if source_name not in ALL_SOURCES:
+                outcomes[source_name] = "Unknown source"
+                continue
+
+            started = time.perf_counter()
+            try:
+                extractor = self._prepare(source_name)
+                if extractor is not None:
+                    extractor.get_data()
+                outcomes[source_name] = None
+                if progress_callback:
+                    progress_callback(source_name, "done")
+            except Exception as e:
+                outcomes[source_name] = str(e)
+                if progress_callback:
+                    progress_callback(source_name, "error")
+            self._timings[source_name] = time.perf_counter() - started
+        return outcomes
+
+    def _extract_concurrently(self, progress_callback) -> Dict[str, Optional[str]]:
+        """Run sources on worker pools; returns source -> error (or None).
+
+        Progress callbacks are made from the calling thread only. Worker
+        processes are spawned, not forked: callers such as the CLI already
+        run threads (the progress display) when this is called.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+        from concurrent.futures.process import BrokenProcessPool
+
+        outcomes: Dict[str, Optional[str]] = {}
+        pending: List[Tuple[str, BaseSource]] = []
+        for source_name in self.sources_to_extract:
+            if progress_callback:
+                progress_callback(source_name, "extracting")
+            if source_name not in ALL_SOURCES:
+                outcomes[source_name] = "Unknown source"
+                continue
+
+            try:
+                extractor = self._prepare(source_name)
+            except Exception as e:
+                outcomes[source_name] = str(e)
+                if progress_callback:
+                    progress_callback(source_name, "error")
+                continue
+            outcomes[source_name] = None
+            if extractor is not None:
+                pending.append((source_name, extractor))
+            elif progress_callback:
+                progress_callback(source_name, "done")
+
+        process_pool = None
+        process_count = 0
+        if self.process_pool:
+            process_count = sum(1 for name, _ in pending if name in PROCESS_SOURCES)
+        if process_count:
+            try:
+                process_pool = ProcessPoolExecutor(
+                    max_workers=process_count,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError, ValueError):
+                # No multiprocessing support here: threads only
+                process_pool = None
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as thread_pool:
+                futures = {}
+                # Submit process work first: spawned workers are slow to start
+                ordered = sorted(pending, key=lambda item: item[0] not in PROCESS_SOURCES)
+                for source_name, extractor in ordered:
+                    use_process = process_pool is not None and source_name in PROCESS_SOURCES
+                    pool = process_pool if use_process else thread_pool
+                    futures[pool.submit(_run_extractor, extractor)] = source_name
+
+                for future in as_completed(futures):
+                    source_name = futures[future]
+                    try:
+                        try:
+                            extractor, seconds = future.result()
+                        except BrokenProcessPool:
+                            # The worker process could not run it: do it here
+                            extractor, seconds = _run_extractor(self._extractors[source_name])
+                    except Exception as e:
+                        outcomes[source_name] = str(e)
+                        if progress_callback:
+                            progress_callback(source_name, "error")
+                        continue
+                    # A worker process returns a copy holding the data
+                    self._extractors[source_name] = extractor
+                    self._timings[source_name] = seconds
+                    if progress_callback:
+                        progress_callback(source_name, "done")
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown()
+        return outcomes
+
     def extract_source(self, source_name: str) -> Dict[str, Any]:
         """Extract data from a single source.
 
@@ -130,26 +302,64 @@ class MetricsExtractor:
         self._extractors[source_name] = extractor
         return extractor.get_data()
 
-    def write_json(self, output_dir: Optional[Path] = None) -> List[Path]:
+    def write_json(
+        self,
+        output_dir: Optional[Path] = None,
+        compact: bool = False,
+        compress: bool = False,
+        compression: str = "gzip",
+    ) -> List[Path]:
         """Write extracted data to JSON files.
 
         Args:
             output_dir: Override output directory
+            compact: If True, write JSON without indentation or spaces
+            compress: If True, compress each source file
+            compression: Compression format ("gzip" or "xz")
 
         Returns:
             List of paths to written files
         """
         out_dir = output_dir or self.output_dir
+        written_files, _ = self._write_json(out_dir, compact, compress, compression)
+        return written_files
+
+    def _write_json(
+        self,
+        out_dir: Path,
+        compact: bool,
+        compress: bool,
+        compression: str,
+        db=None,
+    ) -> Tuple[List[Path], Set[str]]:
+        """Write the JSON files, loading streamed sources into ``db`` on the way.
+
+        Returns:
+            (paths to written files, names of the sources loaded into db)
+        """
         json_dir = out_dir / "json"
         json_dir.mkdir(parents=True, exist_ok=True)
 
         written_files = []
+        loaded = set()
 
         for source_name, extractor in self._extractors.items():
+            # Streamed sources are parsed while writing; feed the database
+            # from the same pass rather than parsing again in to_sqlite
+            share_pass = db is not None and self.stream and extractor.supports_streaming
             try:
                 output_path = json_dir / f"{source_name}.json"
-                extractor.to_json(output_path)
-                written_files.append(output_path)
+                written_files.append(
+                    extractor.to_json(
+                        output_path,
+                        compact=compact,
+                        compress=compress,
+                        compression=compression,
+                        **({"db": db} if share_pass else {}),
+                    )
+                )
+                if share_pass:
+                    loaded.add(source_name)
             except Exception as e:
                 # Log error but continue
                 pass
@@ -161,7 +371,7 @@ class MetricsExtractor:
             json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
         written_files.append(summary_path)
 
-        return written_files
+        return written_files, loaded
 
     def write_sqlite(self, output_dir: Optional[Path] = None) -> Path:
         """Write extracted data to SQLite database.
@@ -173,11 +383,18 @@ class MetricsExtractor:
             Path to the database file
         """
         out_dir = output_dir or self.output_dir
+        with self._open_database(out_dir) as db:
+            self._load_sqlite(db)
+        return out_dir / DATABASE_NAME
+
+    @contextmanager
+    def _open_database(self, out_dir: Path) -> Iterator[Any]:
+        """Open the output database with the extraction metadata recorded."""
         out_dir.mkdir(parents=True, exist_ok=True)
 
-        db_path = out_dir / "claude_metrics.db"
+        from database import MetricsDatabase
 
-        with MetricsDatabase(db_path) as db:
+        with MetricsDatabase(out_dir / DATABASE_NAME) as db:
             # Record extraction metadata
             db.record_extraction(
                 version=__version__,
@@ -185,29 +402,53 @@ class MetricsExtractor:
                 sources=list(self._extractors.keys()),
             )
 
-            # Write each source
-            for source_name, extractor in self._extractors.items():
-                try:
-                    extractor.to_sqlite(db)
-                except Exception as e:
-                    # Log error but continue
-                    pass
+            # Full-text index is rebuilt from scratch on every load
+            if self.full_text and db.enable_fts():
+                db.clear_search_documents()
+                self.full_text_indexed = True
+
+            yield db
 
-        return db_path
+    def _load_sqlite(self, db, skip: Set[str] = frozenset()) -> None:
+        """Write each source not in ``skip`` to the database."""
+        for source_name, extractor in self._extractors.items():
+            if source_name in skip:
+                continue
+            try:
+                extractor.to_sqlite(db)
+            except Exception as e:
+                # Log error but continue
+                pass
 
-    def write_all(self, output_dir: Optional[Path] = None) -> Dict[str, Any]:
+    def write_all(
+        self,
+        output_dir: Optional[Path] = None,
+        compact: bool = False,
+        compress: bool = False,
+        compression: str = "gzip",
+    ) -> Dict[str, Any]:
         """Write extracted data to both JSON and SQLite.
 
         Args:
             output_dir: Override output directory
+            compact: If True, write JSON without indentation or spaces
+            compress: If True, compress each JSON source file
+            compression: Compression format ("gzip" or "xz")
+
+        Streamed sources are parsed once, feeding the JSON files, the
+        database tables and the full-text index from the same pass.
 
         Returns:
             Dictionary with paths to written files
         """
         out_dir = output_dir or self.output_dir
 
-        json_files = self.write_json(out_dir)
-        db_path = self.write_sqlite(out_dir)
+        with self._open_database(out_dir) as db:
+            json_files, loaded = self._write_json(
+                out_dir, compact, compress, compression, db=db
+            )
+            self._load_sqlite(db, skip=loaded)
+        db_path = out_dir / DATABASE_NAME
 
         return {
             "output_dir": str(out_dir),
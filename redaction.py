@@ -2,7 +2,7 @@
 
 import hashlib
 import re
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
 
 
 # Fields that should be completely redacted
@@ -45,11 +45,172 @@ REDACT_PATTERNS: List[tuple] = [
 ]
 
 
+# Literal every match of the pattern at the same index of REDACT_PATTERNS
+# contains (compared case-insensitively); strings without it skip the pattern
+REDACT_PATTERN_LITERALS: List[str] = ["bearer", "sk-", "api"]
+
+# Shortest string any of REDACT_PATTERNS can match ("Bearer x" plus one)
+MIN_PATTERN_LENGTH = 8
+
+_KEEP, _REDACT, _HASH = 0, 1, 2
+_KEY_CACHE_SIZE = 4096
+
+
 def hash_value(value: str) -> str:
     """Hash a value for privacy while preserving uniqueness."""
     return hashlib.sha256(value.encode()).hexdigest()[:16]
 
 
+class Redactor:
+    """Field and pattern redaction compiled once.
+
+    Field names are matched against precomputed lowercase sets (with a
+    cache of decisions per key), and a string only goes through the
+    pattern substitutions whose literal it contains. Literals are found
+    with substring checks on ASCII text and with one combined regex
+    otherwise. Payloads are walked iteratively, and containers
+    with nothing to redact are returned as is rather than copied.
+
+    Output is identical to applying the field rules and then each of
+    REDACT_PATTERNS in order.
+    """
+
+    def __init__(
+        self,
+        redact_fields: Iterable[str] = REDACT_FIELDS,
+        hash_fields: Iterable[str] = HASH_FIELDS,
+        patterns: Sequence[Tuple["re.Pattern[str]", str]] = REDACT_PATTERNS,
+        literals: Sequence[str] = REDACT_PATTERN_LITERALS,
+        min_length: int = MIN_PATTERN_LENGTH,
+    ):
+        """Compile the rules.
+
+        Args:
+            redact_fields: Field names whose values are replaced
+            hash_fields: Field names whose values are hashed
+            patterns: (pattern, replacement) pairs applied in order to strings
+            literals: Literal contained in every match of each pattern
+            min_length: Shortest string any pattern can match
+        """
+        self.redact_fields = frozenset(f.lower() for f in redact_fields)
+        self.hash_fields = frozenset(f.lower() for f in hash_fields)
+        self.patterns = list(patterns)
+        self.literals = [literal.lower() for literal in literals]
+        self.min_length = min_length
+        self._prefilter = re.compile(
+            "|".join(f"(?P<p{i}>{re.escape(literal)})" for i, literal in enumerate(literals)),
+            re.IGNORECASE,
+        )
+        self._key_actions: Dict[Any, int] = {}
+
+    def _action(self, key: Any) -> int:
+        action = self._key_actions.get(key)
+        if action is None:
+            key_lower = key.lower()
+            if key_lower in self.redact_fields:
+                action = _REDACT
+            elif key_lower in self.hash_fields:
+                action = _HASH
+            else:
+                action = _KEEP
+            if len(self._key_actions) < _KEY_CACHE_SIZE:
+                self._key_actions[key] = action
+        return action
+
+    def redact_value(self, key: str, value: Any) -> Any:
+        """Replace or hash a value if its field name calls for it."""
+        action = self._action(key)
+        if action == _REDACT:
+            return "[REDACTED]"
+        if action == _HASH:
+            if isinstance(value, str):
+                return f"[HASHED:{hash_value(value)}]"
+            return "[HASHED]"
+        return value
+
+    def redact_string(self, value: str) -> str:
+        """Redact sensitive patterns in a string (the same object if none)."""
+        if len(value) < self.min_length:
+            return value
+        if value.isascii():
+            # ASCII text only case-folds to ASCII, so lower() finds the same
+            # literals as the case-insensitive patterns do
+            lowered = value.lower()
+            found = [literal in lowered for literal in self.literals]
+        else:
+            groups = {match.lastgroup for match in self._prefilter.finditer(value)}
+            found = [f"p{i}" in groups for i in range(len(self.literals))]
+        for (pattern, replacement), present in zip(self.patterns, found):
+            if present:
+                value = pattern.sub(replacement, value)
+        return value
+
+    def redact(self, value: Any) -> Any:
+        """Redact a value of any JSON type.
+
+        Returns:
+            The redacted value; unchanged dicts and lists (at any depth)
+            are the original objects
+        """
+        if isinstance(value, str):
+            return self.redact_string(value)
+        if not isinstance(value, (dict, list)):
+            return value
+
+        # Frame: [source, items iterator, copy (made on first change), key of
+        # the child being walked]
+        stack = [[value, self._items(value), None, None]]
+        while True:
+            frame = stack[-1]
+            source, items = frame[0], frame[1]
+            is_dict = isinstance(source, dict)
+            descended = False
+            for key, item in items:
+                if is_dict:
+                    action = self._action(key)
+                    if action != _KEEP:
+                        self._set(frame, key, self.redact_value(key, item))
+                        continue
+                if isinstance(item, str):
+                    new = self.redact_string(item)
+                    if new is not item:
+                        self._set(frame, key, new)
+                elif isinstance(item, (dict, list)):
+                    frame[3] = key
+                    stack.append([item, self._items(item), None, None])
+                    descended = True
+                    break
+            if descended:
+                continue
+
+            stack.pop()
+            done = frame[2] if frame[2] is not None else source
+            if not stack:
+                return done
+            if done is not source:
+                parent = stack[-1]
+                self._set(parent, parent[3], done)
+
+    @staticmethod
+    def _items(container: Any) -> Iterator[Tuple[Any, Any]]:
+        return iter(container.items()) if isinstance(container, dict) else enumerate(container)
+
+    @staticmethod
+    def _set(frame: list, key: Any, value: Any) -> None:
+        if frame[2] is None:
+            source = frame[0]
+            frame[2] = dict(source) if isinstance(source, dict) else list(source)
+        frame[2][key] = value
+
+    def stream(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Redact records one at a time as they are consumed."""
+        for record in records:
+            yield self.redact(record)
+
+
+_redactor = Redactor()
+
+
 def redact_value(key: str, value: Any, include_sensitive: bool = False) -> Any:
     """Redact a single value based on its key.
 
@@ -63,20 +224,7 @@ def redact_value(key: str, value: Any, include_sensitive: bool = False) -> Any:
     """
     if include_sensitive:
         return value
-
-    key_lower = key.lower()
-
-    # Check if this field should be completely redacted
-    if key in REDACT_FIELDS or key_lower in {f.lower() for f in REDACT_FIELDS}:
-        return "[REDACTED]"
-
-    # Check if this field should be hashed
-    if key in HASH_FIELDS or key_lower in {f.lower() for f in HASH_FIELDS}:
-        if isinstance(value, str):
-            return f"[HASHED:{hash_value(value)}]"
-        return "[HASHED]"
-
-    return value
+    return _redactor.redact_value(key, value)
 
 
 def redact_string(value: str, include_sensitive: bool = False) -> str:
@@ -91,12 +239,7 @@ def redact_string(value: str, include_sensitive: bool = False) -> str:
     """
     if include_sensitive or not isinstance(value, str):
         return value
-
-    result = value
-    for pattern, replacement in REDACT_PATTERNS:
-        result = pattern.sub(replacement, result)
-
-    return result
+    return _redactor.redact_string(value)
 
 
 def redact_dict(data: Dict[str, Any], include_sensitive: bool = False) -> Dict[str, Any]:
@@ -107,35 +250,30 @@ def redact_dict(data: Dict[str, Any], include_sensitive: bool = False) -> Dict[s
         include_sensitive: If True, return data unchanged
 
     Returns:
-        A new dictionary with sensitive fields redacted
+        The dictionary with sensitive fields redacted; parts with nothing
+        to redact are shared with ``data``, not copied
     """
-    if include_sensitive:
+    if include_sensitive or not isinstance(data, dict):
         return data
+    return _redactor.redact(data)
 
-    if not isinstance(data, dict):
-        return data
 
-    result = {}
-    for key, value in data.items():
-        # First check if this key should be redacted
-        redacted_value = redact_value(key, value, include_sensitive)
-
-        if redacted_value != value:
-            # Value was redacted
-            result[key] = redacted_value
-        elif isinstance(value, dict):
-            # Recurse into nested dicts
-            result[key] = redact_dict(value, include_sensitive)
-        elif isinstance(value, list):
-            # Handle lists
-            result[key] = redact_list(value, include_sensitive)
-        elif isinstance(value, str):
-            # Check for patterns in string values
-            result[key] = redact_string(value, include_sensitive)
-        else:
-            result[key] = value
+def redact_record(value: Any, include_sensitive: bool = False) -> Any:
+    """Redact a single value of any JSON type.
+
+    Used by streaming writers, which redact one record at a time
+    instead of copying the whole payload up front.
+
+    Args:
+        value: A dict, list, string or scalar value
+        include_sensitive: If True, return value unchanged
 
-    return result
+    Returns:
+        The value with sensitive fields and patterns redacted
+    """
+    if include_sensitive:
+        return value
+    return _redactor.redact(value)
 
 
 def redact_list(data: List[Any], include_sensitive: bool = False) -> List[Any]:
@@ -146,20 +284,25 @@ def redact_list(data: List[Any], include_sensitive: bool = False) -> List[Any]:
         include_sensitive: If True, return data unchanged
 
     Returns:
-        A new list with sensitive fields redacted
+        The list with sensitive fields redacted; parts with nothing to
+        redact are shared with ``data``, not copied
     """
     if include_sensitive:
         return data
+    return _redactor.redact(data)
 
-    result = []
-    for item in data:
-        if isinstance(item, dict):
-            result.append(redact_dict(item, include_sensitive))
-        elif isinstance(item, list):
-            result.append(redact_list(item, include_sensitive))
-        elif isinstance(item, str):
-            result.append(redact_string(item, include_sensitive))
-        else:
-            result.append(item)
 
-    return result
+def redact_stream(records: Iterable[Any], include_sensitive: bool = False) -> Iterator[Any]:
+    """Redact records lazily, e.g. while they are being serialized.
+
+    Args:
+        records: Any iterable of JSON values
+        include_sensitive: If True, yield records unchanged
+
+    Yields:
+        Each record, redacted
+    """
+    if include_sensitive:
+        yield from records
+        return
+    yield from _redactor.stream(records)
@@ -0,0 +1,255 @@
+"""Self-instrumentation for the Claude Metrics MCP server.
+
+Every tool and resource handler is timed. Per handler, the server keeps a
+call count, an error count and latency histograms, both for the whole call
+and for each phase of it (lock waits, extraction, calculation,
+serialization, ...). Code marks phases with ``phase("name")``; the current
+call is tracked with a context variable, so phases timed in executor
+threads are attributed to the call that offloaded them. Requests per
+metric are counted too, so the most requested metrics can be precomputed.
+
+Each finished call can also be appended as one JSON line to a rotating
+log file for offline analysis.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+
+# Histogram bucket upper bounds in milliseconds; slower calls go to overflow
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_current_phases: "contextvars.ContextVar[Optional[Dict[str, float]]]" = (
+    contextvars.ContextVar("claude_metrics_phases", default=None)
+)
+
+
+def add_phase(name: str, ms: float) -> None:
+    """Add time to a phase of the current handler call (no-op outside a call)."""
+    phases = _current_phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + ms
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current handler call (no-op outside a call)."""
+    if _current_phases.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, (time.perf_counter() - started) * 1000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        index = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (0 < q <= 1)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"<={bound}": n for bound, n in zip(BUCKETS_MS, self.counts) if n}
+        if self.counts[-1]:
+            buckets[f">{BUCKETS_MS[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _HandlerStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.phases: Dict[str, LatencyHistogram] = {}
+
+
+class ServerStats:
+    """Counters and latency histograms for server handlers."""
+
+    def __init__(
+        self,
+        log_path: Optional[Union[str, Path]] = None,
+        max_log_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 3,
+    ):
+        """Initialize the collector.
+
+        Args:
+            log_path: Optional JSONL file that every call is appended to
+            max_log_bytes: Size at which the log file is rotated
+            backup_count: Number of rotated log files to keep
+        """
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, _HandlerStats] = {}
+        self._metric_requests: Counter = Counter()
+        self._logger: Optional[logging.Logger] = None
+        if log_path:
+            self._logger = self._open_log(Path(log_path), max_log_bytes, backup_count)
+
+    @staticmethod
+    def _open_log(path: Path, max_bytes: int, backup_count: int) -> logging.Logger:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger = logging.getLogger(f"claude_metrics.server_stats.{path}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def record(
+        self,
+        name: str,
+        total_ms: float,
+        phases: Dict[str, float],
+        error: Optional[str] = None,
+    ) -> None:
+        """Record one finished handler call.
+
+        Args:
+            name: Handler name
+            total_ms: Wall time of the whole call
+            phases: Milliseconds spent per phase
+            error: Exception type name if the call raised
+        """
+        with self._lock:
+            stats = self._handlers.setdefault(name, _HandlerStats())
+            stats.count += 1
+            if error is not None:
+                stats.errors += 1
+            stats.latency.observe(total_ms)
+            for phase_name, ms in phases.items():
+                stats.phases.setdefault(phase_name, LatencyHistogram()).observe(ms)
+
+        if self._logger is not None:
+            self._logger.info(json.dumps({
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "handler": name,
+                "ms": round(total_ms, 3),
+                "error": error,
+                "phases": {k: round(v, 3) for k, v in phases.items()},
+            }))
+
+    def count_metric(self, metric_id: str) -> None:
+        """Count one request for a metric."""
+        with self._lock:
+            self._metric_requests[metric_id] += 1
+
+    def most_requested(self, limit: Optional[int] = None) -> List[str]:
+        """Requested metric IDs, most requested first (ties by ID)."""
+        with self._lock:
+            ranked = sorted(self._metric_requests.items(), key=lambda item: (-item[1], item[0]))
+        return [metric_id for metric_id, _ in ranked[:limit]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All counters and histograms, JSON-serializable."""
+        with self._lock:
+            top_metrics = dict(self._metric_requests.most_common(20))
+            handlers = {
+                name: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "latency": stats.latency.to_dict(),
+                    "phases": {p: h.to_dict() for p, h in sorted(stats.phases.items())},
+                }
+                for name, stats in sorted(self._handlers.items())
+            }
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "handlers": handlers,
+            "top_metrics": top_metrics,
+        }
+
+    def instrument(self, func: Callable) -> Callable:
+        """Decorator timing a sync or async handler.
+
+        The wrapper keeps the handler's name, docstring and signature, so
+        it can sit under ``@mcp.tool()`` or ``@mcp.resource()``.
+        """
+        name = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = _current_phases.set({})
+                started = time.perf_counter()
+                error = None
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException as e:
+                    error = type(e).__name__
+                    raise
+                finally:
+                    phases = _current_phases.get()
+                    _current_phases.reset(token)
+                    self.record(name, (time.perf_counter() - started) * 1000, phases, error)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_phases.set({})
+            started = time.perf_counter()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                phases = _current_phases.get()
+                _current_phases.reset(token)
+                self.record(name, (time.perf_counter() - started) * 1000, phases, error)
+
+        return wrapper
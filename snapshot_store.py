@@ -0,0 +1,235 @@
+"""Persisted extraction snapshots for Claude Metrics.
+
+The MCP server saves each extracted time window, together with the metric
+values calculated so far, to a binary file under ~/.cache/claude-metrics/.
+A freshly started server loads it and answers from it while re-extracting
+in the background, instead of making the first tool call wait for a full
+extraction.
+
+Files are pickles, written atomically and readable by the owner only.
+Loading unpickles the whole snapshot; the header alone can be read to
+check a file's age and compatibility.
+
+Several server processes can share one store: a per-window lock file makes
+one of them the writer while the others wait and load what it wrote.
+"""
+
+import mmap
+import os
+import pickle
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, get_args
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from extraction.data_classes import ExtractedData30Day
+from metrics.definitions.base import MetricValue
+
+
+# Bump when the file layout changes; data class changes are detected
+# through the field names stored in the header
+SNAPSHOT_VERSION = 1
+MAGIC = b"CMSNAP"
+
+
+def _nested_dataclasses(tp: Any) -> Iterator[type]:
+    """Data classes in a field type, e.g. MessageData in List[MessageData]."""
+    if isinstance(tp, type) and is_dataclass(tp):
+        yield tp
+    for arg in get_args(tp):
+        yield from _nested_dataclasses(arg)
+
+
+def _schema() -> tuple:
+    """Field names of every data class a snapshot holds, nested ones included."""
+    schema = []
+    pending = [ExtractedData30Day, MetricValue]
+    seen = set()
+    while pending:
+        cls = pending.pop(0)
+        if cls in seen:
+            continue
+        seen.add(cls)
+        schema.append((cls.__name__, tuple(f.name for f in fields(cls))))
+        for f in fields(cls):
+            pending.extend(_nested_dataclasses(f.type))
+    return tuple(schema)
+
+
+@dataclass
+class PersistedSnapshot:
+    """One time window as stored on disk."""
+
+    days: int
+    data: ExtractedData30Day
+    metrics: Dict[str, MetricValue] = field(default_factory=dict)
+    extracted_at: float = 0.0  # time.time() of the extraction
+    # (mtime_ns, size) of each session file the data was extracted from
+    file_states: Dict[Path, Tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def age(self) -> float:
+        """Seconds since the data was extracted."""
+        return max(0.0, time.time() - self.extracted_at)
+
+
+class SnapshotStore:
+    """Save and load per-window snapshots in a private directory."""
+
+    def __init__(self, directory: Optional[Path] = None):
+        """Initialize the store.
+
+        Args:
+            directory: Snapshot directory (default: ~/.cache/claude-metrics,
+                resolved when first used)
+        """
+        self._directory = directory
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            from utils import get_snapshot_dir
+
+            self._directory = get_snapshot_dir()
+        return self._directory
+
+    def path(self, days: int) -> Path:
+        return self.directory / f"window-{days}d.snapshot"
+
+    def save(self, snapshot: PersistedSnapshot) -> Path:
+        """Write a snapshot atomically.
+
+        Args:
+            snapshot: Window to persist
+
+        Returns:
+            Path to the snapshot file
+        """
+        path = self.path(snapshot.days)
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "schema": _schema(),
+            "days": snapshot.days,
+            "extracted_at": snapshot.extracted_at,
+        }
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".snapshot-")
+        try:
+            os.chmod(tmp, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return path
+
+    @property
+    def locking(self) -> bool:
+        """Whether cross-process file locks are available on this platform."""
+        return fcntl is not None
+
+    @contextmanager
+    def lock(self, days: int, timeout: float = 600.0) -> Iterator[bool]:
+        """Hold the single-writer lock for a window across processes.
+
+        Blocks while another process holds it, for at most ``timeout``
+        seconds.
+
+        Args:
+            days: Time window to lock
+            timeout: Seconds to wait for the lock
+
+        Yields:
+            True if the lock is held, False if it timed out or file locking
+            is unavailable on this platform
+        """
+        if fcntl is None:
+            yield False
+            return
+        self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+        fd = os.open(self.directory / f"window-{days}d.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.05)
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def extracted_at(self, days: int) -> Optional[float]:
+        """Extraction time of the stored window, read from the header only.
+
+        Returns:
+            time.time() of the extraction, or None if there is no usable
+            snapshot
+        """
+        header = self._read(days, header_only=True)
+        return header.get("extracted_at") if header else None
+
+    def load(self, days: int) -> Optional[PersistedSnapshot]:
+        """Load a snapshot if a compatible one exists.
+
+        Args:
+            days: Time window to load
+
+        Returns:
+            The snapshot, or None if missing, unreadable or written by an
+            incompatible version
+        """
+        return self._read(days)
+
+    def _read(self, days: int, header_only: bool = False) -> Any:
+        path = self.path(days)
+        try:
+            with open(path, "rb") as f:
+                # Never unpickle a file someone else could have planted
+                if hasattr(os, "getuid") and os.fstat(f.fileno()).st_uid != os.getuid():
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._decode(mm, days, header_only)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError, IndexError, TypeError):
+            return None
+
+    @staticmethod
+    def _decode(buffer: mmap.mmap, days: int, header_only: bool) -> Any:
+        if buffer[:len(MAGIC)] != MAGIC:
+            return None
+        buffer.seek(len(MAGIC))
+        header = pickle.load(buffer)
+        if (
+            header.get("version") != SNAPSHOT_VERSION
+            or header.get("schema") != _schema()
+            or header.get("days") != days
+        ):
+            return None
+        if header_only:
+            return header
+        snapshot = pickle.load(buffer)
+        if not isinstance(snapshot, PersistedSnapshot) or snapshot.days != days:
+            return None
+        return snapshot
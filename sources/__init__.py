@@ -1,61 +1,79 @@
-"""Source extractors for Claude Code data."""
-
-from .base import BaseSource, CompositeSource
-
-# Original 9 sources
-from .stats_cache import StatsCacheSource
-from .settings import SettingsSource
-from .global_state import GlobalStateSource
-from .credentials import CredentialsSource
-from .history import HistorySource
-from .sessions import SessionsSource
-from .todos import TodosSource
-from .plans import PlansSource
-from .extensions import ExtensionsSource
-
-# New 13 sources (10-22)
-from .sqlite_store import SqliteStoreSource
-from .debug_logs import DebugLogsSource
-from .file_history import FileHistorySource
-from .shell_snapshots import ShellSnapshotsSource
-from .session_env import SessionEnvSource
-from .versions import VersionsSource
-from .project_config import ProjectConfigSource
-from .claude_md import ClaudeMdSource
-from .mcp_config import McpConfigSource
-from .environment import EnvironmentSource
-from .cache import CacheSource
-from .mcp_logs import McpLogsSource
-from .statusline import StatuslineSource
+"""Source extractors for Claude Code data.
 
-# All available sources (22 total)
-ALL_SOURCES = {
+Source modules are imported on first use, so listing source names (e.g.
+for command-line choices) does not load every extractor.
+"""
+
+import importlib
+from typing import Dict, Iterator, Mapping, Tuple, Type
+
+# Source name -> (module, class name); all 22 sources, in extraction order
+SOURCE_CLASSES: Dict[str, Tuple[str, str]] = {
     # Original 9 sources
-    "stats_cache": StatsCacheSource,
-    "settings": SettingsSource,
-    "global_state": GlobalStateSource,
-    "credentials": CredentialsSource,
-    "history": HistorySource,
-    "sessions": SessionsSource,
-    "todos": TodosSource,
-    "plans": PlansSource,
-    "extensions": ExtensionsSource,
+    "stats_cache": ("stats_cache", "StatsCacheSource"),
+    "settings": ("settings", "SettingsSource"),
+    "global_state": ("global_state", "GlobalStateSource"),
+    "credentials": ("credentials", "CredentialsSource"),
+    "history": ("history", "HistorySource"),
+    "sessions": ("sessions", "SessionsSource"),
+    "todos": ("todos", "TodosSource"),
+    "plans": ("plans", "PlansSource"),
+    "extensions": ("extensions", "ExtensionsSource"),
     # New 13 sources
-    "sqlite_store": SqliteStoreSource,
-    "debug_logs": DebugLogsSource,
-    "file_history": FileHistorySource,
-    "shell_snapshots": ShellSnapshotsSource,
-    "session_env": SessionEnvSource,
-    "versions": VersionsSource,
-    "project_config": ProjectConfigSource,
-    "claude_md": ClaudeMdSource,
-    "mcp_config": McpConfigSource,
-    "environment": EnvironmentSource,
-    "cache": CacheSource,
-    "mcp_logs": McpLogsSource,
-    "statusline": StatuslineSource,
+    "sqlite_store": ("sqlite_store", "SqliteStoreSource"),
+    "debug_logs": ("debug_logs", "DebugLogsSource"),
+    "file_history": ("file_history", "FileHistorySource"),
+    "shell_snapshots": ("shell_snapshots", "ShellSnapshotsSource"),
+    "session_env": ("session_env", "SessionEnvSource"),
+    "versions": ("versions", "VersionsSource"),
+    "project_config": ("project_config", "ProjectConfigSource"),
+    "claude_md": ("claude_md", "ClaudeMdSource"),
+    "mcp_config": ("mcp_config", "McpConfigSource"),
+    "environment": ("environment", "EnvironmentSource"),
+    "cache": ("cache", "CacheSource"),
+    "mcp_logs": ("mcp_logs", "McpLogsSource"),
+    "statusline": ("statusline", "StatuslineSource"),
+}
+
+# Class name -> module, for ``from sources import <Class>``
+_CLASS_MODULES: Dict[str, str] = {
+    "BaseSource": "base",
+    "CompositeSource": "base",
+    **{class_name: module for module, class_name in SOURCE_CLASSES.values()},
 }
 
+
+def _load_class(class_name: str) -> type:
+    module = importlib.import_module(f"{__name__}.{_CLASS_MODULES[class_name]}")
+    return getattr(module, class_name)
+
+
+class _SourceRegistry(Mapping):
+    """Source name -> extractor class, importing each module when accessed."""
+
+    def __getitem__(self, name: str) -> Type["BaseSource"]:
+        return _load_class(SOURCE_CLASSES[name][1])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(SOURCE_CLASSES)
+
+    def __len__(self) -> int:
+        return len(SOURCE_CLASSES)
+
+    def __contains__(self, name: object) -> bool:
+        return name in SOURCE_CLASSES
+
+
+# All available sources (22 total)
+ALL_SOURCES: Mapping[str, Type["BaseSource"]] = _SourceRegistry()
+
+
+def __getattr__(name: str):
+    if name in _CLASS_MODULES:
+        return _load_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "BaseSource",
     "CompositeSource",
@@ -85,4 +103,5 @@ __all__ = [
     "StatuslineSource",
     # Registry
     "ALL_SOURCES",
+    "SOURCE_CLASSES",
 ]
@@ -1,13 +1,12 @@
 """Base class for data source extractors."""
 
-import json
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from database import MetricsDatabase
-from redaction import redact_dict
+from json_stream import write_json_stream
 
 
 class BaseSource(ABC):
@@ -26,6 +25,9 @@ class BaseSource(ABC):
     # List of paths this source reads from (for documentation)
     source_paths: List[str] = []
 
+    # True if to_json/to_sqlite can parse records lazily without get_data()
+    supports_streaming: bool = False
+
     def __init__(self, include_sensitive: bool = False):
         """Initialize the extractor.
 
@@ -72,28 +74,38 @@ class BaseSource(ABC):
             "data": data,
         }
 
-    def to_json(self, path: Path, indent: int = 2) -> Path:
+    def to_json(
+        self,
+        path: Path,
+        indent: int = 2,
+        compact: bool = False,
+        compress: bool = False,
+        compression: str = "gzip",
+    ) -> Path:
         """Write the extracted data to a JSON file.
 
+        Records are redacted and serialized one at a time, so no redacted
+        copy of the whole payload is built.
+
         Args:
             path: Path to write the JSON file
             indent: JSON indentation level
+            compact: If True, write without indentation or spaces
+            compress: If True, compress the output (adds a .gz/.xz suffix)
+            compression: Compression format ("gzip" or "xz")
 
         Returns:
             Path to the written file
         """
-        data = self.to_dict()
-
-        # Apply redaction if needed
-        if not self.include_sensitive:
-            data = redact_dict(data, include_sensitive=False)
-
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=indent, ensure_ascii=False, default=str)
-
-        return path
+        return write_json_stream(
+            path,
+            self.to_dict(),
+            indent=indent,
+            compact=compact,
+            compress=compress,
+            include_sensitive=self.include_sensitive,
+            compression=compression,
+        )
 
     def to_sqlite(self, db: MetricsDatabase) -> None:
         """Write the extracted data to SQLite database.
@@ -1,11 +1,10 @@
 """Cache directory extractor."""
 
-import os
 from pathlib import Path
 from typing import Any, Dict, List
 
 from .base import BaseSource
-from utils import format_bytes
+from utils import format_bytes, scan_subtrees
 
 
 class CacheSource(BaseSource):
@@ -19,31 +18,6 @@ class CacheSource(BaseSource):
         """Get the cache directory path."""
         return Path.home() / ".cache" / "claude"
 
-    def _get_dir_size(self, path: Path) -> int:
-        """Calculate total size of a directory."""
-        total = 0
-        try:
-            for entry in path.rglob("*"):
-                if entry.is_file():
-                    try:
-                        total += entry.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
-        except (OSError, PermissionError):
-            pass
-        return total
-
-    def _count_files(self, path: Path) -> int:
-        """Count files in a directory."""
-        count = 0
-        try:
-            for entry in path.rglob("*"):
-                if entry.is_file():
-                    count += 1
-        except (OSError, PermissionError):
-            pass
-        return count
-
     def extract(self) -> Dict[str, Any]:
         """Extract cache directory information."""
         cache_dir = self._get_cache_dir()
@@ -57,25 +31,20 @@ class CacheSource(BaseSource):
                 "file_count": 0,
             }
 
-        # Get subdirectories
+        # One pass over the tree gives both the subdirectories and the totals
+        subtrees, top = scan_subtrees(cache_dir)
         subdirs = []
-        try:
-            for entry in cache_dir.iterdir():
-                if entry.is_dir():
-                    size = self._get_dir_size(entry)
-                    file_count = self._count_files(entry)
-                    subdirs.append({
-                        "name": entry.name,
-                        "size_bytes": size,
-                        "size_human": format_bytes(size),
-                        "file_count": file_count,
-                    })
-        except (OSError, PermissionError):
-            pass
+        for name, stats in subtrees.items():
+            subdirs.append({
+                "name": name,
+                "size_bytes": stats.size_bytes,
+                "size_human": format_bytes(stats.size_bytes),
+                "file_count": stats.file_count,
+            })
 
-        # Calculate totals
-        total_size = self._get_dir_size(cache_dir)
-        total_files = self._count_files(cache_dir)
+        total = sum(subtrees.values(), top)
+        total_size = total.size_bytes
+        total_files = total.file_count
 
         return {
             "cache_exists": True,
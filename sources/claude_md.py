@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .base import BaseSource
-from utils import get_claude_json_path, read_json_file, format_bytes
+from utils import read_claude_json_sections, format_bytes
 
 
 class ClaudeMdSource(BaseSource):
@@ -23,7 +23,8 @@ class ClaudeMdSource(BaseSource):
 
     def _get_known_projects(self) -> List[str]:
         """Get list of known project paths from ~/.claude.json."""
-        claude_json = read_json_file(get_claude_json_path())
+        partial = read_claude_json_sections()
+        claude_json = partial[0] if partial else None
         if claude_json and "projects" in claude_json:
             return list(claude_json["projects"].keys())
         return []
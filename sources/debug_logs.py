@@ -1,10 +1,10 @@
 """Debug logs extractor."""
 
-import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .base import BaseSource
+from .log_analysis import LogAnalyzer, log_offsets_path
 from utils import get_claude_dir, format_bytes, get_file_stats
 
 
@@ -16,57 +16,30 @@ class DebugLogsSource(BaseSource):
     source_paths = ["~/.claude/debug/"]
 
     # Log level patterns
-    ERROR_PATTERN = re.compile(r"\[ERROR\]|\bERROR\b|Error:|error:", re.IGNORECASE)
-    WARNING_PATTERN = re.compile(r"\[WARN\]|\[WARNING\]|\bWARN\b|\bWARNING\b|Warning:", re.IGNORECASE)
-    DEBUG_PATTERN = re.compile(r"\[DEBUG\]|\bDEBUG\b", re.IGNORECASE)
+    LEVEL_PATTERNS = {
+        "error": r"\[ERROR\]|\bERROR\b|Error:|error:",
+        "warning": r"\[WARN\]|\[WARNING\]|\bWARN\b|\bWARNING\b|Warning:",
+        "debug": r"\[DEBUG\]|\bDEBUG\b",
+    }
 
     def _get_debug_dir(self) -> Path:
         """Get the debug logs directory."""
         return get_claude_dir() / "debug"
 
-    def _analyze_log_file(self, file_path: Path) -> Dict[str, Any]:
+    def _analyze_log_file(self, file_path: Path, analyzer: LogAnalyzer) -> Dict[str, Any]:
         """Analyze a single log file for statistics."""
         stats = get_file_stats(file_path)
-
-        line_count = 0
-        error_count = 0
-        warning_count = 0
-        debug_count = 0
-        first_timestamp = None
-        last_timestamp = None
-
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                for line in f:
-                    line_count += 1
-
-                    # Count log levels
-                    if self.ERROR_PATTERN.search(line):
-                        error_count += 1
-                    if self.WARNING_PATTERN.search(line):
-                        warning_count += 1
-                    if self.DEBUG_PATTERN.search(line):
-                        debug_count += 1
-
-                    # Try to extract timestamp from line start
-                    # Format: YYYY-MM-DDTHH:MM:SS.mmmZ
-                    if line and len(line) > 24 and line[0].isdigit():
-                        ts = line[:24]
-                        if first_timestamp is None:
-                            first_timestamp = ts
-                        last_timestamp = ts
-        except (OSError, PermissionError, UnicodeDecodeError):
-            pass
+        result = analyzer.analyze(file_path)
 
         return {
             "size_bytes": stats.get("size_bytes", 0),
             "size_human": format_bytes(stats.get("size_bytes", 0)),
-            "line_count": line_count,
-            "error_count": error_count,
-            "warning_count": warning_count,
-            "debug_count": debug_count,
-            "first_timestamp": first_timestamp,
-            "last_timestamp": last_timestamp,
+            "line_count": result["line_count"],
+            "error_count": result["counts"]["error"],
+            "warning_count": result["counts"]["warning"],
+            "debug_count": result["counts"]["debug"],
+            "first_timestamp": result["first_timestamp"],
+            "last_timestamp": result["last_timestamp"],
             "modified_at": stats.get("modified_at"),
         }
 
@@ -85,6 +58,9 @@ class DebugLogsSource(BaseSource):
                 "logs": [],
             }
 
+        analyzer = LogAnalyzer(
+            self.LEVEL_PATTERNS, log_offsets_path(self.name), timestamps=True
+        )
         logs = []
         total_size = 0
         total_errors = 0
@@ -96,7 +72,7 @@ class DebugLogsSource(BaseSource):
                 if not file_path.is_file():
                     continue
 
-                analysis = self._analyze_log_file(file_path)
+                analysis = self._analyze_log_file(file_path, analyzer)
 
                 # Session ID is the filename without extension
                 session_id = file_path.stem
@@ -114,6 +90,7 @@ class DebugLogsSource(BaseSource):
                 total_lines += analysis.get("line_count", 0)
         except (OSError, PermissionError):
             pass
+        analyzer.save()
 
         # Sort by modified time (newest first)
         logs.sort(key=lambda x: x.get("modified_at", ""), reverse=True)
@@ -1,12 +1,12 @@
 """File history extractor."""
 
+import os
 import re
-from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
 from .base import BaseSource
-from utils import get_claude_dir, format_bytes
+from utils import get_claude_dir, format_bytes, read_files
 
 
 class FileHistorySource(BaseSource):
@@ -19,6 +19,17 @@ class FileHistorySource(BaseSource):
     # Pattern: {hash}@v{version}
     VERSION_PATTERN = re.compile(r"^(?P<hash>[a-fA-F0-9]+)@v(?P<version>\d+)$")
 
+    def __init__(self, include_sensitive: bool = False, detail: bool = False):
+        """Initialize the file history extractor.
+
+        Args:
+            include_sensitive: If True, include sensitive data
+            detail: If True, list every backed-up version of each file;
+                by default only per-file totals are kept
+        """
+        super().__init__(include_sensitive)
+        self.detail = detail
+
     def _get_file_history_dir(self) -> Path:
         """Get the file-history directory."""
         return get_claude_dir() / "file-history"
@@ -35,51 +46,60 @@ class FileHistorySource(BaseSource):
 
     def _extract_session_history(self, session_dir: Path) -> Dict[str, Any]:
         """Extract file history for a single session."""
-        files_by_hash: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        files_by_hash: Dict[str, Dict[str, Any]] = {}
+        version_count = 0
         total_size = 0
 
         try:
-            for file_path in session_dir.iterdir():
-                if not file_path.is_file():
-                    continue
-
-                metadata = self._parse_version_filename(file_path.name)
-                if not metadata:
-                    continue
-
-                try:
-                    size = file_path.stat().st_size
-                except (OSError, PermissionError):
-                    size = 0
-
-                total_size += size
-                files_by_hash[metadata["hash"]].append({
-                    "version": metadata["version"],
-                    "size_bytes": size,
-                    "filename": file_path.name,
-                })
+            with os.scandir(session_dir) as entries:
+                for entry in entries:
+                    metadata = self._parse_version_filename(entry.name)
+                    if not metadata:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    try:
+                        size = entry.stat().st_size
+                    except (OSError, PermissionError):
+                        size = 0
+
+                    version = metadata["version"]
+                    file_info = files_by_hash.get(metadata["hash"])
+                    if file_info is None:
+                        file_info = files_by_hash[metadata["hash"]] = {
+                            "hash": metadata["hash"],
+                            "version_count": 0,
+                            "max_version": version,
+                            "total_size_bytes": 0,
+                        }
+                        if self.detail:
+                            file_info["versions"] = []
+                    file_info["version_count"] += 1
+                    file_info["max_version"] = max(file_info["max_version"], version)
+                    file_info["total_size_bytes"] += size
+                    if self.detail:
+                        file_info["versions"].append({
+                            "version": version,
+                            "size_bytes": size,
+                            "filename": entry.name,
+                        })
+                    version_count += 1
+                    total_size += size
         except (OSError, PermissionError):
             pass
 
-        # Aggregate file info
-        files = []
-        for file_hash, versions in files_by_hash.items():
-            versions.sort(key=lambda x: x["version"])
-            total_file_size = sum(v["size_bytes"] for v in versions)
-
-            files.append({
-                "hash": file_hash,
-                "version_count": len(versions),
-                "max_version": max(v["version"] for v in versions),
-                "total_size_bytes": total_file_size,
-                "versions": versions,
-            })
+        if self.detail:
+            for file_info in files_by_hash.values():
+                file_info["versions"].sort(key=lambda x: x["version"])
 
         return {
-            "file_count": len(files),
-            "version_count": sum(len(v) for v in files_by_hash.values()),
+            "file_count": len(files_by_hash),
+            "version_count": version_count,
             "total_size_bytes": total_size,
-            "files": files,
+            "files": list(files_by_hash.values()),
         }
 
     def extract(self) -> Dict[str, Any]:
@@ -103,28 +123,20 @@ class FileHistorySource(BaseSource):
         total_size = 0
 
         try:
-            for session_dir in history_dir.iterdir():
-                if not session_dir.is_dir():
-                    continue
-
-                session_data = self._extract_session_history(session_dir)
-
-                session_info = {
-                    "session_id": session_dir.name,
-                    **session_data,
-                }
-
-                # Don't include detailed file list to keep output manageable
-                # Remove the detailed versions list for summary
-                for f in session_info.get("files", []):
-                    del f["versions"]
-
-                sessions.append(session_info)
-                total_files += session_data["file_count"]
-                total_versions += session_data["version_count"]
-                total_size += session_data["total_size_bytes"]
+            session_dirs = [path for path in history_dir.iterdir() if path.is_dir()]
         except (OSError, PermissionError):
-            pass
+            session_dirs = []
+
+        for session_dir, session_data in zip(
+            session_dirs, read_files(session_dirs, self._extract_session_history)
+        ):
+            sessions.append({
+                "session_id": session_dir.name,
+                **session_data,
+            })
+            total_files += session_data["file_count"]
+            total_versions += session_data["version_count"]
+            total_size += session_data["total_size_bytes"]
 
         # Sort by session ID
         sessions.sort(key=lambda x: x["session_id"])
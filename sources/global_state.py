@@ -1,9 +1,10 @@
 """Global state source extractor."""
 
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Optional, Tuple
 
 from database import MetricsDatabase
-from utils import get_claude_json_path, read_json_file
+from utils import get_claude_json_path, read_claude_json_sections, read_json_file
 from .base import BaseSource
 
 
@@ -21,6 +22,34 @@ class GlobalStateSource(BaseSource):
     description = "Global Claude Code state and per-project statistics"
     source_paths = ["~/.claude.json"]
 
+    def __init__(self, include_sensitive: bool = False, include_raw: bool = True):
+        """Initialize the extractor.
+
+        Args:
+            include_sensitive: If True, include sensitive data without redaction
+            include_raw: If False, decode only the sections the sources use
+                (read_claude_json_sections) and leave the full ``raw`` copy out
+        """
+        super().__init__(include_sensitive=include_sensitive)
+        self.include_raw = include_raw
+
+    def _read_partial(self, path) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Decode only the sections used, with how much of the file was skipped."""
+        partial = read_claude_json_sections()
+        if partial is None:
+            return None, {}
+        data, skipped = partial
+        try:
+            file_bytes = os.path.getsize(path)
+        except OSError:
+            file_bytes = 0
+        return data, {
+            "mode": "partial",
+            "file_bytes": file_bytes,
+            "skipped_bytes": skipped,
+            "skipped_percent": round(100 * skipped / file_bytes, 1) if file_bytes else 0.0,
+        }
+
     def extract(self) -> Dict[str, Any]:
         """Extract global state data.
 
@@ -33,16 +62,21 @@ class GlobalStateSource(BaseSource):
             - Plus other global settings
         """
         path = get_claude_json_path()
-        data = read_json_file(path)
+        if self.include_raw:
+            data = read_json_file(path)
+        else:
+            data, parse_stats = self._read_partial(path)
 
         if data is None:
             return {"error": "Global state file not found", "path": str(path)}
 
         # Organize the data
-        result = {
-            "path": str(path),
-            "raw": data,
-        }
+        result: Dict[str, Any] = {"path": str(path)}
+        if self.include_raw:
+            result["raw"] = data
+        else:
+            # Share of the file that was never kept in memory
+            result["parse"] = parse_stats
 
         # Extract key sections
         result["usage"] = {
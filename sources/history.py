@@ -1,17 +1,69 @@
 """History source extractor."""
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional
 
 from database import MetricsDatabase
+from json_stream import write_json_stream
 from utils import (
     get_claude_dir,
-    read_jsonl_file,
-    count_jsonl_lines,
+    get_time_window,
     unix_ms_to_datetime,
 )
 from .base import BaseSource
 
+# Bytes stepped back per probe when seeking the start of a time window
+SEEK_BLOCK = 64 * 1024
+
+
+def _iso(timestamp: Optional[int]) -> Optional[str]:
+    return unix_ms_to_datetime(timestamp).isoformat() if timestamp else None
+
+
+def _line_timestamp(line: bytes) -> Optional[int]:
+    """Timestamp of a history line, or None if it has no usable one."""
+    try:
+        timestamp = json.loads(line).get("timestamp")
+    except (ValueError, AttributeError):
+        return None
+    return timestamp if isinstance(timestamp, (int, float)) else None
+
+
+def seek_window_start(f: IO[bytes], cutoff_ms: int) -> int:
+    """Find where entries at or after a cutoff may begin in history.jsonl.
+
+    History is appended in time order, so the file is probed backwards
+    from its end, one block at a time, until a line older than the cutoff
+    is found. Only the window (plus at most one block) is read.
+
+    Args:
+        f: history.jsonl opened in binary mode
+        cutoff_ms: Window start as Unix milliseconds
+
+    Returns:
+        Byte offset of a line start at or before the first entry in the
+        window
+    """
+    size = os.fstat(f.fileno()).st_size
+    pos = size
+    while pos > 0:
+        pos = max(0, pos - SEEK_BLOCK)
+        f.seek(pos)
+        if pos:
+            f.readline()  # skip the partial line
+        while True:
+            start = f.tell()
+            if start >= min(size, pos + SEEK_BLOCK):
+                break
+            timestamp = _line_timestamp(f.readline())
+            if timestamp is not None:
+                if timestamp < cutoff_ms:
+                    return start
+                break
+    return 0
+
 
 class HistorySource(BaseSource):
     """Extractor for ~/.claude/history.jsonl.
@@ -24,22 +76,34 @@ class HistorySource(BaseSource):
     description = "User input history"
     source_paths = ["~/.claude/history.jsonl"]
 
-    def __init__(self, include_sensitive: bool = False, limit: Optional[int] = None):
+    def __init__(
+        self,
+        include_sensitive: bool = False,
+        limit: Optional[int] = None,
+        days: Optional[int] = None,
+    ):
         """Initialize the history extractor.
 
         Args:
             include_sensitive: If True, include full input text
             limit: Maximum number of entries to extract (None = all)
+            days: Only extract entries from the last N days (None = all);
+                older entries are skipped without being read
         """
         super().__init__(include_sensitive)
         self.limit = limit
+        self.days = days
 
     def extract(self) -> Dict[str, Any]:
         """Extract history data.
 
+        The file is read once: lines are counted and parsed in the same
+        pass. ISO timestamps are added when the data is written out.
+
         Returns:
             Dictionary containing:
-            - total_entries: Total number of history entries
+            - total_entries: Total number of history entries (in the
+              window, if days is set)
             - entries: List of history records
             - projects: Unique projects referenced
             - date_range: First and last entry dates
@@ -49,47 +113,69 @@ class HistorySource(BaseSource):
         if not path.exists():
             return {"error": "History file not found", "path": str(path)}
 
-        total_count = count_jsonl_lines(path)
+        cutoff_ms = get_time_window(self.days)[2] if self.days is not None else None
 
+        total_count = 0
         entries = []
         projects = set()
         min_ts = None
         max_ts = None
 
-        for i, record in enumerate(read_jsonl_file(path)):
-            if self.limit and i >= self.limit:
-                break
-
-            # Extract fields
-            timestamp = record.get("timestamp")
-            project = record.get("project", "")
-            display = record.get("display", "")
-            pasted = record.get("pastedContents")
-
-            if project:
-                projects.add(project)
-
-            if timestamp:
-                if min_ts is None or timestamp < min_ts:
-                    min_ts = timestamp
-                if max_ts is None or timestamp > max_ts:
-                    max_ts = timestamp
-
-            entry = {
-                "timestamp": timestamp,
-                "timestamp_iso": unix_ms_to_datetime(timestamp).isoformat() if timestamp else None,
-                "project": project,
-                "display_length": len(display),
-                "has_pasted_contents": pasted is not None,
-            }
-
-            # Include full display text if requested or short
-            if self.include_sensitive or len(display) <= 200:
-                entry["display"] = display
-            else:
-                entry["display"] = display[:200] + "...[truncated]"
-
-            entries.append(entry)
+        try:
+            with open(path, "rb") as f:
+                if cutoff_ms is not None:
+                    f.seek(seek_window_start(f, cutoff_ms))
+                for raw in f:
+                    line = raw.decode("utf-8").strip()
+                    if not line:
+                        continue
+                    if cutoff_ms is None:
+                        total_count += 1
+                        if self.limit and len(entries) >= self.limit:
+                            continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Skip malformed lines
+                        continue
+
+                    # Extract fields
+                    timestamp = record.get("timestamp")
+                    if cutoff_ms is not None:
+                        if not timestamp or timestamp < cutoff_ms:
+                            continue
+                        total_count += 1
+                        if self.limit and len(entries) >= self.limit:
+                            continue
+                    project = record.get("project", "")
+                    display = record.get("display", "")
+                    pasted = record.get("pastedContents")
+
+                    if project:
+                        projects.add(project)
+
+                    if timestamp:
+                        if min_ts is None or timestamp < min_ts:
+                            min_ts = timestamp
+                        if max_ts is None or timestamp > max_ts:
+                            max_ts = timestamp
+
+                    entry = {
+                        "timestamp": timestamp,
+                        "project": project,
+                        "display_length": len(display),
+                        "has_pasted_contents": pasted is not None,
+                    }
+
+                    # Include full display text if requested or short
+                    if self.include_sensitive or len(display) <= 200:
+                        entry["display"] = display
+                    else:
+                        entry["display"] = display[:200] + "...[truncated]"
+
+                    entries.append(entry)
+        except (IOError, UnicodeDecodeError):
+            pass
 
         return {
             "path": str(path),
@@ -99,11 +185,48 @@ class HistorySource(BaseSource):
             "unique_projects": sorted(projects),
             "project_count": len(projects),
             "date_range": {
-                "first": unix_ms_to_datetime(min_ts).isoformat() if min_ts else None,
-                "last": unix_ms_to_datetime(max_ts).isoformat() if max_ts else None,
+                "first": _iso(min_ts),
+                "last": _iso(max_ts),
             },
         }
 
+    @staticmethod
+    def _with_iso(entries: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for entry in entries:
+            yield {**entry, "timestamp_iso": _iso(entry.get("timestamp"))}
+
+    def _output(self, lazy: bool) -> Dict[str, Any]:
+        """to_dict() output; entries gain ISO timestamps, lazily if ``lazy``."""
+        result = super().to_dict()
+        data = result["data"]
+        if "entries" in data:
+            entries = self._with_iso(data["entries"])
+            result["data"] = {**data, "entries": entries if lazy else list(entries)}
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the data with metadata, entries with ISO timestamps added."""
+        return self._output(lazy=False)
+
+    def to_json(
+        self,
+        path: Path,
+        indent: int = 2,
+        compact: bool = False,
+        compress: bool = False,
+        compression: str = "gzip",
+    ) -> Path:
+        """Write history to JSON, adding ISO timestamps to entries as they are written."""
+        return write_json_stream(
+            path,
+            self._output(lazy=True),
+            indent=indent,
+            compact=compact,
+            compress=compress,
+            include_sensitive=self.include_sensitive,
+            compression=compression,
+        )
+
     def to_sqlite(self, db: MetricsDatabase) -> None:
         """Write history to SQLite."""
         data = self.get_data()
@@ -119,7 +242,7 @@ class HistorySource(BaseSource):
             db_records.append({
                 "display": entry.get("display", ""),
                 "timestamp": entry.get("timestamp"),
-                "timestamp_iso": entry.get("timestamp_iso"),
+                "timestamp_iso": _iso(entry.get("timestamp")),
                 "project": entry.get("project"),
                 "pastedContents": entry.get("has_pasted_contents"),
             })
@@ -0,0 +1,177 @@
+"""Incremental line statistics for append-only log files.
+
+Log files only grow, so the analyzer remembers how far it has read each
+file, with the counts so far, and on the next run analyzes only the bytes
+appended since. Levels are classified in a single pass over the new text
+with one compiled alternation of named groups.
+"""
+
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils import get_snapshot_dir, read_json_file, write_json_atomic
+
+# Line prefix taken as a timestamp, e.g. 2025-01-15T10:00:00.000Z. Like the
+# original line-based check, the line needs one character past the prefix.
+TIMESTAMP_RE = re.compile(r"^\d[^\n]{23}(?=[\s\S])", re.MULTILINE)
+
+# Bytes before the resume offset checked to detect rewritten files
+CHECK_BYTES = 64
+
+
+def log_offsets_path(name: str) -> Path:
+    """Offsets file of a source, kept with the other claude-metrics caches."""
+    return get_snapshot_dir() / f"log-offsets-{name}.json"
+
+
+class LogAnalyzer:
+    """Count lines, per-level lines and first/last timestamps of log files."""
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        levels: Dict[str, str],
+        state_path: Optional[Path] = None,
+        timestamps: bool = False,
+    ):
+        """Initialize the analyzer.
+
+        Args:
+            levels: Level name -> regex (case-insensitive) marking a line of
+                that level; patterns of different levels must not match the
+                same text
+            state_path: JSON file holding per-file offsets between runs
+                (default: none, every file is read in full)
+            timestamps: Also track first and last line timestamps
+        """
+        self.levels = list(levels)
+        self.pattern = re.compile(
+            "|".join(f"(?P<{name}>{regex})" for name, regex in levels.items()),
+            re.IGNORECASE,
+        )
+        self.state_path = state_path
+        self.timestamps = timestamps
+        self._previous: Optional[Dict[str, Any]] = None
+        self._state: Dict[str, Any] = {}
+
+    def _empty(self) -> Dict[str, Any]:
+        return {
+            "line_count": 0,
+            "counts": dict.fromkeys(self.levels, 0),
+            "first_timestamp": None,
+            "last_timestamp": None,
+        }
+
+    def _scan(self, text: str, ends_with_newline: bool) -> Dict[str, Any]:
+        """Statistics of a run of whole lines."""
+        result = self._empty()
+        if not text:
+            return result
+        result["line_count"] = text.count("\n") + (0 if ends_with_newline else 1)
+
+        counts = result["counts"]
+        last_line = dict.fromkeys(self.levels, -1)
+        line = 0
+        pos = 0
+        for match in self.pattern.finditer(text):
+            line += text.count("\n", pos, match.start())
+            pos = match.start()
+            level = match.lastgroup
+            if last_line[level] != line:  # count each line once per level
+                last_line[level] = line
+                counts[level] += 1
+
+        if self.timestamps:
+            first = TIMESTAMP_RE.search(text)
+            if first is not None:
+                result["first_timestamp"] = first.group()
+                end = len(text)
+                while end > 0:
+                    start = text.rfind("\n", 0, end - 1) + 1
+                    last = TIMESTAMP_RE.match(text, start)
+                    if last is not None:
+                        result["last_timestamp"] = last.group()
+                        break
+                    end = start
+        return result
+
+    @staticmethod
+    def _merge(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "line_count": before["line_count"] + after["line_count"],
+            "counts": {k: v + after["counts"].get(k, 0) for k, v in before["counts"].items()},
+            "first_timestamp": before["first_timestamp"] or after["first_timestamp"],
+            "last_timestamp": after["last_timestamp"] or before["last_timestamp"],
+        }
+
+    def _load(self) -> Dict[str, Any]:
+        if self._previous is None:
+            data = read_json_file(self.state_path, cache=False) if self.state_path else None
+            valid = (
+                isinstance(data, dict)
+                and data.get("version") == self.VERSION
+                and data.get("levels") == self.levels
+            )
+            self._previous = data.get("files", {}) if valid else {}
+        return self._previous
+
+    @staticmethod
+    def _check(f, offset: int) -> int:
+        f.seek(max(0, offset - CHECK_BYTES))
+        return zlib.crc32(f.read(min(offset, CHECK_BYTES)))
+
+    def analyze(self, path: Path) -> Dict[str, Any]:
+        """Statistics of one log file, reading only what was appended since last time.
+
+        Returns:
+            Dict with line_count, counts (per level), first_timestamp and
+            last_timestamp
+        """
+        key = str(path)
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                offset = 0
+                totals = self._empty()
+                previous = self._load().get(key)
+                if (
+                    previous is not None
+                    and previous["ino"] == st.st_ino
+                    and previous["offset"] <= st.st_size
+                    and self._check(f, previous["offset"]) == previous["check"]
+                ):
+                    offset = previous["offset"]
+                    totals = previous["totals"]
+
+                f.seek(offset)
+                data = f.read()
+                # Whole lines are remembered; a partial last line is re-read
+                end = data.rfind(b"\n") + 1
+                totals = self._merge(
+                    totals, self._scan(data[:end].decode("utf-8", errors="replace"), True)
+                )
+                self._state[key] = {
+                    "ino": st.st_ino,
+                    "offset": offset + end,
+                    "check": self._check(f, offset + end),
+                    "totals": totals,
+                }
+        except OSError:
+            return self._empty()
+
+        tail = data[end:].decode("utf-8", errors="replace")
+        return self._merge(totals, self._scan(tail, False))
+
+    def save(self) -> None:
+        """Persist offsets of the files analyzed since the analyzer was created."""
+        if self.state_path is None:
+            return
+        write_json_atomic(self.state_path, {
+            "version": self.VERSION,
+            "levels": self.levels,
+            "files": self._state,
+        })
@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .base import BaseSource
-from utils import get_claude_json_path, read_json_file
+from utils import read_claude_json_sections, read_json_file
 
 
 class McpConfigSource(BaseSource):
@@ -19,7 +19,8 @@ class McpConfigSource(BaseSource):
 
     def _get_known_projects(self) -> List[str]:
         """Get list of known project paths from ~/.claude.json."""
-        claude_json = read_json_file(get_claude_json_path())
+        partial = read_claude_json_sections()
+        claude_json = partial[0] if partial else None
         if claude_json and "projects" in claude_json:
             return list(claude_json["projects"].keys())
         return []
@@ -60,7 +61,7 @@ class McpConfigSource(BaseSource):
 
     def _extract_mcp_config(self, file_path: Path) -> Optional[Dict[str, Any]]:
         """Extract MCP configuration from a file."""
-        config = read_json_file(file_path)
+        config = read_json_file(file_path, cache=False)
         if not config:
             return None
 
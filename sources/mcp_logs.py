@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 from .base import BaseSource
+from .log_analysis import LogAnalyzer, log_offsets_path
 from utils import get_cache_dir, format_bytes
 
 
@@ -19,35 +20,28 @@ class McpLogsSource(BaseSource):
     MCP_LOGS_PATTERN = re.compile(r"^mcp-logs-(.+)$")
 
     # Error patterns in log files
-    ERROR_PATTERN = re.compile(r"\bERROR\b|\bError\b|error:", re.IGNORECASE)
+    LEVEL_PATTERNS = {"error": r"\bERROR\b|\bError\b|error:"}
 
-    def _analyze_log_file(self, file_path: Path) -> Dict[str, Any]:
+    def _analyze_log_file(self, file_path: Path, analyzer: LogAnalyzer) -> Dict[str, Any]:
         """Analyze a single log file for statistics."""
         size = 0
-        line_count = 0
-        error_count = 0
 
         try:
             size = file_path.stat().st_size
         except (OSError, PermissionError):
             pass
 
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                for line in f:
-                    line_count += 1
-                    if self.ERROR_PATTERN.search(line):
-                        error_count += 1
-        except (OSError, PermissionError):
-            pass
+        result = analyzer.analyze(file_path)
 
         return {
             "size_bytes": size,
-            "line_count": line_count,
-            "error_count": error_count,
+            "line_count": result["line_count"],
+            "error_count": result["counts"]["error"],
         }
 
-    def _extract_server_logs(self, logs_dir: Path, server_name: str) -> Dict[str, Any]:
+    def _extract_server_logs(
+        self, logs_dir: Path, server_name: str, analyzer: LogAnalyzer
+    ) -> Dict[str, Any]:
         """Extract log information for a single MCP server."""
         log_files = []
         total_size = 0
@@ -59,7 +53,7 @@ class McpLogsSource(BaseSource):
                 if not log_file.is_file():
                     continue
 
-                analysis = self._analyze_log_file(log_file)
+                analysis = self._analyze_log_file(log_file, analyzer)
                 total_size += analysis["size_bytes"]
                 total_lines += analysis["line_count"]
                 total_errors += analysis["error_count"]
@@ -84,7 +78,7 @@ class McpLogsSource(BaseSource):
             "log_files": log_files[:10],  # Limit to 10 most recent
         }
 
-    def _extract_project_logs(self, project_dir: Path) -> Dict[str, Any]:
+    def _extract_project_logs(self, project_dir: Path, analyzer: LogAnalyzer) -> Dict[str, Any]:
         """Extract MCP logs for a single project."""
         servers = []
         total_log_count = 0
@@ -101,7 +95,7 @@ class McpLogsSource(BaseSource):
                     continue
 
                 server_name = match.group(1)
-                server_data = self._extract_server_logs(entry, server_name)
+                server_data = self._extract_server_logs(entry, server_name, analyzer)
 
                 servers.append(server_data)
                 total_log_count += server_data["log_count"]
@@ -136,6 +130,7 @@ class McpLogsSource(BaseSource):
                 "projects": [],
             }
 
+        analyzer = LogAnalyzer(self.LEVEL_PATTERNS, log_offsets_path(self.name))
         projects = []
         total_servers = 0
         total_log_files = 0
@@ -151,7 +146,7 @@ class McpLogsSource(BaseSource):
                 if project_dir.name.startswith("."):
                     continue
 
-                project_data = self._extract_project_logs(project_dir)
+                project_data = self._extract_project_logs(project_dir, analyzer)
 
                 if project_data["server_count"] > 0:
                     projects.append({
@@ -164,6 +159,7 @@ class McpLogsSource(BaseSource):
                     total_errors += project_data["total_errors"]
         except (OSError, PermissionError):
             pass
+        analyzer.save()
 
         # Sort by total log count
         projects.sort(key=lambda x: x["total_log_count"], reverse=True)
@@ -1,10 +1,12 @@
 """Plans source extractor."""
 
+import os
 import re
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
 from database import MetricsDatabase
-from utils import get_claude_dir, iter_markdown_files, get_file_stats
+from utils import file_stats_from_stat, get_claude_dir, list_files, read_files
 from .base import BaseSource
 
 
@@ -29,6 +31,19 @@ class PlansSource(BaseSource):
         super().__init__(include_sensitive)
         self.include_content = include_content
 
+    @staticmethod
+    def _read_plan(path: Path) -> Tuple[Dict[str, Any], str]:
+        """File stats and content of a plan, from one open."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                file_stats = file_stats_from_stat(os.fstat(f.fileno()))
+                try:
+                    return file_stats, f.read()
+                except (OSError, UnicodeDecodeError):
+                    return file_stats, ""
+        except OSError:
+            return {}, ""
+
     def _analyze_plan(self, content: str) -> Dict[str, Any]:
         """Analyze a plan's structure."""
         lines = content.split("\n")
@@ -89,14 +104,11 @@ class PlansSource(BaseSource):
         total_lines = 0
         total_code_blocks = 0
 
-        for plan_file in iter_markdown_files(plans_dir):
-            file_stats = get_file_stats(plan_file)
-
-            try:
-                content = plan_file.read_text(encoding="utf-8")
-            except Exception:
-                content = ""
+        plan_files = list_files(plans_dir, ".md")
 
+        for plan_file, (file_stats, content) in zip(
+            plan_files, read_files(plan_files, self._read_plan)
+        ):
             analysis = self._analyze_plan(content)
             total_lines += analysis["line_count"]
             total_code_blocks += analysis["code_block_count"]
@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .base import BaseSource
-from utils import get_claude_json_path, read_json_file, format_bytes
+from utils import read_claude_json_sections, read_json_file, format_bytes
 
 
 class ProjectConfigSource(BaseSource):
@@ -16,7 +16,8 @@ class ProjectConfigSource(BaseSource):
 
     def _get_known_projects(self) -> List[str]:
         """Get list of known project paths from ~/.claude.json."""
-        claude_json = read_json_file(get_claude_json_path())
+        partial = read_claude_json_sections()
+        claude_json = partial[0] if partial else None
         if claude_json and "projects" in claude_json:
             return list(claude_json["projects"].keys())
         return []
@@ -40,7 +41,7 @@ class ProjectConfigSource(BaseSource):
 
     def _extract_settings_local(self, settings_path: Path) -> Optional[Dict[str, Any]]:
         """Extract settings.local.json configuration."""
-        settings = read_json_file(settings_path)
+        settings = read_json_file(settings_path, cache=False)
         if not settings:
             return None
 
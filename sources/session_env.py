@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 from .base import BaseSource
-from utils import get_claude_dir, format_bytes
+from utils import format_bytes, get_claude_dir, scan_subtrees
 
 
 class SessionEnvSource(BaseSource):
@@ -18,31 +18,6 @@ class SessionEnvSource(BaseSource):
         """Get the session-env directory."""
         return get_claude_dir() / "session-env"
 
-    def _get_session_size(self, session_dir: Path) -> int:
-        """Calculate total size of a session directory."""
-        total = 0
-        try:
-            for entry in session_dir.rglob("*"):
-                if entry.is_file():
-                    try:
-                        total += entry.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
-        except (OSError, PermissionError):
-            pass
-        return total
-
-    def _get_session_files(self, session_dir: Path) -> List[str]:
-        """Get list of files in a session directory."""
-        files = []
-        try:
-            for entry in session_dir.iterdir():
-                if entry.is_file():
-                    files.append(entry.name)
-        except (OSError, PermissionError):
-            pass
-        return files
-
     def extract(self) -> Dict[str, Any]:
         """Extract session environment information."""
         session_env_dir = self._get_session_env_dir()
@@ -61,29 +36,25 @@ class SessionEnvSource(BaseSource):
         total_size = 0
         sessions_with_data = 0
 
-        try:
-            for session_dir in session_env_dir.iterdir():
-                if not session_dir.is_dir():
-                    continue
-
-                files = self._get_session_files(session_dir)
-                size = self._get_session_size(session_dir)
-                total_size += size
-
-                session_info = {
-                    "session_id": session_dir.name,
-                    "files": files,
-                    "file_count": len(files),
-                    "size_bytes": size,
-                    "size_human": format_bytes(size),
-                }
-
-                if files:
-                    sessions_with_data += 1
-
-                sessions.append(session_info)
-        except (OSError, PermissionError):
-            pass
+        # One walk yields both the sizes and the file names of each session
+        file_names: Dict[str, List[str]] = {}
+        subtrees, _ = scan_subtrees(session_env_dir, file_names=file_names)
+        for session_id, files in file_names.items():
+            size = subtrees[session_id].size_bytes
+            total_size += size
+
+            session_info = {
+                "session_id": session_id,
+                "files": sorted(files),
+                "file_count": len(files),
+                "size_bytes": size,
+                "size_human": format_bytes(size),
+            }
+
+            if files:
+                sessions_with_data += 1
+
+            sessions.append(session_info)
 
         # Sort by session ID
         sessions.sort(key=lambda x: x["session_id"])
@@ -1,12 +1,15 @@
 """Sessions source extractor."""
 
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Generator, List, Optional, Tuple
 
 from database import MetricsDatabase
+from json_stream import compress_bytes, open_output, output_path, write_json_stream
+from redaction import redact_dict, redact_string
 from utils import (
     get_claude_dir,
     read_jsonl_file,
@@ -19,6 +22,17 @@ from utils import (
 from .base import BaseSource
 
 
+# Tool inputs indexed for full-text search: tool name -> (input field, kind)
+SEARCHABLE_TOOL_INPUTS = {
+    "Bash": ("command", "bash"),
+    "Grep": ("pattern", "grep"),
+    "WebSearch": ("query", "web_search"),
+}
+
+# Valid shard_by values for sharded JSON output
+SHARD_KEYS = (None, "project", "date")
+
+
 class SessionsSource(BaseSource):
     """Extractor for ~/.claude/projects/*/*.jsonl session files.
 
@@ -33,6 +47,7 @@ class SessionsSource(BaseSource):
     name = "sessions"
     description = "Complete conversation session transcripts"
     source_paths = ["~/.claude/projects/*/*.jsonl"]
+    supports_streaming = True
 
     def __init__(
         self,
@@ -40,6 +55,7 @@ class SessionsSource(BaseSource):
         include_full_content: bool = False,
         limit_sessions: Optional[int] = None,
         limit_messages_per_session: Optional[int] = None,
+        shard_by: Optional[str] = None,
     ):
         """Initialize the sessions extractor.
 
@@ -48,11 +64,18 @@ class SessionsSource(BaseSource):
             include_full_content: If True, include full message content
             limit_sessions: Maximum sessions to extract (None = all)
             limit_messages_per_session: Max messages per session (None = all)
+            shard_by: JSON output layout: None for one file per session,
+                "project" or "date" (month) for sharded JSON lines files
         """
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Invalid shard_by: {shard_by!r}")
         super().__init__(include_sensitive)
         self.include_full_content = include_full_content
         self.limit_sessions = limit_sessions
         self.limit_messages_per_session = limit_messages_per_session
+        self.shard_by = shard_by
+        # Summary totals recorded by a streaming write (no messages held)
+        self._summary_data: Optional[Dict[str, Any]] = None
 
     def _iter_session_files(self) -> Generator[Tuple[Path, str], None, None]:
         """Iterate over session files with project info.
@@ -75,9 +98,19 @@ class SessionsSource(BaseSource):
                     yield jsonl_file, project_path
 
     def _extract_session(
-        self, file_path: Path, project_path: str
+        self,
+        file_path: Path,
+        project_path: str,
+        search_documents: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """Extract data from a single session file."""
+        """Extract data from a single session file.
+
+        Args:
+            file_path: Session JSONL file
+            project_path: Project the session belongs to
+            search_documents: If given, the session's full-text search
+                documents are appended to it from the same read
+        """
         session_id = file_path.stem
         is_agent = session_id.startswith("agent-")
 
@@ -95,9 +128,16 @@ class SessionsSource(BaseSource):
 
         msg_count = 0
         for record in read_jsonl_file(file_path):
-            # Check message limit
+            if search_documents is not None:
+                search_documents.extend(
+                    _search_documents(record, session_id, self.include_sensitive)
+                )
+
+            # Check message limit (search documents still cover the whole file)
             if self.limit_messages_per_session and msg_count >= self.limit_messages_per_session:
-                break
+                if search_documents is None:
+                    break
+                continue
 
             msg_type = record.get("type")
 
@@ -163,6 +203,7 @@ class SessionsSource(BaseSource):
                                 "tool_name": block.get("name"),
                                 "message_uuid": record.get("uuid"),
                                 "session_id": session_id,
+                                "timestamp": timestamp,
                             }
                             msg_tool_calls.append(tool_call)
 
@@ -256,36 +297,51 @@ class SessionsSource(BaseSource):
             "tool_calls": tool_calls,
         }
 
-    def extract(self) -> Dict[str, Any]:
-        """Extract session data.
+    def _iter_sessions(
+        self,
+        stats: Dict[str, int],
+        search_documents: Optional[List[Dict[str, Any]]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Parse session files one at a time.
 
-        Returns:
-            Dictionary containing:
-            - total_files: Total session files found
-            - extracted_sessions: Number of sessions extracted
-            - sessions: List of session summaries
-            - by_project: Sessions grouped by project
-        """
-        sessions = []
-        by_project = defaultdict(list)
-        total_files = 0
+        Args:
+            stats: Counters updated in place ("total_files")
+            search_documents: If given, each session's search documents are
+                appended to it while the session is parsed
 
+        Yields:
+            Session dicts, or error entries for files that failed to parse
+        """
+        extracted = 0
         for file_path, project_path in self._iter_session_files():
-            total_files += 1
+            stats["total_files"] = stats.get("total_files", 0) + 1
 
-            if self.limit_sessions and len(sessions) >= self.limit_sessions:
+            if self.limit_sessions and extracted >= self.limit_sessions:
                 continue
+            extracted += 1
 
             try:
-                session = self._extract_session(file_path, project_path)
-                sessions.append(session)
-                by_project[project_path].append(session["session_id"])
+                session = self._extract_session(file_path, project_path, search_documents)
             except Exception as e:
-                sessions.append({
+                session = {
                     "session_id": file_path.stem,
                     "error": str(e),
                     "file_path": str(file_path),
-                })
+                }
+            yield session
+
+    def _build_result(
+        self, sessions: List[Dict[str, Any]], total_files: int
+    ) -> Dict[str, Any]:
+        """Build the extraction result from session entries.
+
+        Only summary fields are read, so index entries without messages or
+        tool calls give the same totals as full sessions.
+        """
+        by_project = defaultdict(list)
+        for s in sessions:
+            if "error" not in s:
+                by_project[s.get("project")].append(s["session_id"])
 
         # Calculate totals
         total_messages = sum(s.get("message_count", 0) for s in sessions if "error" not in s)
@@ -305,35 +361,116 @@ class SessionsSource(BaseSource):
             "by_project": dict(by_project),
         }
 
-    def to_sqlite(self, db: MetricsDatabase) -> None:
-        """Write sessions to SQLite."""
-        data = self.get_data()
+    def extract(self) -> Dict[str, Any]:
+        """Extract session data.
 
-        if "error" in data:
-            return
+        Returns:
+            Dictionary containing:
+            - total_files: Total session files found
+            - extracted_sessions: Number of sessions extracted
+            - sessions: List of session summaries
+            - by_project: Sessions grouped by project
+        """
+        stats = {"total_files": 0}
+        sessions = list(self._iter_sessions(stats))
+        return self._build_result(sessions, stats["total_files"])
 
-        sessions = data.get("sessions", [])
+    def iter_search_documents(self) -> Generator[Dict[str, Any], None, None]:
+        """Stream full-text search documents from session files.
 
-        for session in sessions:
-            if "error" in session:
-                continue
+        Yields one document per user/assistant text block and per Bash
+        command, Grep pattern and WebSearch query. Text is read from the
+        JSONL files untruncated and redacted unless include_sensitive.
 
-            # Insert session
-            db.insert_session(session)
+        Yields:
+            Dicts with content, kind, session_id, message_uuid, timestamp
+        """
+        extracted = 0
+        for file_path, _ in self._iter_session_files():
+            if self.limit_sessions and extracted >= self.limit_sessions:
+                break
+            extracted += 1
+
+            session_id = file_path.stem
+            for record in read_jsonl_file(file_path):
+                yield from _search_documents(record, session_id, self.include_sensitive)
+
+    def _session_source(
+        self, search_documents: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[Any, Dict[str, int]]:
+        """Get sessions from memory if extracted, else a lazy parser.
+
+        Args:
+            search_documents: Passed to the lazy parser (see _iter_sessions)
+        """
+        if self._data is not None:
+            data = self._data
+            return data.get("sessions", []), {"total_files": data.get("total_files", 0)}
+
+        if self._extracted_at is None:
+            self._extracted_at = datetime.now().isoformat()
+        stats = {"total_files": 0}
+        return self._iter_sessions(stats, search_documents), stats
 
-            # Insert messages
+    def _search_buffer(self, db: MetricsDatabase) -> Optional[List[Dict[str, Any]]]:
+        """List to collect search documents in while parsing, if they are indexed."""
+        return [] if db.fts_enabled and self._data is None else None
+
+    def _insert_session(
+        self,
+        db: MetricsDatabase,
+        session: Dict[str, Any],
+        search_documents: Optional[List[Dict[str, Any]]],
+    ) -> None:
+        """Insert one parsed session and the search documents read with it."""
+        if "error" not in session:
+            db.insert_session(session)
             for msg in session.get("messages", []):
                 db.insert_message(msg)
-
-            # Insert tool calls
             for tool_call in session.get("tool_calls", []):
                 db.insert_tool_call(tool_call)
 
+        if search_documents:
+            db.insert_search_documents(search_documents)
+            search_documents.clear()
+
+    def _finish_sqlite(
+        self, db: MetricsDatabase, search_documents: Optional[List[Dict[str, Any]]]
+    ) -> None:
+        """Index sessions that were already in memory for search, then commit."""
+        if db.fts_enabled and search_documents is None:
+            db.insert_search_documents(self.iter_search_documents())
         db.commit()
 
+    def to_sqlite(self, db: MetricsDatabase) -> None:
+        """Write sessions to SQLite.
+
+        If the data has not been extracted yet, session files are parsed
+        and inserted one at a time, and each file is read only once for
+        both the tables and the full-text index.
+        """
+        if self._data is not None and "error" in self._data:
+            return
+
+        search_documents = self._search_buffer(db)
+        sessions, stats = self._session_source(search_documents)
+        entries = []
+
+        for session in sessions:
+            self._insert_session(db, session, search_documents)
+            entries.append(session if "error" in session else _index_entry(session))
+
+        self._finish_sqlite(db, search_documents)
+
+        if self._data is None:
+            self._summary_data = self._build_result(entries, stats["total_files"])
+
     def get_summary(self) -> Dict[str, Any]:
         """Get sessions summary."""
-        data = self.get_data()
+        if self._data is None and self._summary_data is not None:
+            data = self._summary_data
+        else:
+            data = self.get_data()
 
         if "error" in data:
             return {"source": self.name, "error": data["error"]}
@@ -366,42 +503,132 @@ class SessionsSource(BaseSource):
             "model_distribution": dict(model_counts),
         }
 
-    def to_json(self, path: Path, indent: int = 2) -> Path:
+    def to_json(
+        self,
+        path: Path,
+        indent: int = 2,
+        compact: bool = False,
+        compress: bool = False,
+        compression: str = "gzip",
+        max_workers: int = 4,
+        db: Optional[MetricsDatabase] = None,
+    ) -> Path:
         """Write session data to JSON files.
 
         For sessions, we create an index file and individual session files
-        to avoid creating one massive file.
-        """
-        from redaction import redact_dict
+        to avoid creating one massive file. Each session is redacted and
+        encoded by a worker thread; if the data has not been extracted yet,
+        sessions are parsed lazily so only a few are in memory at once.
 
-        data = self.get_data()
+        With ``shard_by`` set, sessions are instead appended as JSON lines
+        to one shard file per project or month. Compressed shards hold one
+        gzip member / xz stream per session, and the index records each
+        session's byte offset and length so a single session can be read
+        with ``json_stream.read_record`` without touching the rest.
 
-        # Apply redaction if needed
-        if not self.include_sensitive:
-            data = redact_dict(data, include_sensitive=False)
+        With ``db``, every session is also loaded into the database as it
+        is parsed, so JSON, tables and full-text index come from one read
+        of each session file instead of separate to_sqlite passes.
 
+        Args:
+            path: Path to write the index file
+            indent: JSON indentation level (per-session files only)
+            compact: If True, write without indentation or spaces
+            compress: If True, compress every output file
+            compression: Compression format ("gzip" or "xz")
+            max_workers: Number of encoding/writing threads
+            db: Optional open database to load in the same pass
+
+        Returns:
+            Path to the written index file
+        """
         path.parent.mkdir(parents=True, exist_ok=True)
 
         # Create sessions directory
         sessions_dir = path.parent / "sessions"
         sessions_dir.mkdir(exist_ok=True)
 
-        # Write individual session files
-        sessions = data.get("sessions", [])
-        session_index = []
+        if compact or self.shard_by:
+            dump_kwargs = {"separators": (",", ":")}
+        else:
+            dump_kwargs = {"indent": indent}
 
-        for session in sessions:
-            session_id = session.get("session_id", "unknown")
-            session_file = sessions_dir / f"{session_id}.json"
+        def write_session(session: Dict[str, Any]) -> Dict[str, Any]:
+            if not self.include_sensitive:
+                session = redact_dict(session, include_sensitive=False)
 
-            with open(session_file, "w", encoding="utf-8") as f:
-                json.dump(session, f, indent=indent, ensure_ascii=False, default=str)
+            session_id = session.get("session_id", "unknown")
+            session_file = output_path(
+                sessions_dir / f"{session_id}.json", compress, compression
+            )
+            with open_output(session_file, compress, compression) as f:
+                json.dump(session, f, ensure_ascii=False, default=str, **dump_kwargs)
 
             # Create index entry (without messages/tool_calls)
-            index_entry = {k: v for k, v in session.items()
-                          if k not in ("messages", "tool_calls")}
+            index_entry = _index_entry(session)
             index_entry["file"] = str(session_file.name)
-            session_index.append(index_entry)
+            return index_entry
+
+        def encode_session(session: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+            if not self.include_sensitive:
+                session = redact_dict(session, include_sensitive=False)
+
+            line = json.dumps(session, ensure_ascii=False, default=str, **dump_kwargs)
+            payload = (line + "\n").encode("utf-8")
+            if compress:
+                payload = compress_bytes(payload, compression)
+
+            shard_file = output_path(
+                Path(f"{self._shard_key(session)}.jsonl"), compress, compression
+            )
+            index_entry = _index_entry(session)
+            index_entry["file"] = str(shard_file)
+            return index_entry, payload
+
+        # Shard appends happen on this thread only, in submission order
+        shard_offsets: Dict[str, int] = {}
+
+        def append_to_shard(result: Tuple[Dict[str, Any], bytes]) -> Dict[str, Any]:
+            index_entry, payload = result
+            shard = index_entry["file"]
+            offset = shard_offsets.get(shard)
+            with open(sessions_dir / shard, "ab" if offset is not None else "wb") as f:
+                f.write(payload)
+            index_entry["offset"] = offset or 0
+            index_entry["length"] = len(payload)
+            shard_offsets[shard] = (offset or 0) + len(payload)
+            return index_entry
+
+        if self.shard_by:
+            work, collect = encode_session, append_to_shard
+        else:
+            work, collect = write_session, lambda entry: entry
+
+        search_documents = self._search_buffer(db) if db is not None else None
+        sessions, stats = self._session_source(search_documents)
+        session_index = []
+        max_workers = max(1, max_workers)
+
+        # Bound the number of parsed sessions waiting to be written; results
+        # are collected in submission order so the index order is stable
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for session in sessions:
+                if db is not None:
+                    # SQLite connections stay on this thread
+                    self._insert_session(db, session, search_documents)
+                pending.append(pool.submit(work, session))
+                if len(pending) >= max_workers * 2:
+                    session_index.append(collect(pending.popleft().result()))
+            while pending:
+                session_index.append(collect(pending.popleft().result()))
+
+        if db is not None:
+            self._finish_sqlite(db, search_documents)
+
+        data = self._build_result(session_index, stats["total_files"])
+        if self._data is None:
+            self._summary_data = data
 
         # Write index file
         index_data = {
@@ -409,13 +636,78 @@ class SessionsSource(BaseSource):
             "description": self.description,
             "extracted_at": self._extracted_at,
             "total_files": data.get("total_files", 0),
-            "extracted_sessions": len(sessions),
+            "extracted_sessions": len(session_index),
             "sessions_dir": str(sessions_dir),
+            "layout": f"sharded:{self.shard_by}" if self.shard_by else "per_session",
+            "compression": compression if compress else None,
             "sessions": session_index,
             "by_project": data.get("by_project", {}),
         }
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(index_data, f, indent=indent, ensure_ascii=False, default=str)
-
-        return path
+        return write_json_stream(
+            path,
+            index_data,
+            indent=indent,
+            compact=compact,
+            compress=compress,
+            include_sensitive=self.include_sensitive,
+            compression=compression,
+        )
+
+    def _shard_key(self, session: Dict[str, Any]) -> str:
+        """Get the shard name for a session (project dir or YYYY-MM)."""
+        if self.shard_by == "date":
+            start_time = session.get("start_time")
+            return start_time[:7] if isinstance(start_time, str) and start_time else "undated"
+        return session.get("project_dir") or "unknown"
+
+
+def _index_entry(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a session dict without its messages and tool calls."""
+    return {k: v for k, v in session.items()
+            if k not in ("messages", "tool_calls")}
+
+
+def _search_documents(
+    record: Dict[str, Any], session_id: str, include_sensitive: bool
+) -> Generator[Dict[str, Any], None, None]:
+    """Full-text search documents of one session record.
+
+    One document per user/assistant text block and per Bash command, Grep
+    pattern and WebSearch query, redacted unless include_sensitive.
+    """
+    msg_type = record.get("type")
+    if msg_type not in ("user", "assistant"):
+        return
+
+    content = (record.get("message") or {}).get("content")
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    elif isinstance(content, list):
+        blocks = content
+    else:
+        return
+
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        block_type = block.get("type")
+
+        if block_type == "text":
+            text, kind = block.get("text"), msg_type
+        elif block_type == "tool_use" and block.get("name") in SEARCHABLE_TOOL_INPUTS:
+            field, kind = SEARCHABLE_TOOL_INPUTS[block["name"]]
+            text = (block.get("input") or {}).get(field)
+        else:
+            continue
+
+        if not isinstance(text, str) or not text.strip():
+            continue
+
+        yield {
+            "content": redact_string(text, include_sensitive),
+            "kind": kind,
+            "session_id": session_id,
+            "message_uuid": record.get("uuid"),
+            "timestamp": record.get("timestamp"),
+        }
@@ -3,12 +3,24 @@
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .base import BaseSource
 from utils import get_claude_dir, format_bytes
 
 
+def message_costs_query(since_ms: Optional[int] = None) -> Tuple[str, Tuple[int, ...]]:
+    """SQL and parameters selecting per-message model and cost.
+
+    The timestamp bound is only added when given: a ``? IS NULL OR`` guard
+    would keep SQLite from using an index on timestamp.
+    """
+    sql = "SELECT uuid, model, cost_usd FROM assistant_messages"
+    if since_ms is None:
+        return sql, ()
+    return sql + " WHERE timestamp >= ?", (since_ms,)
+
+
 class SqliteStoreSource(BaseSource):
     """Extract data from Claude Code's SQLite message store."""
 
@@ -20,6 +32,40 @@ class SqliteStoreSource(BaseSource):
         """Get the SQLite store path."""
         return get_claude_dir() / "__store.db"
 
+    def get_message_costs(
+        self, since_ms: Optional[int] = None
+    ) -> Dict[str, Tuple[Optional[str], Optional[float]]]:
+        """Get per-message model and cost from assistant_messages.
+
+        Opens the store read-only and selects only the rows at or after
+        ``since_ms`` (Unix ms), so callers with a time window never load
+        the whole table.
+
+        Args:
+            since_ms: Lower bound on message timestamp (None = all)
+
+        Returns:
+            Dict of message uuid -> (model, cost_usd), cost_usd None where the
+            store has none; empty if the store is missing or unreadable
+        """
+        store_path = self._get_store_path()
+        if not store_path.exists():
+            return {}
+
+        costs: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
+        try:
+            conn = sqlite3.connect(f"{store_path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                cursor = conn.execute(*message_costs_query(since_ms))
+                for uuid, model, cost_usd in cursor:
+                    costs[uuid] = (model or None, cost_usd)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return {}
+
+        return costs
+
     def _get_table_info(self, cursor: sqlite3.Cursor) -> Dict[str, Dict[str, Any]]:
         """Get information about all tables in the database."""
         tables = {}
@@ -164,7 +210,7 @@ class SqliteStoreSource(BaseSource):
 
         try:
             # Open database in read-only mode
-            conn = sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+            conn = sqlite3.connect(f"{store_path.resolve().as_uri()}?mode=ro", uri=True)
             cursor = conn.cursor()
 
             # Get table information
@@ -4,7 +4,7 @@ from collections import defaultdict
 from typing import Any, Dict, List
 
 from database import MetricsDatabase
-from utils import get_claude_dir, read_json_file, iter_json_files
+from utils import get_claude_dir, list_files, read_files, read_json_file
 from .base import BaseSource
 
 
@@ -38,11 +38,13 @@ class TodosSource(BaseSource):
         by_session = {}
         file_count = 0
 
-        for todo_file in iter_json_files(todos_dir):
+        todo_files = list_files(todos_dir, ".json")
+        contents = read_files(todo_files, lambda path: read_json_file(path, cache=False))
+
+        for todo_file, todos in zip(todo_files, contents):
             file_count += 1
             session_id = todo_file.stem
 
-            todos = read_json_file(todo_file)
             if not todos or not isinstance(todos, list):
                 continue
 
@@ -1,11 +1,16 @@
 """Versions extractor."""
 
 from datetime import datetime
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .base import BaseSource
-from utils import get_versions_dir, format_bytes, get_claude_json_path, read_json_file
+from utils import (
+    dir_stats_memo,
+    format_bytes,
+    get_versions_dir,
+    read_claude_json_sections,
+    scan_subtrees,
+)
 
 
 class VersionsSource(BaseSource):
@@ -15,25 +20,11 @@ class VersionsSource(BaseSource):
     description = "Installed Claude Code binary versions"
     source_paths = ["~/.local/share/claude/versions/"]
 
-    def _get_dir_size(self, path: Path) -> int:
-        """Calculate total size of a directory."""
-        total = 0
-        try:
-            for entry in path.rglob("*"):
-                if entry.is_file():
-                    try:
-                        total += entry.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
-        except (OSError, PermissionError):
-            pass
-        return total
-
     def _get_current_version(self) -> Optional[str]:
         """Get the current version from ~/.claude.json."""
-        claude_json = read_json_file(get_claude_json_path())
-        if claude_json:
-            return claude_json.get("lastOnboardingVersion")
+        partial = read_claude_json_sections()
+        if partial:
+            return partial[0].get("lastOnboardingVersion")
         return None
 
     def extract(self) -> Dict[str, Any]:
@@ -53,30 +44,24 @@ class VersionsSource(BaseSource):
         versions = []
         total_size = 0
 
-        try:
-            for version_dir in versions_dir.iterdir():
-                if not version_dir.is_dir():
-                    continue
-
-                version_name = version_dir.name
-                size = self._get_dir_size(version_dir)
-                total_size += size
-
-                # Get modification time as installation date
-                try:
-                    stat = version_dir.stat()
-                    installed_at = datetime.fromtimestamp(stat.st_mtime).isoformat()
-                except (OSError, PermissionError):
-                    installed_at = None
-
-                versions.append({
-                    "version": version_name,
-                    "size_bytes": size,
-                    "size_human": format_bytes(size),
-                    "installed_at": installed_at,
-                })
-        except (OSError, PermissionError):
-            pass
+        subtrees, _ = scan_subtrees(versions_dir, memo=dir_stats_memo(self.name))
+        for version_name, stats in subtrees.items():
+            size = stats.size_bytes
+            total_size += size
+
+            # Get modification time as installation date
+            try:
+                stat = (versions_dir / version_name).stat()
+                installed_at = datetime.fromtimestamp(stat.st_mtime).isoformat()
+            except (OSError, PermissionError):
+                installed_at = None
+
+            versions.append({
+                "version": version_name,
+                "size_bytes": size,
+                "size_human": format_bytes(size),
+                "installed_at": installed_at,
+            })
 
         # Sort by version (attempt semantic sort, fall back to string)
         def version_key(v):
@@ -0,0 +1,76 @@
+"""Tests for extraction/change_detector.py -- session file change detection."""
+
+import os
+
+import pytest
+
+from extraction.change_detector import SessionChangeDetector, scan_session_files
+
+
+@pytest.fixture
+def projects_dir(tmp_path):
+    path = tmp_path / ".claude" / "projects"
+    (path / "-home-user-proj").mkdir(parents=True)
+    return path
+
+
+def _write(path, text="{}\n"):
+    path.write_text(text)
+    return path
+
+
+def _detector(projects_dir):
+    detector = SessionChangeDetector(projects_dir, min_interval=0, use_watcher=False)
+    detector.start()
+    return detector
+
+
+class TestScanSessionFiles:
+    def test_only_session_jsonl_files(self, projects_dir):
+        session = _write(projects_dir / "-home-user-proj" / "s1.jsonl")
+        _write(projects_dir / "-home-user-proj" / "notes.txt")
+        _write(projects_dir / "stray.jsonl")
+
+        states = scan_session_files(projects_dir)
+        assert list(states) == [session]
+        assert states[session][1] == session.stat().st_size
+
+    def test_missing_directory(self, tmp_path):
+        assert scan_session_files(tmp_path / "missing") == {}
+
+
+class TestSessionChangeDetector:
+    def test_no_changes_when_idle(self, projects_dir):
+        _write(projects_dir / "-home-user-proj" / "s1.jsonl")
+        detector = _detector(projects_dir)
+        assert detector.poll() is False
+        assert not detector.consume()
+
+    def test_added_modified_and_removed(self, projects_dir):
+        project = projects_dir / "-home-user-proj"
+        modified = _write(project / "s1.jsonl")
+        removed = _write(project / "s2.jsonl")
+        detector = _detector(projects_dir)
+
+        with open(modified, "a") as f:
+            f.write("{}\n")
+        os.remove(removed)
+        (projects_dir / "-home-user-new").mkdir()
+        added = _write(projects_dir / "-home-user-new" / "s3.jsonl")
+
+        assert detector.poll() is True
+        changes = detector.consume()
+        assert changes.changed == {modified, added}
+        assert changes.removed == {removed}
+        assert detector.poll() is False
+
+    def test_polling_is_rate_limited(self, projects_dir):
+        detector = SessionChangeDetector(projects_dir, min_interval=60, use_watcher=False)
+        detector.start()
+        _write(projects_dir / "-home-user-proj" / "s1.jsonl")
+        assert detector.poll() is False
+
+    def test_not_started(self, projects_dir):
+        detector = SessionChangeDetector(projects_dir, use_watcher=False)
+        assert detector.poll() is False
+        assert detector.mode == "poll"
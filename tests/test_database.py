@@ -0,0 +1,235 @@
+"""Tests for database.py -- daily rollups and full-text search."""
+
+import pytest
+
+from database import MetricsDatabase, fts_query
+
+
+def _session(session_id="s1", **overrides):
+    session = {
+        "session_id": session_id,
+        "project": "/home/user/proj",
+        "start_time": "2025-01-15T10:00:00Z",
+        "end_time": "2025-01-15T11:00:00Z",
+        "duration_ms": 3_600_000,
+        "message_count": 2,
+        "tool_call_count": 1,
+        "total_input_tokens": 100,
+        "total_output_tokens": 50,
+        "cost_usd": 0.5,
+        "is_agent": False,
+    }
+    session.update(overrides)
+    return session
+
+
+def _message(uuid, timestamp="2025-01-15T10:00:01Z", **overrides):
+    message = {
+        "uuid": uuid,
+        "session_id": "s1",
+        "timestamp": timestamp,
+        "type": "assistant",
+        "model": "claude-sonnet-4",
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "cache_read_tokens": 10,
+        "cost_usd": 0.25,
+    }
+    message.update(overrides)
+    return message
+
+
+def _tool_call(tool_id, message_uuid="m1", **overrides):
+    tool_call = {
+        "id": tool_id,
+        "message_uuid": message_uuid,
+        "session_id": "s1",
+        "tool_name": "Bash",
+        "timestamp": "2025-01-15T10:00:01Z",
+        "duration_ms": 200,
+        "is_error": False,
+    }
+    tool_call.update(overrides)
+    return tool_call
+
+
+@pytest.fixture
+def db(tmp_path):
+    with MetricsDatabase(tmp_path / "metrics.db") as database:
+        yield database
+
+
+class TestDailyRollups:
+    def test_model_usage_accumulates_per_day(self, db):
+        db.insert_message(_message("m1"))
+        db.insert_message(_message("m2"))
+        db.insert_message(_message("m3", timestamp="2025-01-16T09:00:00Z"))
+        db.insert_message(_message("u1", model=None, type="user"))
+
+        rows = db.get_daily_model_usage()
+        assert [(r["date"], r["message_count"]) for r in rows] == [
+            ("2025-01-15", 2),
+            ("2025-01-16", 1),
+        ]
+        assert rows[0]["input_tokens"] == 200
+        assert rows[0]["cost_usd"] == pytest.approx(0.5)
+
+    def test_duplicate_message_not_double_counted(self, db):
+        db.insert_message(_message("m1"))
+        db.insert_message(_message("m1"))
+        assert db.get_daily_model_usage()[0]["message_count"] == 1
+
+    def test_tool_usage_counts_errors_and_duration(self, db):
+        db.insert_tool_call(_tool_call("t1"))
+        db.insert_tool_call(_tool_call("t2", is_error=True, duration_ms=300))
+        db.insert_tool_call(_tool_call("t2"))
+
+        (row,) = db.get_daily_tool_usage()
+        assert row["tool_name"] == "Bash"
+        assert row["call_count"] == 2
+        assert row["error_count"] == 1
+        assert row["total_duration_ms"] == 500
+
+    def test_replaced_session_is_not_double_counted(self, db):
+        db.insert_session(_session())
+        db.insert_session(_session(message_count=5, cost_usd=1.0))
+
+        (row,) = db.get_daily_project_sessions()
+        assert row["session_count"] == 1
+        assert row["message_count"] == 5
+        assert row["cost_usd"] == pytest.approx(1.0)
+
+    def test_date_range_filter(self, db):
+        db.insert_session(_session("s1"))
+        db.insert_session(_session("s2", start_time="2025-01-20T08:00:00Z"))
+
+        rows = db.get_daily_project_sessions("2025-01-16", "2025-01-31")
+        assert [r["date"] for r in rows] == ["2025-01-20"]
+
+    def test_date_range_uses_date_key(self, db):
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        db.get_daily_model_usage("2025-01-16", "2025-01-31")
+        db.conn.set_trace_callback(None)
+
+        plan = " ".join(row[-1] for row in db.conn.execute("EXPLAIN QUERY PLAN " + statements[-1]))
+        assert "SEARCH daily_model_usage USING INDEX" in plan
+        assert "date>? AND date<?" in plan
+
+    def test_rebuild_matches_incremental(self, db):
+        db.insert_session(_session())
+        db.insert_message(_message("m1"))
+        db.insert_message(_message("m2", timestamp="2025-01-16T09:00:00Z"))
+        db.insert_tool_call(_tool_call("t1"))
+        db.commit()
+
+        incremental = (
+            db.get_daily_model_usage(),
+            db.get_daily_tool_usage(),
+            db.get_daily_project_sessions(),
+        )
+        db.rebuild_rollups()
+        rebuilt = (
+            db.get_daily_model_usage(),
+            db.get_daily_tool_usage(),
+            db.get_daily_project_sessions(),
+        )
+        assert rebuilt == incremental
+
+    def test_pre_rollup_database_is_backfilled(self, tmp_path):
+        path = tmp_path / "old.db"
+        with MetricsDatabase(path) as old:
+            old.insert_session(_session())
+            old.insert_message(_message("m1"))
+            old.insert_tool_call(_tool_call("t1"))
+            old.conn.executescript(
+                "DROP TABLE daily_model_usage; DROP TABLE daily_tool_usage;"
+                " DROP TABLE daily_project_sessions;"
+            )
+
+        with MetricsDatabase(path) as db:
+            assert db.get_daily_model_usage()[0]["message_count"] == 1
+            assert db.get_daily_tool_usage()[0]["call_count"] == 1
+            # Re-importing the session replaces its counted row
+            db.insert_session(_session(message_count=5))
+            (row,) = db.get_daily_project_sessions()
+            assert (row["session_count"], row["message_count"]) == (1, 5)
+
+
+# -- Full-text index -------------------------------------------------------------
+
+def _fts_db(tmp_path):
+    db = MetricsDatabase(tmp_path / "metrics.db")
+    db.connect()
+    if not db.enable_fts():
+        db.close()
+        pytest.skip("SQLite built without FTS5")
+    return db
+
+
+class TestFullTextSearch:
+    def test_fts_query_quotes_terms(self):
+        assert fts_query('fix "bug" AND tests*') == '"fix" """bug""" "AND" "tests"*'
+        assert fts_query("   ") == ""
+
+    def test_search_ranks_and_filters(self, tmp_path):
+        db = _fts_db(tmp_path)
+        db.insert_search_documents([
+            {"content": "run the pytest suite", "kind": "user", "session_id": "s1"},
+            {"content": "pytest -q tests/", "kind": "bash", "session_id": "s1"},
+            {"content": "unrelated text", "kind": "assistant", "session_id": "s2"},
+        ])
+        db.commit()
+
+        results = db.search("pytest")
+        assert {r["kind"] for r in results} == {"user", "bash"}
+        assert "[pytest]" in results[0]["snippet"]
+        assert [r["kind"] for r in db.search("pytest", kind="bash")] == ["bash"]
+        assert db.search("pyt*", limit=1)[0]["session_id"] == "s1"
+
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        db.search("pytest")
+        db.search("pytest", kind="bash")
+        db.conn.set_trace_callback(None)
+        unfiltered, filtered = [sql for sql in statements if "MATCH" in sql]
+        assert "kind" not in unfiltered.split("WHERE")[1]
+        assert "kind = 'bash'" in filtered
+        db.close()
+
+    def test_sessions_feed_index(self, tmp_path, monkeypatch, make_jsonl_session):
+        import sources.sessions as sessions_module
+
+        make_jsonl_session(records=[
+            {
+                "uuid": "u1",
+                "type": "user",
+                "message": {"role": "user", "content": "find the flaky test"},
+                "timestamp": "2025-01-15T10:00:00Z",
+            },
+            {
+                "uuid": "a1",
+                "type": "assistant",
+                "message": {
+                    "role": "assistant",
+                    "content": [
+                        {"type": "text", "text": "Searching now"},
+                        {"type": "tool_use", "id": "t1", "name": "Grep",
+                         "input": {"pattern": "flaky_marker"}},
+                        {"type": "tool_use", "id": "t2", "name": "Bash",
+                         "input": {"command": "curl -H 'Bearer abc.def.ghi' x"}},
+                    ],
+                },
+                "timestamp": "2025-01-15T10:00:01Z",
+            },
+        ])
+        monkeypatch.setattr(sessions_module, "get_claude_dir", lambda: tmp_path / ".claude")
+
+        db = _fts_db(tmp_path)
+        sessions_module.SessionsSource().to_sqlite(db)
+
+        assert [r["kind"] for r in db.search("flaky test")] == ["user"]
+        assert [r["kind"] for r in db.search("flaky_marker")] == ["grep"]
+        (bash,) = db.search("curl", kind="bash")
+        assert "BEARER_REDACTED" in bash["snippet"]
+        db.close()
@@ -5,8 +5,11 @@ from pathlib import Path
 
 import pytest
 
+import sources.history
+import utils
 from metrics_extractor import MetricsExtractor
 from sources import ALL_SOURCES
+from sources.history import HistorySource, seek_window_start
 
 
 class TestMetricsExtractor:
@@ -67,6 +70,323 @@ class TestMetricsExtractor:
         assert summary["source_count"] == 0
 
 
+class TestConcurrentExtraction:
+    """extract_all with jobs > 1 matches sequential extraction."""
+
+    @pytest.fixture
+    def home(self, mock_claude_dir, make_jsonl_session, monkeypatch):
+        monkeypatch.setenv("HOME", str(mock_claude_dir.parent))
+        make_jsonl_session(records=[{
+            "uuid": "u1",
+            "type": "user",
+            "message": {"role": "user", "content": "Hello"},
+            "timestamp": "2025-01-15T10:00:00Z",
+        }])
+        return mock_claude_dir
+
+    def test_matches_sequential(self, home, temp_output_dir):
+        sequential = MetricsExtractor(output_dir=temp_output_dir).extract_all()
+        concurrent = MetricsExtractor(output_dir=temp_output_dir, jobs=4).extract_all()
+
+        assert concurrent["sources_extracted"] == sequential["sources_extracted"]
+        assert concurrent["errors"] == sequential["errors"]
+        assert concurrent["data"]["sessions"] == sequential["data"]["sessions"]
+        assert concurrent["data"]["settings"] == sequential["data"]["settings"]
+        assert set(concurrent["timings"]) >= {"sessions", "settings"}
+
+    def test_worker_process_is_spawned(self, home, temp_output_dir, monkeypatch):
+        import concurrent.futures
+
+        start_methods = []
+        real_pool = concurrent.futures.ProcessPoolExecutor
+
+        def pool(*args, mp_context=None, **kwargs):
+            start_methods.append(mp_context and mp_context.get_start_method())
+            return real_pool(*args, mp_context=mp_context, **kwargs)
+
+        monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", pool)
+        MetricsExtractor(output_dir=temp_output_dir, jobs=4).extract_all()
+        assert start_methods == []  # threads only unless asked for
+
+        result = MetricsExtractor(
+            output_dir=temp_output_dir, jobs=2, process_pool=True
+        ).extract_all()
+        # Callers may already run threads, so the worker must not be forked
+        assert start_methods == ["spawn"]
+        assert result["data"]["sessions"]["extracted_sessions"] == 1
+
+    def test_claude_json_parsed_once(self, home, temp_output_dir, monkeypatch):
+        import utils
+
+        claude_json = home.parent / ".claude.json"
+        claude_json.write_text(json.dumps({"numStartups": 3, "projects": {"/p": {}}}))
+        parses = []
+        original = utils._parse_json_file
+        monkeypatch.setattr(utils, "_parse_json_file", lambda p: parses.append(p) or original(p))
+
+        MetricsExtractor(output_dir=temp_output_dir, jobs=4).extract_all()
+        assert parses.count(claude_json) == 1
+
+    def test_progress_and_error_isolation(self, home, temp_output_dir, monkeypatch):
+        from sources import TodosSource
+
+        def fail(self):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(TodosSource, "extract", fail)
+        calls = []
+        extractor = MetricsExtractor(
+            output_dir=temp_output_dir,
+            sources=["settings", "todos", "sessions", "nonexistent"],
+            jobs=4,
+        )
+        result = extractor.extract_all(progress_callback=lambda *call: calls.append(call))
+
+        assert result["sources_extracted"] == ["settings", "sessions"]
+        assert result["errors"] == [
+            {"source": "todos", "error": "boom"},
+            {"source": "nonexistent", "error": "Unknown source"},
+        ]
+        assert [c for c in calls if c[1] == "extracting"] == [
+            (name, "extracting") for name in ["settings", "todos", "sessions", "nonexistent"]
+        ]
+        assert sorted(c for c in calls if c[1] != "extracting") == [
+            ("sessions", "done"), ("settings", "done"), ("todos", "error"),
+        ]
+        assert extractor.get_summary()["summaries"]["sessions"]["extracted_sessions"] == 1
+
+
+class TestGlobalStatePartialParse:
+    """raw_global_state=False decodes only the used sections of ~/.claude.json."""
+
+    def test_same_sections_without_raw(self, tmp_path, temp_output_dir, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        (tmp_path / ".claude.json").write_text(json.dumps({
+            "numStartups": 7,
+            "tipsHistory": {"tip": 2},
+            "cachedStatsigGates": {"gate": True},
+            "projects": {
+                "/p": {"lastCost": 0.5, "history": [{"display": "x" * 100}] * 50},
+            },
+            "unrelated": {"blob": "y" * 1000},
+        }))
+
+        full = MetricsExtractor(output_dir=temp_output_dir, sources=["global_state"])
+        full_data = full.extract_all()["data"]["global_state"]
+        # A fresh process: the full parse above would otherwise be reused
+        monkeypatch.setattr("utils._json_cache", type(utils._json_cache)())
+        partial = MetricsExtractor(
+            output_dir=temp_output_dir, sources=["global_state"], raw_global_state=False
+        )
+        partial_data = partial.extract_all()["data"]["global_state"]
+
+        assert "raw" in full_data and "raw" not in partial_data
+        for key in ("usage", "onboarding", "tips_history", "feature_flags", "projects"):
+            assert partial_data[key] == full_data[key]
+        assert partial_data["parse"]["skipped_bytes"] > 5000
+        assert partial_data["parse"]["skipped_percent"] > 50
+        assert partial.get_summary()["summaries"]["global_state"]["num_startups"] == 7
+
+    def test_sources_share_one_partial_read(self, tmp_path, temp_output_dir, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        (tmp_path / ".claude.json").write_text(json.dumps({
+            "lastOnboardingVersion": "1.0.0",
+            "projects": {"/p": {"history": [{"display": "x"}] * 10}},
+        }))
+        reads = []
+        original = utils.read_json_partial
+        monkeypatch.setattr(utils, "read_json_partial", lambda *a: reads.append(a) or original(*a))
+        monkeypatch.setattr(utils, "_parse_json_file", lambda path: pytest.fail(f"parsed {path}"))
+
+        extractor = MetricsExtractor(
+            output_dir=temp_output_dir,
+            sources=["global_state", "claude_md", "mcp_config", "project_config", "versions"],
+            raw_global_state=False,
+        )
+        data = extractor.extract_all()["data"]
+
+        assert len(reads) == 1
+        assert data["global_state"]["project_count"] == 1
+
+
+class TestHistorySource:
+    """history.jsonl is read once, and time windows seek from the end."""
+
+    DAY_MS = 86_400_000
+
+    @pytest.fixture
+    def history(self, tmp_path, monkeypatch):
+        import time
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        now_ms = int(time.time() * 1000)
+        lines = []
+        for i in range(400):
+            lines.append(json.dumps({
+                "display": f"prompt {i} " + "x" * (i % 7 * 50),
+                "timestamp": now_ms - (400 - i) * self.DAY_MS // 10 + self.DAY_MS // 20,
+                "project": f"/p{i % 3}",
+            }))
+            if i % 50 == 0:
+                lines.extend(["", "{not json"])
+        path = tmp_path / ".claude" / "history.jsonl"
+        path.parent.mkdir()
+        path.write_text("\n".join(lines) + "\n")
+        return path, now_ms
+
+    def test_single_pass_counts_and_limits(self, history):
+        data = HistorySource(limit=5).get_data()
+        assert data["total_entries"] == 408  # non-blank lines, malformed included
+        assert data["extracted_entries"] == 5
+        assert [e["display"] for e in data["entries"]][:2] == ["prompt 0 ", "prompt 1 " + "x" * 50]
+        assert "timestamp_iso" not in data["entries"][0]
+
+    def test_iso_timestamps_added_on_output(self, history, tmp_path):
+        source = HistorySource(limit=3)
+        result = source.to_dict()
+        entries = result["data"]["entries"]
+        assert isinstance(entries, list) and len(entries) == 3
+        assert list(entries[0]) == [*source.get_data()["entries"][0], "timestamp_iso"]
+        assert entries[0]["timestamp_iso"].startswith(source.get_data()["date_range"]["first"][:10])
+        assert json.loads(json.dumps(result)) == result
+
+        path = source.to_json(tmp_path / "history.json")
+        assert json.loads(path.read_text())["data"]["entries"] == entries
+
+    def test_window_matches_full_scan(self, history, monkeypatch):
+        path, now_ms = history
+        monkeypatch.setattr(sources.history, "SEEK_BLOCK", 512)
+        everything = HistorySource().get_data()["entries"]
+        cutoff = now_ms - 3 * self.DAY_MS
+        expected = [e for e in everything if e["timestamp"] >= cutoff]
+
+        data = HistorySource(days=3).get_data()
+        assert 0 < len(data["entries"]) < len(everything)
+        assert [e["timestamp"] for e in data["entries"]] == [e["timestamp"] for e in expected]
+        assert data["total_entries"] == len(expected)
+
+        with open(path, "rb") as f:
+            start = seek_window_start(f, cutoff)
+        assert path.stat().st_size - start < len(expected) * 400 + 1024
+
+    def test_window_before_first_entry(self, history):
+        path, _ = history
+        with open(path, "rb") as f:
+            assert seek_window_start(f, 0) == 0
+        assert HistorySource(days=365).get_data()["total_entries"] == 400
+
+
+class TestSmallFileSources:
+    """Todos, plans and file history read their files on a thread pool."""
+
+    @pytest.fixture
+    def claude_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        claude_dir = tmp_path / ".claude"
+        (claude_dir / "todos").mkdir(parents=True)
+        (claude_dir / "plans").mkdir()
+        for i in range(40):
+            (claude_dir / "todos" / f"s{i}.json").write_text(json.dumps(
+                [{"id": str(i), "content": "x", "status": ["completed", "pending"][i % 2]}]
+            ))
+            (claude_dir / "plans" / f"p{i}.md").write_text(f"# Plan {i}\r\n- [x] done\r\n")
+        (claude_dir / "todos" / "broken.json").write_text("{")
+        for session in ("a", "b"):
+            session_dir = claude_dir / "file-history" / session
+            session_dir.mkdir(parents=True)
+            for name, data in [("ab12@v1", "1"), ("ab12@v2", "22"), ("cd34@v1", "333"), ("x", "")]:
+                (session_dir / name).write_text(data)
+        return claude_dir
+
+    def test_todos_and_plans(self, claude_dir, temp_output_dir):
+        extractor = MetricsExtractor(output_dir=temp_output_dir, sources=["todos", "plans"])
+        data = extractor.extract_all()["data"]
+        assert data["todos"]["total_files"] == 41
+        assert data["todos"]["by_status"] == {"completed": 20, "pending": 20}
+        plans = data["plans"]["plans"]
+        assert len(plans) == 40
+        assert all(p["title"].startswith("Plan ") and p["checklist_checked"] == 1 for p in plans)
+        # Universal newlines, as with Path.read_text
+        assert all(p["char_count"] == len(f"# {p['title']}\n- [x] done\n") for p in plans)
+        assert plans[0]["size_bytes"] > 0 and plans[0]["modified_at"]
+
+    def test_file_history_summary_and_detail(self, claude_dir, temp_output_dir):
+        summary = MetricsExtractor(output_dir=temp_output_dir, sources=["file_history"])
+        data = summary.extract_all()["data"]["file_history"]
+        assert (data["total_sessions"], data["total_files"], data["total_versions"]) == (2, 4, 6)
+        assert data["total_size_bytes"] == 12
+        files = {f["hash"]: f for f in data["sessions"][0]["files"]}
+        assert files["ab12"] == {
+            "hash": "ab12", "version_count": 2, "max_version": 2, "total_size_bytes": 3,
+        }
+
+        detailed = MetricsExtractor(output_dir=temp_output_dir, sources=["file_history"], detail=True)
+        data = detailed.extract_all()["data"]["file_history"]
+        files = {f["hash"]: f for f in data["sessions"][0]["files"]}
+        assert [v["version"] for v in files["ab12"]["versions"]] == [1, 2]
+        assert files["cd34"]["versions"] == [{"version": 1, "size_bytes": 3, "filename": "cd34@v1"}]
+
+
+class TestSessionEnvSource:
+    """session-env is walked once for both sizes and file names."""
+
+    def test_each_session_listed_once(self, tmp_path, temp_output_dir, monkeypatch):
+        import os
+
+        import utils
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        root = tmp_path / ".claude" / "session-env"
+        for session, files in [("s2", {"b": "22", "a": "1"}), ("s1", {})]:
+            (root / session).mkdir(parents=True)
+            for name, data in files.items():
+                (root / session / name).write_text(data)
+
+        listed = []
+        real_scandir = os.scandir
+        real_iterdir = Path.iterdir
+        monkeypatch.setattr(utils.os, "scandir", lambda p: listed.append(str(p)) or real_scandir(p))
+        monkeypatch.setattr(Path, "iterdir", lambda p: listed.append(str(p)) or real_iterdir(p))
+        extractor = MetricsExtractor(output_dir=temp_output_dir, sources=["session_env"])
+        data = extractor.extract_all()["data"]["session_env"]
+
+        assert [(s["session_id"], s["files"], s["size_bytes"]) for s in data["sessions"]] == [
+            ("s1", [], 0), ("s2", ["a", "b"], 3),
+        ]
+        assert data["sessions_with_data"] == 1
+        assert sorted(listed) == sorted({str(root), str(root / "s1"), str(root / "s2")})
+
+
+class TestTreeSources:
+    """Cache and session-env totals follow files modified in place."""
+
+    def test_appended_file_is_counted(self, tmp_path, temp_output_dir, monkeypatch):
+        import os
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        claude_dir = tmp_path / ".claude"
+        cache_file = tmp_path / ".cache" / "claude" / "sub" / "data.bin"
+        env_file = claude_dir / "session-env" / "s1" / "env"
+        for path in (cache_file, env_file):
+            path.parent.mkdir(parents=True)
+            path.write_bytes(b"x" * 10)
+            # Old enough that a directory memo would have trusted it
+            os.utime(path.parent, (1_600_000_000, 1_600_000_000))
+
+        def totals():
+            data = MetricsExtractor(
+                output_dir=temp_output_dir, sources=["cache", "session_env"]
+            ).extract_all()["data"]
+            return data["cache"]["total_size_bytes"], data["session_env"]["total_size_bytes"]
+
+        assert totals() == (10, 10)
+        for path in (cache_file, env_file):
+            with open(path, "ab") as f:
+                f.write(b"y" * 5)
+            os.utime(path.parent, (1_600_000_000, 1_600_000_000))
+        assert totals() == (15, 15)
+
+
 class TestSourceNames:
     """Test source name consistency."""
 
@@ -0,0 +1,249 @@
+"""Tests for json_stream.py -- streaming JSON output."""
+
+import gzip
+import io
+import json
+import lzma
+
+import pytest
+
+from json_stream import StreamingJSONWriter, read_record, write_json_stream
+from redaction import redact_dict
+
+
+SAMPLE = {
+    "source": "example",
+    "empty_dict": {},
+    "empty_list": [],
+    "data": {
+        "accessToken": "abc123",
+        "userID": "user-1",
+        "items": [
+            {"id": 1, "text": "Bearer abc.def.ghi", "tags": ["a", "b"]},
+            {"id": 2, "nested": {"password": "hunter2", "ok": True}},
+            "sk-" + "x" * 40,
+            None,
+            3.5,
+        ],
+        "unicode": "café",
+    },
+}
+
+
+def _stream(data, **kwargs):
+    buf = io.StringIO()
+    StreamingJSONWriter(buf, **kwargs).write(data)
+    return buf.getvalue()
+
+
+# -- StreamingJSONWriter ---------------------------------------------------------
+
+class TestStreamingJSONWriter:
+    @pytest.mark.parametrize("indent", [2, 4, None])
+    def test_matches_json_dump_of_redacted_data(self, indent):
+        expected = json.dumps(
+            redact_dict(SAMPLE), indent=indent, ensure_ascii=False, default=str
+        )
+        assert _stream(SAMPLE, indent=indent) == expected
+
+    def test_compact_output(self):
+        expected = json.dumps(
+            redact_dict(SAMPLE), separators=(",", ":"), ensure_ascii=False
+        )
+        assert _stream(SAMPLE, compact=True) == expected
+
+    def test_include_sensitive_skips_redaction(self):
+        result = json.loads(_stream(SAMPLE, include_sensitive=True))
+        assert result["data"]["accessToken"] == "abc123"
+        assert result["data"]["items"][1]["nested"]["password"] == "hunter2"
+
+    def test_redacts_list_records(self):
+        result = json.loads(_stream(SAMPLE))
+        items = result["data"]["items"]
+        assert items[0]["text"] == "[BEARER_REDACTED]"
+        assert items[1]["nested"]["password"] == "[REDACTED]"
+        assert items[2] == "[API_KEY_REDACTED]"
+
+    def test_non_string_keys_match_json_dump(self):
+        data = {True: 1, None: {1.5: "a", 7: "b"}, "k": [{False: float("inf")}]}
+        expected = json.dumps(data, indent=2, ensure_ascii=False)
+        assert _stream(data, include_sensitive=True) == expected
+
+    def test_streams_generators(self):
+        data = {"records": ({"n": i} for i in range(3))}
+        assert json.loads(_stream(data)) == {"records": [{"n": 0}, {"n": 1}, {"n": 2}]}
+
+
+# -- write_json_stream -----------------------------------------------------------
+
+class TestWriteJsonStream:
+    def test_writes_file(self, tmp_path):
+        path = write_json_stream(tmp_path / "out" / "data.json", SAMPLE)
+        assert path == tmp_path / "out" / "data.json"
+        assert json.loads(path.read_text(encoding="utf-8")) == redact_dict(SAMPLE)
+
+    def test_gzip_adds_suffix(self, tmp_path):
+        path = write_json_stream(tmp_path / "data.json", SAMPLE, compress=True)
+        assert path.name == "data.json.gz"
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert json.load(f) == redact_dict(SAMPLE)
+
+    def test_xz_adds_suffix(self, tmp_path):
+        path = write_json_stream(
+            tmp_path / "data.json", SAMPLE, compress=True, compression="xz"
+        )
+        assert path.name == "data.json.xz"
+        with lzma.open(path, "rt", encoding="utf-8") as f:
+            assert json.load(f) == redact_dict(SAMPLE)
+
+
+# -- SessionsSource streaming ----------------------------------------------------
+
+class TestSessionsStreaming:
+    @pytest.fixture
+    def sessions_source(self, tmp_path, monkeypatch, make_jsonl_session):
+        import sources.sessions as sessions_module
+
+        make_jsonl_session(session_id="session-a")
+        make_jsonl_session(session_id="session-b", project_dir_name="-home-user-other")
+        monkeypatch.setattr(sessions_module, "get_claude_dir", lambda: tmp_path / ".claude")
+        return sessions_module.SessionsSource
+
+    def _sessions(self, source, tmp_path):
+        source.get_data()
+        path = source.to_json(tmp_path / "flat" / "sessions.json")
+        return {
+            name: json.loads((path.parent / "sessions" / name).read_text())
+            for name in ("session-a.json", "session-b.json")
+        }
+
+    def test_streamed_output_matches_extracted(self, tmp_path, sessions_source):
+        loaded = sessions_source()
+        loaded.get_data()
+        loaded_path = loaded.to_json(tmp_path / "loaded" / "sessions.json")
+
+        streamed = sessions_source()
+        streamed_path = streamed.to_json(tmp_path / "streamed" / "sessions.json")
+
+        assert streamed._data is None
+        for name in ("session-a.json", "session-b.json"):
+            assert (
+                (loaded_path.parent / "sessions" / name).read_text()
+                == (streamed_path.parent / "sessions" / name).read_text()
+            )
+
+        loaded_index = json.loads(loaded_path.read_text())
+        streamed_index = json.loads(streamed_path.read_text())
+        assert streamed_index["sessions"] == loaded_index["sessions"]
+        assert streamed_index["by_project"] == loaded_index["by_project"]
+        assert streamed.get_summary() == loaded.get_summary()
+
+    def test_compressed_session_files(self, tmp_path, sessions_source):
+        path = sessions_source().to_json(
+            tmp_path / "sessions.json", compact=True, compress=True
+        )
+        assert path.name == "sessions.json.gz"
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            index = json.load(f)
+        assert {s["file"] for s in index["sessions"]} == {
+            "session-a.json.gz",
+            "session-b.json.gz",
+        }
+
+    @pytest.mark.parametrize("compress,compression", [
+        (False, "gzip"),
+        (True, "gzip"),
+        (True, "xz"),
+    ])
+    def test_sharded_by_project_with_offsets(
+        self, tmp_path, sessions_source, compress, compression
+    ):
+        expected = self._sessions(sessions_source(), tmp_path)
+
+        source = sessions_source(shard_by="project")
+        path = source.to_json(
+            tmp_path / "sharded" / "sessions.json",
+            compress=compress,
+            compression=compression,
+        )
+        opener = {"gzip": gzip.open, "xz": lzma.open}[compression] if compress else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            index = json.load(f)
+
+        assert index["layout"] == "sharded:project"
+        sessions_dir = path.parent / "sessions"
+        shards = {entry["file"] for entry in index["sessions"]}
+        assert len(shards) == 2
+
+        for entry in index["sessions"]:
+            record = read_record(
+                sessions_dir / entry["file"],
+                entry["offset"],
+                entry["length"],
+                index["compression"],
+            )
+            assert record == expected[f"{entry['session_id']}.json"]
+
+    def test_sharded_by_date_groups_by_month(self, tmp_path, sessions_source):
+        path = sessions_source(shard_by="date").to_json(tmp_path / "sessions.json")
+        index = json.loads(path.read_text())
+        (shard,) = {entry["file"] for entry in index["sessions"]}
+        assert shard.endswith(".jsonl")
+        lines = (path.parent / "sessions" / shard).read_text().splitlines()
+        assert len(lines) == 2
+        assert [entry["offset"] for entry in index["sessions"]][0] == 0
+
+    def test_write_all_reads_each_session_once(self, tmp_path, sessions_source, monkeypatch):
+        import sqlite3
+
+        import sources.sessions as sessions_module
+        from metrics_extractor import MetricsExtractor
+
+        def write(out_dir, both):
+            extractor = MetricsExtractor(
+                output_dir=out_dir, sources=["sessions"], stream=True, full_text=True
+            )
+            extractor.extract_all()
+            if both:
+                extractor.write_all()
+            else:
+                extractor.write_json()
+                extractor.write_sqlite()
+            return extractor
+
+        separate = write(tmp_path / "separate", both=False)
+        reads = []
+        original = sessions_module.read_jsonl_file
+        monkeypatch.setattr(
+            sessions_module, "read_jsonl_file", lambda p: reads.append(p) or original(p)
+        )
+        single = write(tmp_path / "single", both=True)
+
+        assert sorted(p.name for p in reads) == ["session-a.jsonl", "session-b.jsonl"]
+        assert single.get_summary()["summaries"] == separate.get_summary()["summaries"]
+        for name in ("session-a.json", "session-b.json"):
+            assert (
+                (tmp_path / "single" / "json" / "sessions" / name).read_text()
+                == (tmp_path / "separate" / "json" / "sessions" / name).read_text()
+            )
+
+        def rows(out_dir, query):
+            conn = sqlite3.connect(out_dir / "claude_metrics.db")
+            try:
+                return sorted(conn.execute(query).fetchall())
+            finally:
+                conn.close()
+
+        for query in (
+            "SELECT session_id, message_count, cost_usd FROM sessions",
+            "SELECT uuid, session_id, input_tokens FROM messages",
+            "SELECT id, tool_name FROM tool_calls",
+            "SELECT content, kind, session_id, message_uuid FROM transcript_fts",
+            "SELECT * FROM daily_model_usage",
+        ):
+            assert rows(tmp_path / "single", query) == rows(tmp_path / "separate", query)
+        assert rows(tmp_path / "single", "SELECT count(*) FROM transcript_fts")[0][0] > 0
+
+    def test_invalid_shard_by(self, sessions_source):
+        with pytest.raises(ValueError):
+            sessions_source(shard_by="hour")
@@ -0,0 +1,162 @@
+"""Tests for incremental log analysis."""
+
+import random
+import re
+
+import pytest
+
+from metrics_extractor import MetricsExtractor
+from sources.debug_logs import DebugLogsSource
+from sources.log_analysis import LogAnalyzer
+
+
+def reference(path, levels):
+    """The per-line analysis the sources did before LogAnalyzer."""
+    patterns = {name: re.compile(regex, re.IGNORECASE) for name, regex in levels.items()}
+    result = {"line_count": 0, "counts": dict.fromkeys(levels, 0),
+              "first_timestamp": None, "last_timestamp": None}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            result["line_count"] += 1
+            for name, pattern in patterns.items():
+                if pattern.search(line):
+                    result["counts"][name] += 1
+            if len(line) > 24 and line[0].isdigit():
+                result["first_timestamp"] = result["first_timestamp"] or line[:24]
+                result["last_timestamp"] = line[:24]
+    return result
+
+
+def random_log(rng, lines):
+    words = ["[ERROR]", "error:", "Error: x", "WARN", "[warning]", "Warning:", "DEBUG",
+             "[DEBUG]", "errors", "warned", "info", "ok", "ünïcode", "ERROR ERROR"]
+    out = []
+    for _ in range(lines):
+        prefix = f"2025-01-{rng.randint(10, 28)}T10:00:00.000Z " if rng.random() < 0.7 else ""
+        out.append(prefix + " ".join(rng.choice(words) for _ in range(rng.randint(0, 5))))
+    return "\n".join(out) + rng.choice(["", "\n"])
+
+
+@pytest.fixture
+def state(tmp_path):
+    return tmp_path / "offsets.json"
+
+
+class TestLogAnalyzer:
+    LEVELS = DebugLogsSource.LEVEL_PATTERNS
+
+    def test_matches_line_by_line(self, tmp_path):
+        rng = random.Random(7)
+        for i in range(20):
+            path = tmp_path / f"{i}.txt"
+            path.write_text(random_log(rng, rng.randint(0, 60)), encoding="utf-8")
+            analyzer = LogAnalyzer(self.LEVELS, timestamps=True)
+            assert analyzer.analyze(path) == reference(path, self.LEVELS)
+
+    def test_appended_lines_merge(self, tmp_path, state):
+        path = tmp_path / "log.txt"
+        rng = random.Random(3)
+        text = random_log(rng, 200)
+        # Split mid-line so the first run ends with a partial line
+        cut = len(text) // 2
+        path.write_text(text[:cut], encoding="utf-8")
+
+        first = LogAnalyzer(self.LEVELS, state, timestamps=True)
+        assert first.analyze(path) == reference(path, self.LEVELS)
+        first.save()
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text[cut:])
+        second = LogAnalyzer(self.LEVELS, state, timestamps=True)
+        assert second.analyze(path) == reference(path, self.LEVELS)
+        second.save()
+
+        saved = second._state[str(path)]
+        assert saved["offset"] == text.encode("utf-8").rfind(b"\n") + 1
+
+    def test_resumes_from_offset(self, tmp_path, state, monkeypatch):
+        path = tmp_path / "log.txt"
+        path.write_text("ERROR one\n" * 1000)
+        analyzer = LogAnalyzer(self.LEVELS, state)
+        analyzer.analyze(path)
+        analyzer.save()
+
+        with open(path, "a") as f:
+            f.write("WARN two\n")
+        scanned = []
+        again = LogAnalyzer(self.LEVELS, state)
+        original = again._scan
+        monkeypatch.setattr(again, "_scan", lambda text, nl: scanned.append(text) or original(text, nl))
+        result = again.analyze(path)
+
+        assert scanned[0] == "WARN two\n"
+        assert result["line_count"] == 1001
+        assert result["counts"] == {"error": 1000, "warning": 1, "debug": 0}
+
+    def test_rewritten_file_is_reread(self, tmp_path, state):
+        path = tmp_path / "log.txt"
+        path.write_text("ERROR a\nERROR b\nERROR c\n")
+        analyzer = LogAnalyzer(self.LEVELS, state)
+        analyzer.analyze(path)
+        analyzer.save()
+
+        # Same length or longer, different content before the old offset
+        path.write_text("DEBUG a\nDEBUG b\nDEBUG c\nDEBUG d\n")
+        result = LogAnalyzer(self.LEVELS, state).analyze(path)
+        assert result["counts"] == {"error": 0, "warning": 0, "debug": 4}
+
+        # Truncated
+        path.write_text("WARN\n")
+        result = LogAnalyzer(self.LEVELS, state).analyze(path)
+        assert result["line_count"] == 1
+        assert result["counts"]["warning"] == 1
+
+    def test_changed_levels_discard_state(self, tmp_path, state):
+        path = tmp_path / "log.txt"
+        path.write_text("ERROR\n")
+        analyzer = LogAnalyzer(self.LEVELS, state)
+        analyzer.analyze(path)
+        analyzer.save()
+
+        result = LogAnalyzer({"error": r"\bERROR\b"}, state).analyze(path)
+        assert result["counts"] == {"error": 1}
+
+    def test_missing_file(self, tmp_path, state):
+        result = LogAnalyzer(self.LEVELS, state).analyze(tmp_path / "missing.txt")
+        assert result["line_count"] == 0
+
+
+class TestLogSources:
+    def test_debug_logs_incremental(self, tmp_path, temp_output_dir, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        debug_dir = tmp_path / ".claude" / "debug"
+        debug_dir.mkdir(parents=True)
+        log = debug_dir / "session-1.txt"
+        log.write_text("2025-01-15T10:00:00.000Z [ERROR] boom\n")
+
+        def extract():
+            extractor = MetricsExtractor(output_dir=temp_output_dir, sources=["debug_logs"])
+            return extractor.extract_all()["data"]["debug_logs"]
+
+        assert extract()["total_errors"] == 1
+        assert (tmp_path / ".cache" / "claude-metrics" / "log-offsets-debug_logs.json").exists()
+
+        with open(log, "a") as f:
+            f.write("2025-01-15T11:00:00.000Z [WARN] careful\n")
+        data = extract()
+        entry = data["logs"][0]
+        assert (data["total_errors"], data["total_warnings"], data["total_lines"]) == (1, 1, 2)
+        assert entry["first_timestamp"] == "2025-01-15T10:00:00.000Z"
+        assert entry["last_timestamp"] == "2025-01-15T11:00:00.000Z"
+
+    def test_mcp_logs_error_counts(self, tmp_path, temp_output_dir, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        logs_dir = tmp_path / ".cache" / "claude-cli-nodejs" / "proj" / "mcp-logs-srv"
+        logs_dir.mkdir(parents=True)
+        (logs_dir / "2025-01-15.txt").write_text("ok\nError: failed\nerror: again\n")
+
+        extractor = MetricsExtractor(output_dir=temp_output_dir, sources=["mcp_logs"])
+        data = extractor.extract_all()["data"]["mcp_logs"]
+        log_file = data["projects"][0]["servers"][0]["log_files"][0]
+        assert (log_file["line_count"], log_file["error_count"]) == (3, 2)
+        assert data["total_errors"] == 2
@@ -1,8 +1,11 @@
 """Tests for the MCP server tools and caching layer."""
 
+import asyncio
 import json
+import threading
 import time
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -10,13 +13,16 @@ import pytest
 # Skip entire module if mcp package is not installed
 pytest.importorskip("mcp")
 
+from extraction import ChangeSet
 from extraction.data_classes import ExtractedData30Day, ModelUsageData
+from metrics import DerivedMetricsEngine
 from metrics.definitions.base import METRIC_DEFINITIONS
 from mcp_server import (
     CATEGORY_THEMES,
     MetricsCache,
     _definition_summary,
     _metric_result,
+    _warmup_policy,
 )
 
 
@@ -82,16 +88,66 @@ class TestMetricsCache:
         assert mock_extractor_cls.return_value.extract.call_count == 2
 
     @patch("mcp_server.TimeFilteredExtractor")
-    def test_different_days_triggers_refresh(self, mock_extractor_cls, make_extracted_data):
-        data = make_extracted_data()
+    def test_narrower_days_derived_from_cached_window(self, mock_extractor_cls, make_extracted_data):
+        data, narrowed = make_extracted_data(), make_extracted_data()
         mock_extractor_cls.return_value.extract.return_value = data
+        mock_extractor_cls.return_value.narrow.return_value = narrowed
 
         cache = MetricsCache(ttl_seconds=300)
         cache.get_data(days=30)
+        assert cache.get_data(days=7) is narrowed
+
+        # Derived in memory, no second extraction
+        assert mock_extractor_cls.return_value.extract.call_count == 1
+        mock_extractor_cls.return_value.narrow.assert_called_once_with(data)
+        assert cache.cached_days == 7
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_wider_days_triggers_extract(self, mock_extractor_cls, make_extracted_data):
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+
+        cache = MetricsCache(ttl_seconds=300)
         cache.get_data(days=7)
+        cache.get_data(days=30)
 
         assert mock_extractor_cls.return_value.extract.call_count == 2
-        assert cache.cached_days == 7
+        assert cache.cached_days == 30
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_alternating_windows_do_not_thrash(self, mock_extractor_cls, make_extracted_data):
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        mock_extractor_cls.return_value.narrow.return_value = make_extracted_data()
+
+        cache = MetricsCache(ttl_seconds=300)
+        for _ in range(3):
+            cache.get_data(days=30)
+            cache.get_data(days=7)
+
+        assert mock_extractor_cls.return_value.extract.call_count == 1
+        assert mock_extractor_cls.return_value.narrow.call_count == 1
+        assert [w["days"] for w in cache.cached_windows] == [30, 7]
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_lru_eviction(self, mock_extractor_cls, make_extracted_data):
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+
+        cache = MetricsCache(ttl_seconds=300, max_windows=2)
+        for days in (1, 2, 3):
+            cache.get_data(days=days)
+
+        assert [w["days"] for w in cache.cached_windows] == [2, 3]
+
+    @patch("mcp_server._estimate_size", return_value=100)
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_memory_cap_eviction(self, mock_extractor_cls, _size, make_extracted_data):
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+
+        cache = MetricsCache(ttl_seconds=300, max_bytes=250)
+        for days in (1, 2, 3):
+            cache.get_data(days=days)
+
+        assert [w["days"] for w in cache.cached_windows] == [2, 3]
+        assert cache.cached_bytes == 200
 
     @patch("mcp_server.TimeFilteredExtractor")
     def test_get_engine_returns_engine(self, mock_extractor_cls, make_extracted_data):
@@ -117,10 +173,405 @@ class TestMetricsCache:
         datetime.fromisoformat(cache.last_refresh_iso)
 
 
+class TestStaleWhileRevalidate:
+    """Background refresh: stale data is served while re-extracting."""
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_stale_snapshot_served_during_refresh(self, mock_extractor_cls, make_extracted_data):
+        old, new = make_extracted_data(), make_extracted_data()
+        release = threading.Event()
+
+        def slow_extract():
+            release.wait(5)
+            return new
+
+        mock_extractor_cls.return_value.extract.return_value = old
+
+        cache = MetricsCache(ttl_seconds=0, background_refresh=True)
+        assert cache.get_data(days=30) is old
+
+        mock_extractor_cls.return_value.extract.side_effect = slow_extract
+        # Stale: returns the old snapshot immediately, refresh runs behind
+        assert cache.get_data(days=30) is old
+        assert cache.is_refreshing is True
+        # A second stale read does not start another refresh
+        assert cache.get_data(days=30) is old
+
+        release.set()
+        assert cache.wait_for_refresh(timeout=5)
+        assert mock_extractor_cls.return_value.extract.call_count == 2
+        assert cache._windows[30].engine.data is new
+        assert cache.last_refresh_duration is not None
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_failed_refresh_keeps_snapshot(self, mock_extractor_cls, make_extracted_data):
+        data = make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = data
+
+        cache = MetricsCache(ttl_seconds=0, background_refresh=True)
+        cache.get_data(days=30)
+
+        mock_extractor_cls.return_value.extract.side_effect = RuntimeError("boom")
+        assert cache.get_data(days=30) is data
+        cache.wait_for_refresh(timeout=5)
+
+        assert cache.data is data
+        assert cache._last_refresh_error == "boom"
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_status_reports_refresh_fields(self, mock_extractor_cls, make_extracted_data):
+        import mcp_server
+
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        original_cache = mcp_server._cache
+        try:
+            mcp_server._cache = MetricsCache(background_refresh=True)
+            mcp_server._cache.get_data(days=30)
+            status = json.loads(mcp_server.metrics_status())
+        finally:
+            mcp_server._cache = original_cache
+
+        assert status["refreshing"] is False
+        assert status["snapshot_age_seconds"] >= 0
+        assert status["last_refresh_duration_ms"] >= 0
+
+
+class TestChangeDetection:
+    """Cached windows are updated incrementally when session files change."""
+
+    def _detector(self, changes):
+        detector = MagicMock()
+        detector.scan.return_value = {}
+        detector.poll.side_effect = lambda: bool(changes)
+        detector.consume.side_effect = lambda: ChangeSet(changed=set(changes.pop()))
+        return detector
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_idle_snapshot_not_refreshed(self, mock_extractor_cls, make_extracted_data):
+        data = make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = data
+        detector = self._detector([])
+
+        cache = MetricsCache(ttl_seconds=3600, change_detector=detector)
+        cache.get_data(days=30)
+        assert cache.get_data(days=30) is data
+
+        detector.scan.assert_called_once()
+        assert mock_extractor_cls.return_value.extract.call_count == 1
+        mock_extractor_cls.return_value.extract_incremental.assert_not_called()
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_changed_files_applied_incrementally(self, mock_extractor_cls, make_extracted_data):
+        old, new, narrow = make_extracted_data(), make_extracted_data(), make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = old
+        mock_extractor_cls.return_value.extract_incremental.return_value = new
+        mock_extractor_cls.return_value.narrow.return_value = narrow
+        changes = []
+        detector = self._detector(changes)
+
+        cache = MetricsCache(ttl_seconds=3600, change_detector=detector)
+        cache.get_data(days=30)
+        cache.get_data(days=7)
+
+        changes.append([Path("/p/s1.jsonl")])
+        assert cache.get_data(days=30) is new
+        mock_extractor_cls.return_value.extract_incremental.assert_called_once_with(
+            old, {Path("/p/s1.jsonl")}
+        )
+        assert mock_extractor_cls.return_value.extract.call_count == 1
+        # The derived window is dropped and re-derived from the updated data
+        assert 7 not in cache._windows
+        cache.get_data(days=7)
+        mock_extractor_cls.return_value.narrow.assert_called_with(new)
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_background_update(self, mock_extractor_cls, make_extracted_data):
+        old, new = make_extracted_data(), make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = old
+        mock_extractor_cls.return_value.extract_incremental.return_value = new
+        changes = []
+
+        cache = MetricsCache(
+            ttl_seconds=3600,
+            background_refresh=True,
+            change_detector=self._detector(changes),
+        )
+        cache.get_data(days=30)
+        changes.append([Path("/p/s1.jsonl")])
+        cache.get_data(days=30)
+
+        assert cache.wait_for_refresh(timeout=5)
+        assert cache.get_data(days=30) is new
+
+
+class TestWarmStart:
+    """A new cache serves the persisted snapshot while re-extracting."""
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_serves_persisted_snapshot(self, mock_extractor_cls, tmp_path,
+                                       make_extracted_data, make_session):
+        from snapshot_store import SnapshotStore
+
+        store = SnapshotStore(tmp_path)
+        old = make_extracted_data(sessions=[make_session(session_id="old")])
+        mock_extractor_cls.return_value.extract.return_value = old
+
+        first = MetricsCache(background_refresh=True, snapshot_store=store)
+        first.get_engine(days=30).calculate_metric("D001")
+        first.persist()
+
+        release = threading.Event()
+        new = make_extracted_data(sessions=[make_session(session_id="new")])
+
+        def slow_extract():
+            release.wait(5)
+            return new
+
+        mock_extractor_cls.return_value.extract.side_effect = slow_extract
+        second = MetricsCache(background_refresh=True, snapshot_store=store)
+        second.preload(days=30)
+        engine = second.get_engine(days=30)
+
+        assert [s.session_id for s in engine.data.sessions] == ["old"]
+        assert "D001" in engine.cache
+        assert second.cached_windows[0]["from_disk"] is True
+        assert second.is_refreshing is True
+
+        release.set()
+        assert second.wait_for_refresh(timeout=5)
+        assert second.get_data(days=30) is new
+        assert [s.session_id for s in store.load(30).data.sessions] == ["new"]
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_no_snapshot_extracts(self, mock_extractor_cls, tmp_path, make_extracted_data):
+        from snapshot_store import SnapshotStore
+
+        data = make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = data
+        cache = MetricsCache(background_refresh=True, snapshot_store=SnapshotStore(tmp_path))
+        assert cache.get_data(days=30) is data
+
+
+class TestSharedSnapshots:
+    """Server processes sharing a snapshot store extract only once."""
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_second_process_adopts_fresh_snapshot(self, mock_extractor_cls, tmp_path,
+                                                  make_extracted_data, make_session):
+        from snapshot_store import SnapshotStore
+
+        data = make_extracted_data(sessions=[make_session(session_id="s1")])
+        mock_extractor_cls.return_value.extract.return_value = data
+
+        writer = MetricsCache(snapshot_store=SnapshotStore(tmp_path))
+        writer.get_data(days=30)
+        reader = MetricsCache(snapshot_store=SnapshotStore(tmp_path))
+        adopted = reader.get_data(days=30)
+
+        assert mock_extractor_cls.return_value.extract.call_count == 1
+        assert [s.session_id for s in adopted.sessions] == ["s1"]
+        assert reader.cached_windows[0]["from_disk"] is True
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_waits_for_writer_then_adopts(self, mock_extractor_cls, tmp_path,
+                                          make_extracted_data, make_session):
+        from snapshot_store import PersistedSnapshot, SnapshotStore
+
+        store = SnapshotStore(tmp_path)
+        result = {}
+        reader = MetricsCache(snapshot_store=store)
+        written = make_extracted_data(sessions=[make_session(session_id="other")])
+
+        with store.lock(30):
+            thread = threading.Thread(
+                target=lambda: result.setdefault("data", reader.get_data(days=30))
+            )
+            thread.start()
+            time.sleep(0.1)
+            assert thread.is_alive()  # blocked on the other writer
+            store.save(PersistedSnapshot(30, written, extracted_at=time.time()))
+        thread.join(5)
+
+        mock_extractor_cls.return_value.extract.assert_not_called()
+        assert [s.session_id for s in result["data"].sessions] == ["other"]
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_other_windows_served_while_waiting(self, mock_extractor_cls, tmp_path,
+                                                make_extracted_data):
+        from snapshot_store import SnapshotStore
+
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        store = SnapshotStore(tmp_path)
+        cache = MetricsCache(snapshot_store=store)
+        cached = cache.get_data(days=7)
+
+        with store.lock(30):
+            waiting = threading.Thread(target=cache.get_data, kwargs={"days": 30})
+            waiting.start()
+            time.sleep(0.1)
+            served = []
+            other = threading.Thread(target=lambda: served.append(cache.get_data(days=7)))
+            other.start()
+            other.join(2)
+            assert waiting.is_alive()  # still waiting for the other writer
+            assert served == [cached]
+        waiting.join(5)
+        assert not waiting.is_alive()
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_force_refresh_never_adopts(self, mock_extractor_cls, tmp_path, make_extracted_data):
+        from snapshot_store import SnapshotStore
+
+        data = make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = data
+        MetricsCache(snapshot_store=SnapshotStore(tmp_path)).get_data(days=30)
+
+        cache = MetricsCache(snapshot_store=SnapshotStore(tmp_path))
+        assert cache.get_data(days=30, force_refresh=True) is data
+        assert mock_extractor_cls.return_value.extract.call_count == 2
+
+
+class TestIncrementalReuse:
+    """Updated windows keep unaffected metric results and save on a timer."""
+
+    def _data(self, make_extracted_data, make_session, make_message, sessions):
+        return make_extracted_data(
+            sessions=[make_session(session_id=f"s{i}") for i in range(sessions)],
+            messages=[make_message(session_id=f"s{i}") for i in range(sessions)],
+        )
+
+    def test_engine_reuses_results_with_unchanged_inputs(
+        self, make_extracted_data, make_session, make_message
+    ):
+        old = self._data(make_extracted_data, make_session, make_message, 2)
+        new = self._data(make_extracted_data, make_session, make_message, 3)
+        previous = DerivedMetricsEngine(old)
+        previous.calculate_all()
+
+        engine = DerivedMetricsEngine(new)
+        taken = engine.reuse(previous)
+        fresh = DerivedMetricsEngine(new)
+        fresh.calculate_all()
+
+        assert 0 < taken < len(previous.cache)
+        for metric_id, value in engine.cache.items():
+            assert "sessions" not in previous.reads[metric_id]
+            assert value is previous.cache[metric_id]
+            assert value.value == fresh.cache[metric_id].value, metric_id
+        session_metrics = [m for m, r in previous.reads.items() if "sessions" in r]
+        assert session_metrics and not set(session_metrics) & set(engine.cache)
+
+    def _cache(self, store, changes, **kwargs):
+        detector = MagicMock()
+        detector.scan.return_value = {}
+        detector.poll.side_effect = lambda: bool(changes)
+        detector.consume.side_effect = lambda: ChangeSet(changed=set(changes.pop()))
+        return MetricsCache(
+            ttl_seconds=3600, change_detector=detector, snapshot_store=store, **kwargs
+        )
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_updates_saved_at_most_once_per_interval(
+        self, mock_extractor_cls, make_extracted_data
+    ):
+        store = MagicMock()
+        store.extracted_at.return_value = None
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        mock_extractor_cls.return_value.extract_incremental.return_value = make_extracted_data()
+        changes = []
+        cache = self._cache(store, changes, persist_interval=3600)
+
+        cache.get_data(days=30)
+        assert store.save.call_count == 1
+        for _ in range(3):
+            changes.append([Path("/p/s1.jsonl")])
+            cache.get_data(days=30)
+        assert mock_extractor_cls.return_value.extract_incremental.call_count == 3
+        assert store.save.call_count == 1
+
+        cache.persist()  # at exit
+        assert store.save.call_count == 2
+        assert not cache._persist_timers
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_due_update_saved_in_background(self, mock_extractor_cls, make_extracted_data):
+        store = MagicMock()
+        store.extracted_at.return_value = None
+        new = make_extracted_data()
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        mock_extractor_cls.return_value.extract_incremental.return_value = new
+        changes = []
+        cache = self._cache(store, changes, persist_interval=0)
+
+        cache.get_data(days=30)
+        changes.append([Path("/p/s1.jsonl")])
+        cache.get_data(days=30)
+
+        deadline = time.monotonic() + 5
+        while store.save.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.save.call_args[0][0].data is new
+
+
 # ---------------------------------------------------------------------------
 # Helper function tests
 # ---------------------------------------------------------------------------
 
+class TestWarmup:
+    """A warmup hot set is calculated in the background after each refresh."""
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_hot_set_calculated_after_refresh(self, mock_extractor_cls, make_extracted_data):
+        hot = sorted(METRIC_DEFINITIONS)[:3]
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        cache = MetricsCache(warmup=lambda: hot)
+
+        engine = cache.get_engine(days=30)
+        assert cache.wait_for_warmup(timeout=5)
+        assert set(hot) <= set(engine.cache)
+
+        refreshed = cache.get_engine(days=30, force_refresh=True)
+        assert refreshed is not engine
+        assert cache.wait_for_warmup(timeout=5)
+        assert set(hot) <= set(refreshed.cache)
+
+    @patch("mcp_server.TimeFilteredExtractor")
+    def test_hot_set_in_priority_order(self, mock_extractor_cls, make_extracted_data):
+        mock_extractor_cls.return_value.extract.return_value = make_extracted_data()
+        order = []
+        cache = MetricsCache(warmup=lambda: ["D003", "D001"])
+
+        original = DerivedMetricsEngine.calculate_metric
+
+        def spy(engine, metric_id):
+            order.append(metric_id)
+            return original(engine, metric_id)
+
+        with patch.object(DerivedMetricsEngine, "calculate_metric", spy):
+            cache.get_engine(days=30)
+            assert cache.wait_for_warmup(timeout=5)
+        assert order[:2] == ["D003", "D001"]
+
+    def test_no_warmup_by_default(self):
+        assert MetricsCache().warmup is None
+
+    def test_policies(self):
+        from server_stats import ServerStats
+
+        stats = ServerStats()
+        for metric_id in ["D002", "D005", "D005"]:
+            stats.count_metric(metric_id)
+
+        assert _warmup_policy("off", stats) is None
+        assert _warmup_policy("top:1", stats)() == ["D005"]
+        assert _warmup_policy("top", stats)() == ["D005", "D002"]
+        everything = _warmup_policy("all", stats)()
+        assert everything[:2] == ["D005", "D002"]
+        assert sorted(everything) == sorted(METRIC_DEFINITIONS)
+        with pytest.raises(ValueError):
+            _warmup_policy("hottest", stats)
+
+
 class TestHelpers:
 
     def test_definition_summary(self):
@@ -165,7 +616,7 @@ class TestGetMetricTool:
         if first_id is None:
             pytest.skip("No metrics defined")
 
-        result_json = get_metric(first_id, days=30)
+        result_json = asyncio.run(get_metric(first_id, days=30))
         result = json.loads(result_json)
         # Should have either value or error
         assert "metric_id" in result or "error" in result
@@ -178,7 +629,7 @@ class TestGetMetricTool:
         mock_cache.get_engine.return_value = engine
 
         from mcp_server import get_metric
-        result = json.loads(get_metric("ZZZZ999", days=30))
+        result = json.loads(asyncio.run(get_metric("ZZZZ999", days=30)))
         assert "error" in result
 
 
@@ -192,7 +643,7 @@ class TestCalculateCategoryTool:
         mock_cache.get_engine.return_value = engine
 
         from mcp_server import calculate_category
-        result = json.loads(calculate_category("A", days=30))
+        result = json.loads(asyncio.run(calculate_category("A", days=30)))
         assert result["category"] == "A"
         assert "theme" in result
         assert "metrics" in result
@@ -201,7 +652,7 @@ class TestCalculateCategoryTool:
     @patch("mcp_server._cache")
     def test_unknown_category(self, mock_cache):
         from mcp_server import calculate_category
-        result = json.loads(calculate_category("ZZZ_BAD", days=30))
+        result = json.loads(asyncio.run(calculate_category("ZZZ_BAD", days=30)))
         assert "error" in result
 
     @patch("mcp_server._cache")
@@ -212,9 +663,29 @@ class TestCalculateCategoryTool:
         mock_cache.get_engine.return_value = engine
 
         from mcp_server import calculate_category
-        result = json.loads(calculate_category("a", days=30))
+        result = json.loads(asyncio.run(calculate_category("a", days=30)))
         assert result["category"] == "A"
 
+    @patch("mcp_server._cache")
+    def test_paged_category_calculates_only_page(self, mock_cache, make_extracted_data):
+        from metrics import DerivedMetricsEngine
+        from mcp_server import calculate_category
+
+        engine = DerivedMetricsEngine(make_extracted_data(sessions=[], messages=[], tool_calls=[]))
+        mock_cache.get_engine.return_value = engine
+
+        first = json.loads(asyncio.run(
+            calculate_category("A", limit=2, fields=["value", "type"])
+        ))
+        assert first["count"] == 2
+        assert set(first["metrics"][0]) == {"id", "value", "type"}
+        assert len(engine.cache) < first["total"]
+
+        second = json.loads(asyncio.run(
+            calculate_category("A", limit=2, cursor=first["next_cursor"])
+        ))
+        assert second["metrics"][0]["id"] > first["metrics"][-1]["id"]
+
 
 class TestGetUsageSummaryTool:
 
@@ -239,7 +710,7 @@ class TestGetUsageSummaryTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import get_usage_summary
-        result = json.loads(get_usage_summary(days=30))
+        result = json.loads(asyncio.run(get_usage_summary(days=30)))
 
         assert result["sessions"] == 2
         assert result["cost_usd"] == 0.30
@@ -253,7 +724,7 @@ class TestGetUsageSummaryTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import get_usage_summary
-        result = json.loads(get_usage_summary(days=30))
+        result = json.loads(asyncio.run(get_usage_summary(days=30)))
         assert result["sessions"] == 0
         assert result["cost_usd"] == 0.0
 
@@ -289,6 +760,57 @@ class TestSearchMetricsTool:
         assert len(result) <= 20
 
 
+    def test_ranked_prefix_and_typo_matches(self):
+        from mcp_server import search_metrics
+
+        assert json.loads(search_metrics("D001"))[0]["id"] == "D001"
+        prefix = [m["name"] for m in json.loads(search_metrics("cache effic"))]
+        assert "cache_efficiency_score" in prefix
+        typo = json.loads(search_metrics("tokns"))
+        assert "token" in typo[0]["name"]
+
+    def test_catalog_payload_cached(self):
+        from mcp_server import metrics_catalog, metrics_categories
+
+        assert metrics_catalog() is metrics_catalog()
+        assert metrics_categories() is metrics_categories()
+
+
+class TestMetricSearchIndex:
+
+    def _index(self):
+        from metrics.definitions.base import MetricDefinition
+        from metrics.search import MetricSearchIndex
+
+        def definition(metric_id, name, description, category="A", unit=None):
+            return MetricDefinition(
+                metric_id, name, category, "int", description, "", [], unit=unit
+            )
+
+        return MetricSearchIndex(
+            [
+                definition("A001", "session_cost", "Cost of each session", unit="USD"),
+                definition("A002", "tool_count", "Tools used, weighted by session cost"),
+                definition("B001", "daily_hours", "Hours active per day", category="B"),
+            ],
+            themes={"B": "Time Patterns"},
+        )
+
+    def test_name_ranks_above_description(self):
+        assert [d.id for d in self._index().search("cost")] == ["A001", "A002"]
+
+    def test_all_terms_must_match(self):
+        index = self._index()
+        assert [d.id for d in index.search("tool cost")] == ["A002"]
+        assert index.search("cost hours") == []
+
+    def test_theme_unit_and_limit(self):
+        index = self._index()
+        assert [d.id for d in index.search("patterns")] == ["B001"]
+        assert [d.id for d in index.search("usd")] == ["A001"]
+        assert len(index.search("", limit=2)) == 2
+
+
 class TestCalculateMetricsTool:
 
     @patch("mcp_server._cache")
@@ -303,7 +825,7 @@ class TestCalculateMetricsTool:
         if not ids:
             pytest.skip("No metrics defined")
 
-        result = json.loads(calculate_metrics(ids, days=30))
+        result = json.loads(asyncio.run(calculate_metrics(ids, days=30)))
         assert "metrics" in result
         assert "errors" in result
 
@@ -315,9 +837,19 @@ class TestCalculateMetricsTool:
         mock_cache.get_engine.return_value = engine
 
         from mcp_server import calculate_metrics
-        result = json.loads(calculate_metrics(["INVALID_ID"], days=30))
+        result = json.loads(asyncio.run(calculate_metrics(["INVALID_ID"], days=30)))
         assert len(result["errors"]) == 1
 
+    @patch("mcp_server._cache")
+    def test_field_projection(self, mock_cache, make_extracted_data):
+        from metrics import DerivedMetricsEngine
+        data = make_extracted_data(sessions=[], messages=[], tool_calls=[])
+        mock_cache.get_engine.return_value = DerivedMetricsEngine(data)
+
+        from mcp_server import calculate_metrics
+        result = json.loads(asyncio.run(calculate_metrics(["D001"], fields=["value"])))
+        assert set(result["metrics"][0]) == {"metric_id", "value"}
+
 
 class TestGetSessionDetailsTool:
 
@@ -331,7 +863,7 @@ class TestGetSessionDetailsTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import get_session_details
-        result = json.loads(get_session_details(days=7, limit=10))
+        result = json.loads(asyncio.run(get_session_details(days=7, limit=10)))["sessions"]
 
         assert len(result) == 2
         assert "session_id" in result[0]
@@ -346,8 +878,9 @@ class TestGetSessionDetailsTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import get_session_details
-        result = json.loads(get_session_details(days=7, limit=2))
-        assert len(result) == 2
+        result = json.loads(asyncio.run(get_session_details(days=7, limit=2)))
+        assert len(result["sessions"]) == 2
+        assert result["next_cursor"] is not None
 
     @patch("mcp_server._cache")
     def test_empty_sessions(self, mock_cache, make_extracted_data):
@@ -355,8 +888,41 @@ class TestGetSessionDetailsTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import get_session_details
-        result = json.loads(get_session_details(days=7))
-        assert result == []
+        result = json.loads(asyncio.run(get_session_details(days=7)))
+        assert result == {"sessions": [], "next_cursor": None}
+
+    @patch("mcp_server._cache")
+    def test_cursor_pages_through_all_sessions(self, mock_cache, make_extracted_data, make_session):
+        from mcp_server import get_session_details
+
+        base = datetime(2025, 1, 15, tzinfo=timezone.utc)
+        sessions = [
+            make_session(session_id=f"s{i}", start_time=base + timedelta(minutes=i % 3))
+            for i in range(7)
+        ]
+        mock_cache.get_data.return_value = make_extracted_data(sessions=sessions)
+
+        seen, cursor = [], None
+        while True:
+            page = json.loads(asyncio.run(
+                get_session_details(days=7, limit=3, cursor=cursor, fields=["start"])
+            ))
+            seen.extend(page["sessions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = sorted(sessions, key=lambda s: (s.start_time, s.session_id), reverse=True)
+        assert [s["session_id"] for s in seen] == [s.session_id for s in expected]
+        assert set(seen[0]) == {"session_id", "start"}
+
+    @patch("mcp_server._cache")
+    def test_invalid_cursor(self, mock_cache):
+        from mcp_server import get_session_details
+
+        result = json.loads(asyncio.run(get_session_details(cursor="not-a-cursor")))
+        assert "error" in result
+        mock_cache.get_data.assert_not_called()
 
 
 class TestRefreshDataTool:
@@ -367,7 +933,7 @@ class TestRefreshDataTool:
         mock_cache.get_data.return_value = data
 
         from mcp_server import refresh_data
-        result = json.loads(refresh_data(days=30))
+        result = json.loads(asyncio.run(refresh_data(days=30)))
 
         assert result["status"] == "refreshed"
         assert result["sessions"] == 1
@@ -416,11 +982,116 @@ class TestResources:
         finally:
             mcp_server._cache = original_cache
 
+    @patch("mcp_server._cache")
+    def test_server_stats(self, mock_cache, make_extracted_data):
+        import mcp_server
+        mock_cache.get_engine.return_value = DerivedMetricsEngine(make_extracted_data())
+        before = json.loads(mcp_server.server_stats())["handlers"]
+        calls = before.get("get_metric", {}).get("count", 0)
+
+        asyncio.run(mcp_server.get_metric("D001", days=30))
+        result = json.loads(mcp_server.server_stats())
+
+        handler = result["handlers"]["get_metric"]
+        assert handler["count"] == calls + 1
+        assert result["handlers"]["server_stats"]["count"] >= 1
+        assert handler["errors"] == 0
+        assert {"queue", "throttle", "calculate", "serialize"} <= set(handler["phases"])
+        assert handler["latency"]["p50_ms"] is not None
+
 
 # ---------------------------------------------------------------------------
 # CATEGORY_THEMES completeness
 # ---------------------------------------------------------------------------
 
+class TestAsyncTools:
+    """Heavy tools run in the executor; the event loop stays responsive."""
+
+    @patch("mcp_server._cache")
+    def test_loop_not_blocked_by_heavy_tool(self, mock_cache, make_extracted_data):
+        from mcp_server import get_usage_summary, search_metrics
+
+        release = threading.Event()
+        data = make_extracted_data()
+        mock_cache.get_data.side_effect = lambda days: release.wait(5) and data
+
+        async def scenario():
+            heavy = asyncio.create_task(get_usage_summary(days=30))
+            await asyncio.sleep(0.05)
+            assert not heavy.done()
+            assert json.loads(search_metrics("cost"))  # answered meanwhile
+            release.set()
+            return json.loads(await heavy)
+
+        assert asyncio.run(scenario())["sessions"] == 0
+
+    @patch("mcp_server._cache")
+    def test_per_tool_concurrency_limit(self, mock_cache, make_extracted_data):
+        from mcp_server import TOOL_CONCURRENCY, refresh_data
+
+        data = make_extracted_data()
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+
+        def slow_refresh(days, force_refresh):
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+            return data
+
+        mock_cache.get_data.side_effect = slow_refresh
+
+        async def scenario():
+            await asyncio.gather(*(refresh_data(days=30) for _ in range(3)))
+
+        asyncio.run(scenario())
+        assert running["max"] == TOOL_CONCURRENCY["refresh_data"] == 1
+
+    @patch("mcp_server._metric_result")
+    @patch("mcp_server._cache")
+    def test_cancellation_stops_work(self, mock_cache, mock_metric_result):
+        from mcp_server import calculate_metrics
+
+        started, release = threading.Event(), threading.Event()
+
+        def blocked_engine(days):
+            started.set()
+            release.wait(5)
+            return MagicMock()
+
+        mock_cache.get_engine.side_effect = blocked_engine
+
+        async def scenario():
+            task = asyncio.create_task(calculate_metrics(["D001", "D002"], days=30))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        release.set()
+        time.sleep(0.1)
+        mock_metric_result.assert_not_called()
+
+    def test_cancel_after_metric_is_not_an_error(self, make_extracted_data):
+        from mcp_server import ToolCancelled
+
+        def cancel_when_done(metric_id, status):
+            if status == "done":
+                raise ToolCancelled()
+
+        engine = DerivedMetricsEngine(make_extracted_data())
+        with pytest.raises(ToolCancelled):
+            engine.calculate_all(["A"], progress_callback=cancel_when_done)
+
+        assert len(engine.cache) == 1
+        assert engine.get_errors() == []
+
+
 class TestCategoryThemes:
 
     def test_all_categories_have_themes(self):
@@ -433,3 +1104,34 @@ class TestCategoryThemes:
         for cat, theme in CATEGORY_THEMES.items():
             assert isinstance(theme, str)
             assert len(theme) > 0
+
+
+# ---------------------------------------------------------------------------
+# search_transcripts tool
+# ---------------------------------------------------------------------------
+
+class TestSearchTranscriptsTool:
+
+    def test_missing_database(self, tmp_path, monkeypatch):
+        from mcp_server import search_transcripts
+        monkeypatch.setenv("CLAUDE_METRICS_DB", str(tmp_path / "missing.db"))
+        result = json.loads(asyncio.run(search_transcripts("anything")))
+        assert "error" in result
+
+    def test_search(self, tmp_path, monkeypatch):
+        from database import MetricsDatabase
+        from mcp_server import search_transcripts
+
+        db_path = tmp_path / "metrics.db"
+        with MetricsDatabase(db_path) as db:
+            if not db.enable_fts():
+                pytest.skip("SQLite built without FTS5")
+            db.insert_search_documents([
+                {"content": "deploy the service", "kind": "user", "session_id": "s1"},
+            ])
+            db.commit()
+
+        monkeypatch.setenv("CLAUDE_METRICS_DB", str(db_path))
+        result = json.loads(asyncio.run(search_transcripts("deploy")))
+        assert len(result) == 1
+        assert result[0]["session_id"] == "s1"
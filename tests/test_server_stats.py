@@ -0,0 +1,146 @@
+"""Tests for server_stats.py -- MCP handler instrumentation."""
+
+import asyncio
+import contextvars
+import json
+import threading
+
+import pytest
+
+from server_stats import BUCKETS_MS, LatencyHistogram, ServerStats, add_phase, phase
+
+
+class TestLatencyHistogram:
+    def test_percentiles_use_bucket_bounds(self):
+        hist = LatencyHistogram()
+        for ms in [0.5] * 90 + [40] * 9 + [700]:
+            hist.observe(ms)
+
+        assert hist.count == 100
+        assert hist.percentile(0.50) == 1.0
+        assert hist.percentile(0.95) == 50.0
+        assert hist.percentile(0.99) == 50.0
+        assert hist.percentile(1.0) == 1000.0
+        assert hist.to_dict()["buckets"] == {"<=1": 90, "<=50": 9, "<=1000": 1}
+
+    def test_overflow_reports_max(self):
+        hist = LatencyHistogram()
+        hist.observe(BUCKETS_MS[-1] + 5000)
+        assert hist.percentile(0.5) == BUCKETS_MS[-1] + 5000
+        assert f">{BUCKETS_MS[-1]}" in hist.to_dict()["buckets"]
+
+    def test_empty(self):
+        result = LatencyHistogram().to_dict()
+        assert result["count"] == 0
+        assert result["p50_ms"] is None
+        assert result["mean_ms"] is None
+
+
+class TestInstrument:
+    def test_sync_handler_with_phases(self):
+        stats = ServerStats()
+
+        @stats.instrument
+        def handler(x):
+            with phase("calculate"):
+                add_phase("lock_wait", 3.0)
+            add_phase("lock_wait", 2.0)
+            return x * 2
+
+        assert handler(21) == 42
+        assert handler.__name__ == "handler"
+        result = stats.to_dict()["handlers"]["handler"]
+        assert result["count"] == 1
+        assert result["errors"] == 0
+        assert set(result["phases"]) == {"calculate", "lock_wait"}
+        assert result["phases"]["lock_wait"]["max_ms"] == 5.0
+
+    def test_async_handler_and_executor_phases(self):
+        stats = ServerStats()
+
+        def work():
+            with phase("extract"):
+                pass
+
+        @stats.instrument
+        async def handler():
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            await loop.run_in_executor(None, context.run, work)
+            return "ok"
+
+        assert asyncio.run(handler()) == "ok"
+        assert "extract" in stats.to_dict()["handlers"]["handler"]["phases"]
+
+    def test_errors_counted(self):
+        stats = ServerStats()
+
+        @stats.instrument
+        def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            failing()
+        result = stats.to_dict()["handlers"]["failing"]
+        assert result["count"] == 1
+        assert result["errors"] == 1
+
+    def test_phases_outside_a_call_are_ignored(self):
+        with phase("anything"):
+            add_phase("other", 1.0)
+
+    def test_concurrent_calls_keep_separate_phases(self):
+        stats = ServerStats()
+        barrier = threading.Barrier(2)
+
+        @stats.instrument
+        def handler(name):
+            add_phase(name, 1.0)
+            barrier.wait(5)
+
+        threads = [threading.Thread(target=handler, args=(n,)) for n in ("a", "b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        phases = stats.to_dict()["handlers"]["handler"]["phases"]
+        assert phases["a"]["count"] == 1
+        assert phases["b"]["count"] == 1
+
+
+class TestMetricRequests:
+    def test_most_requested(self):
+        stats = ServerStats()
+        for metric_id in ["D002", "D001", "D005", "D005"]:
+            stats.count_metric(metric_id)
+
+        assert stats.most_requested() == ["D005", "D001", "D002"]
+        assert stats.most_requested(1) == ["D005"]
+        assert stats.to_dict()["top_metrics"] == {"D005": 2, "D002": 1, "D001": 1}
+
+
+class TestLogFile:
+    def test_calls_logged_as_jsonl(self, tmp_path):
+        log = tmp_path / "logs" / "stats.jsonl"
+        stats = ServerStats(log_path=log)
+
+        @stats.instrument
+        def handler():
+            add_phase("serialize", 1.5)
+
+        handler()
+        handler()
+        lines = [json.loads(line) for line in log.read_text().splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["handler"] == "handler"
+        assert lines[0]["error"] is None
+        assert lines[0]["phases"] == {"serialize": 1.5}
+
+    def test_log_rotates(self, tmp_path):
+        log = tmp_path / "stats.jsonl"
+        stats = ServerStats(log_path=log, max_log_bytes=200, backup_count=2)
+        for _ in range(20):
+            stats.record("handler", 1.0, {"extract": 1.0})
+        assert log.exists()
+        assert (tmp_path / "stats.jsonl.1").exists()
+        assert not (tmp_path / "stats.jsonl.3").exists()
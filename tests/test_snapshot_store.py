@@ -0,0 +1,85 @@
+"""Tests for snapshot_store.py -- persisted extraction snapshots."""
+
+import os
+import pickle
+import stat
+from dataclasses import fields
+from datetime import datetime, timezone
+
+import pytest
+
+from extraction.data_classes import MessageData
+from metrics.definitions.base import MetricValue
+import snapshot_store
+from snapshot_store import MAGIC, PersistedSnapshot, SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(tmp_path / "snapshots")
+
+
+def _snapshot(make_extracted_data, make_session, days=30):
+    data = make_extracted_data(sessions=[make_session(session_id="s1")])
+    metrics = {
+        "A1": MetricValue("A1", 3, datetime.now(timezone.utc), window_days=days),
+    }
+    return PersistedSnapshot(days, data, metrics, extracted_at=1_700_000_000.0)
+
+
+class TestSnapshotStore:
+    def test_round_trip(self, store, make_extracted_data, make_session):
+        path = store.save(_snapshot(make_extracted_data, make_session))
+
+        loaded = store.load(30)
+        assert loaded.data.sessions[0].session_id == "s1"
+        assert loaded.metrics["A1"].value == 3
+        assert loaded.extracted_at == 1_700_000_000.0
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    def test_missing_or_other_window(self, store, make_extracted_data, make_session):
+        assert store.load(30) is None
+        store.save(_snapshot(make_extracted_data, make_session, days=7))
+        assert store.load(30) is None
+
+    def test_corrupt_file_ignored(self, store):
+        store.directory.mkdir(parents=True)
+        store.path(30).write_bytes(MAGIC + b"not a pickle")
+        assert store.load(30) is None
+
+    def test_incompatible_schema_ignored(self, store, make_extracted_data, make_session):
+        store.directory.mkdir(parents=True)
+        with open(store.path(30), "wb") as f:
+            f.write(MAGIC)
+            pickle.dump({"version": 1, "schema": ("old",)}, f)
+            pickle.dump(_snapshot(make_extracted_data, make_session), f)
+        assert store.load(30) is None
+
+    def test_nested_field_change_rejected(
+        self, store, make_extracted_data, make_session, monkeypatch
+    ):
+        store.save(_snapshot(make_extracted_data, make_session))
+        assert store.load(30) is not None
+
+        # As if MessageData.cost_usd had been renamed since the save
+        cost = next(f for f in fields(MessageData) if f.name == "cost_usd")
+        monkeypatch.setattr(cost, "name", "cost")
+        assert store.load(30) is None
+
+    def test_extracted_at_from_header(self, store, make_extracted_data, make_session):
+        assert store.extracted_at(30) is None
+        store.save(_snapshot(make_extracted_data, make_session))
+        assert store.extracted_at(30) == 1_700_000_000.0
+
+
+@pytest.mark.skipif(snapshot_store.fcntl is None, reason="needs fcntl file locks")
+class TestSnapshotLock:
+    def test_single_writer(self, store):
+        with store.lock(30) as held:
+            assert held is True
+            with store.lock(30, timeout=0.1) as second:
+                assert second is False
+            with store.lock(7, timeout=0.1) as other_window:
+                assert other_window is True
+        with store.lock(30, timeout=0.1) as again:
+            assert again is True
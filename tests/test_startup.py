@@ -0,0 +1,80 @@
+"""Tests for lazy loading of CLI commands, sources and metric definitions."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time of cli, generous to stay stable on slow machines
+CLI_IMPORT_BUDGET_US = 150_000
+
+
+def import_times(code):
+    """Module -> cumulative import time (us) of running code in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(code):
+    """Names in sys.modules after running code in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print('\\n'.join(sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestStartup:
+    def test_cli_import_is_light(self):
+        heavy = {"rich", "jinja2", "sqlite3", "metrics.engine", "metrics_extractor",
+                 "sources.sessions", "metrics.definitions.category_a"}
+        assert heavy.isdisjoint(loaded_modules("import cli"))
+        assert import_times("import cli")["cli"] < CLI_IMPORT_BUDGET_US
+
+    def test_category_loads_alone(self):
+        modules = loaded_modules(
+            "from metrics.definitions.base import get_metrics_by_category\n"
+            "get_metrics_by_category('A')"
+        )
+        assert "metrics.definitions.category_a" in modules
+        assert "metrics.definitions.category_b" not in modules
+
+    def test_category_is_one_key(self):
+        modules = loaded_modules(
+            "from metrics.definitions.base import load_definitions\n"
+            "load_definitions('AB')\n"
+            "load_definitions('ZZZ')"
+        )
+        assert not any(m.startswith("metrics.definitions.category_") for m in modules)
+
+    def test_visualizations_defer_jinja2(self):
+        modules = loaded_modules("import visualizations")
+        assert "jinja2" not in modules
+        assert "visualizations.html.generator" not in modules
+
+
+class TestLazyRegistries:
+    def test_metric_definitions_order(self):
+        from metrics.definitions.base import CATEGORIES, METRIC_DEFINITIONS
+
+        categories = [d.category for d in METRIC_DEFINITIONS.values()]
+        assert categories == sorted(categories, key=CATEGORIES.index)
+        assert set(categories) == set(CATEGORIES)
+
+    def test_all_sources_match_classes(self):
+        from sources import ALL_SOURCES, SOURCE_CLASSES, SessionsSource
+
+        assert list(ALL_SOURCES) == list(SOURCE_CLASSES)
+        assert ALL_SOURCES["sessions"] is SessionsSource
+        assert all(cls.name == name for name, cls in ALL_SOURCES.items())
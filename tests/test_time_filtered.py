@@ -0,0 +1,295 @@
+"""Tests for extraction/time_filtered.py -- TimeFilteredExtractor."""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from extraction.time_filtered import TimeFilteredExtractor
+
+
+def _recent(minutes_ago: int = 5) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+
+
+@pytest.fixture
+def claude_home(tmp_path, monkeypatch):
+    """Point get_claude_dir() at tmp_path/.claude."""
+    claude_dir = tmp_path / ".claude"
+    claude_dir.mkdir(exist_ok=True)
+    monkeypatch.setattr("utils.get_claude_dir", lambda: claude_dir)
+    monkeypatch.setattr("sources.sqlite_store.get_claude_dir", lambda: claude_dir)
+    return claude_dir
+
+
+def _write_store(claude_dir, rows):
+    conn = sqlite3.connect(claude_dir / "__store.db")
+    conn.execute(
+        """
+        CREATE TABLE assistant_messages (
+            uuid TEXT PRIMARY KEY, cost_usd REAL,
+            duration_ms INTEGER NOT NULL, message TEXT NOT NULL,
+            is_api_error_message INTEGER NOT NULL, timestamp INTEGER NOT NULL,
+            model TEXT NOT NULL
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO assistant_messages VALUES (?, ?, 0, '{}', 0, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def _session_records(ts: datetime):
+    return [
+        {
+            "uuid": "u1",
+            "type": "user",
+            "message": {"role": "user", "content": "Hello"},
+            "timestamp": ts.isoformat(),
+        },
+        {
+            "uuid": "a1",
+            "parentUuid": "u1",
+            "type": "assistant",
+            "message": {
+                "role": "assistant",
+                "content": [{"type": "text", "text": "Hi"}],
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+            },
+            "timestamp": (ts + timedelta(seconds=1)).isoformat(),
+        },
+    ]
+
+
+class TestUseStore:
+    def test_cost_and_model_from_store(self, claude_home, make_jsonl_session):
+        ts = _recent()
+        make_jsonl_session(records=_session_records(ts))
+        ts_ms = int(ts.timestamp() * 1000)
+        _write_store(claude_home, [
+            ("a1", 0.125, ts_ms, "claude-sonnet-4"),
+            ("old", 9.0, ts_ms - 90 * 86_400_000, "claude-opus-4"),
+        ])
+
+        data = TimeFilteredExtractor(days=30, use_store=True).extract()
+
+        assert data.total_cost_usd == pytest.approx(0.125)
+        assistant = [m for m in data.messages if m.uuid == "a1"][0]
+        assert assistant.model == "claude-sonnet-4"
+        assert data.model_usage["claude-sonnet-4"].cost_usd == pytest.approx(0.125)
+
+    def test_store_ignored_by_default(self, claude_home, make_jsonl_session):
+        ts = _recent()
+        make_jsonl_session(records=_session_records(ts))
+        _write_store(claude_home, [("a1", 0.125, int(ts.timestamp() * 1000), "m")])
+
+        data = TimeFilteredExtractor(days=30).extract()
+        assert data.total_cost_usd == 0
+
+    def test_null_store_cost_keeps_jsonl_cost(self, claude_home, make_jsonl_session):
+        ts = _recent()
+        records = _session_records(ts)
+        records[1]["costUSD"] = 0.5
+        make_jsonl_session(records=records)
+        _write_store(claude_home, [("a1", None, int(ts.timestamp() * 1000), "m")])
+
+        data = TimeFilteredExtractor(days=30, use_store=True).extract()
+        assert data.total_cost_usd == pytest.approx(0.5)
+
+    def test_store_path_with_uri_characters(self, tmp_path, monkeypatch, make_jsonl_session):
+        claude_dir = tmp_path / "we?ird#home%20" / ".claude"
+        claude_dir.mkdir(parents=True)
+        monkeypatch.setattr("sources.sqlite_store.get_claude_dir", lambda: claude_dir)
+        ts = _recent()
+        _write_store(claude_dir, [("a1", 0.125, int(ts.timestamp() * 1000), "m")])
+
+        from sources.sqlite_store import SqliteStoreSource
+
+        assert SqliteStoreSource().get_message_costs() == {"a1": ("m", 0.125)}
+
+    def test_window_query_uses_timestamp_index(self, claude_home):
+        from sources.sqlite_store import SqliteStoreSource, message_costs_query
+
+        ts_ms = int(_recent().timestamp() * 1000)
+        _write_store(claude_home, [("a1", 0.125, ts_ms, "m"), ("old", 1.0, ts_ms - 10**9, "m")])
+        conn = sqlite3.connect(claude_home / "__store.db")
+        conn.execute("CREATE INDEX idx_timestamp ON assistant_messages(timestamp)")
+        conn.commit()
+        sql, params = message_costs_query(ts_ms)
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        conn.close()
+
+        assert "USING INDEX idx_timestamp" in plan
+        assert SqliteStoreSource().get_message_costs(since_ms=ts_ms) == {"a1": ("m", 0.125)}
+        assert len(SqliteStoreSource().get_message_costs()) == 2
+
+    def test_missing_store_falls_back_to_jsonl(self, claude_home, make_jsonl_session):
+        make_jsonl_session(records=_session_records(_recent()))
+        data = TimeFilteredExtractor(days=30, use_store=True).extract()
+        assert data.total_sessions == 1
+        assert data.total_cost_usd == 0
+
+
+class TestNarrow:
+    def _write_sessions(self, make_jsonl_session):
+        now = datetime.now(timezone.utc)
+        for session_id, ages in (
+            ("recent", [1, 2]),
+            ("straddling", [20, 3]),
+            ("old", [20, 25]),
+        ):
+            records = []
+            for i, age in enumerate(ages):
+                ts = (now - timedelta(days=age)).isoformat()
+                records.append({
+                    "uuid": f"{session_id}-u{i}",
+                    "type": "user",
+                    "message": {"role": "user", "content": "run it"},
+                    "timestamp": ts,
+                })
+                records.append({
+                    "uuid": f"{session_id}-a{i}",
+                    "parentUuid": f"{session_id}-u{i}",
+                    "type": "assistant",
+                    "message": {
+                        "role": "assistant",
+                        "model": "claude-sonnet-4",
+                        "content": [
+                            {"type": "tool_use", "id": f"{session_id}-t{i}",
+                             "name": "Read", "input": {"file_path": "/a.py"}},
+                        ],
+                        "usage": {"input_tokens": 10, "output_tokens": 5},
+                    },
+                    "timestamp": ts,
+                    "costUSD": 0.01,
+                })
+            make_jsonl_session(session_id=session_id, records=records)
+
+    def test_narrow_matches_direct_extract(self, claude_home, make_jsonl_session):
+        self._write_sessions(make_jsonl_session)
+
+        wider = TimeFilteredExtractor(days=30).extract()
+        narrowed = TimeFilteredExtractor(days=7).narrow(wider)
+        direct = TimeFilteredExtractor(days=7).extract()
+
+        assert wider.total_sessions == 3
+        assert narrowed.window_days == 7
+        assert narrowed.sessions == direct.sessions
+        assert narrowed.messages == direct.messages
+        assert narrowed.tool_calls == direct.tool_calls
+        assert narrowed.total_cost_usd == pytest.approx(direct.total_cost_usd)
+        assert narrowed.total_tokens == direct.total_tokens
+        assert narrowed.tool_counts == direct.tool_counts
+        assert narrowed.files_read == direct.files_read
+        assert narrowed.model_usage == direct.model_usage
+        assert narrowed.active_dates == direct.active_dates
+        assert narrowed.hourly_distribution == direct.hourly_distribution
+        assert narrowed.conversation_threads == direct.conversation_threads
+
+
+class TestExtractIncremental:
+    def _write(self, make_jsonl_session, session_id, text, minutes_ago=5):
+        ts = _recent(minutes_ago)
+        records = _session_records(ts)
+        for record in records:
+            record["uuid"] = f"{session_id}-{record['uuid']}"
+        records[1]["parentUuid"] = records[0]["uuid"]
+        records[0]["message"]["content"] = text
+        return make_jsonl_session(session_id=session_id, records=records)
+
+    def test_matches_full_extract(self, claude_home, make_jsonl_session):
+        self._write(make_jsonl_session, "kept", "first")
+        changed = self._write(make_jsonl_session, "changed", "before")
+        removed = self._write(make_jsonl_session, "removed", "gone")
+        previous = TimeFilteredExtractor(days=30).extract()
+
+        changed = self._write(make_jsonl_session, "changed", "after")
+        with open(changed, "a") as f:
+            f.write('{"uuid": "extra", "type": "user", "message": '
+                    '{"role": "user", "content": "more"}, '
+                    f'"timestamp": "{_recent(1).isoformat()}"}}\n')
+        removed.unlink()
+        added = self._write(make_jsonl_session, "added", "new")
+
+        updated = TimeFilteredExtractor(days=30).extract_incremental(
+            previous, [changed, removed, added]
+        )
+        direct = TimeFilteredExtractor(days=30).extract()
+
+        key = lambda s: s.session_id
+        assert sorted(updated.sessions, key=key) == sorted(direct.sessions, key=key)
+        assert {m.uuid for m in updated.messages} == {m.uuid for m in direct.messages}
+        assert updated.total_sessions == 3
+        assert updated.total_messages == direct.total_messages
+        assert updated.total_tokens == direct.total_tokens
+        assert "more" in {m.content for m in updated.messages}
+
+    def test_unchanged_sessions_not_reparsed(self, claude_home, make_jsonl_session, monkeypatch):
+        self._write(make_jsonl_session, "kept", "first")
+        previous = TimeFilteredExtractor(days=30).extract()
+
+        extractor = TimeFilteredExtractor(days=30)
+        monkeypatch.setattr(
+            extractor, "_extract_single_session",
+            lambda *a: pytest.fail("unchanged session re-parsed"),
+        )
+        updated = extractor.extract_incremental(previous, [])
+        assert updated.sessions == previous.sessions
+
+
+class TestFields:
+    def _write(self, make_jsonl_session):
+        ts = _recent()
+        records = _session_records(ts)
+        records[0]["message"]["content"] = "Why does this python bug fail? Please fix it, thanks"
+        records[1]["message"]["content"] += [
+            {"type": "tool_use", "id": "t0", "name": "EnterPlanMode", "input": {}},
+            {"type": "tool_use", "id": "t1", "name": "Edit",
+             "input": {"file_path": "/a.py", "old_string": "x", "new_string": "y"}},
+            {"type": "tool_use", "id": "t2", "name": "WebSearch",
+             "input": {"query": "python"}},
+        ]
+        make_jsonl_session(records=records)
+
+    def test_unrequested_fields_left_empty(self, claude_home, make_jsonl_session):
+        self._write(make_jsonl_session)
+        full = TimeFilteredExtractor(days=30).extract()
+        projected = TimeFilteredExtractor(days=30, fields=["sessions"]).extract()
+
+        assert full.edit_operations and full.search_queries and full.tool_chains
+        assert any(m.content for m in full.messages)
+        assert not projected.edit_operations
+        assert not projected.search_queries
+        assert not projected.tool_chains
+        assert not projected.conversation_threads
+        assert not any(m.content for m in projected.messages)
+        assert projected.sessions == full.sessions
+        assert projected.files_edited == full.files_edited
+        assert projected.tool_counts == full.tool_counts
+
+    def test_required_fields_give_same_metrics(self, claude_home, make_jsonl_session):
+        from metrics import DerivedMetricsEngine
+        from metrics.definitions import METRIC_DEFINITIONS, required_fields
+
+        self._write(make_jsonl_session)
+        full = TimeFilteredExtractor(days=30).extract()
+        assert "message_content" in required_fields(["E"])
+        assert "message_content" not in required_fields(["A"])
+
+        def sources(metric_id):
+            definition = METRIC_DEFINITIONS[metric_id]
+            found = set(definition.sources)
+            for dep_id in definition.dependencies:
+                found |= sources(dep_id)
+            return found
+
+        # Per metric, so one missing declaration is not hidden by its category
+        for metric_id in METRIC_DEFINITIONS:
+            projected = TimeFilteredExtractor(days=30, fields=sources(metric_id)).extract()
+            expected = DerivedMetricsEngine(full).calculate_metric(metric_id)
+            actual = DerivedMetricsEngine(projected).calculate_metric(metric_id)
+            # None when a metric fails on this small data set
+            assert getattr(actual, "value", None) == getattr(expected, "value", None), metric_id
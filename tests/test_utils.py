@@ -1,13 +1,21 @@
 """Tests for utils.py -- utility functions."""
 
+import asyncio
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
 
+import utils
 from tests.conftest import FIXED_NOW
 from utils import (
+    DirStatsMemo,
+    TreeStats,
     count_jsonl_lines,
     date_to_str,
     datetime_to_hour,
@@ -18,11 +26,16 @@ from utils import (
     get_date_range,
     is_weekend,
     is_within_window,
+    list_files,
     parse_iso_timestamp,
     project_path_to_dir_name,
     read_json_file,
+    read_files,
+    read_json_partial,
     read_jsonl_file,
     safe_get,
+    scan_subtrees,
+    scan_tree,
     str_to_date,
     unix_ms_to_datetime,
 )
@@ -225,6 +238,237 @@ class TestReadJsonFile:
         assert result is None
 
 
+class TestReadJsonFileCache:
+    @pytest.fixture
+    def parses(self, monkeypatch):
+        calls = []
+        original = utils._parse_json_file
+        monkeypatch.setattr(utils, "_parse_json_file", lambda p: calls.append(p) or original(p))
+        return calls
+
+    def test_parsed_once_while_unchanged(self, tmp_path, parses):
+        f = tmp_path / "config.json"
+        f.write_text(json.dumps({"key": "value"}))
+        first = read_json_file(f)
+        assert read_json_file(f) is first
+        assert parses == [f]
+
+    def test_reparsed_after_change(self, tmp_path, parses):
+        f = tmp_path / "config.json"
+        f.write_text(json.dumps({"key": "value"}))
+        read_json_file(f)
+        f.write_text(json.dumps({"key": "changed"}))
+        assert read_json_file(f) == {"key": "changed"}
+        assert len(parses) == 2
+
+    def test_uncached_read(self, tmp_path, parses):
+        f = tmp_path / "todo.json"
+        f.write_text("[]")
+        read_json_file(f, cache=False)
+        read_json_file(f, cache=False)
+        assert len(parses) == 2
+        assert f not in utils._json_cache
+
+    def test_lru_bound(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "JSON_CACHE_MAX_FILES", 2)
+        paths = []
+        for i in range(3):
+            f = tmp_path / f"{i}.json"
+            f.write_text(str(i))
+            paths.append(f)
+            read_json_file(f)
+        assert paths[0] not in utils._json_cache
+        assert paths[1] in utils._json_cache and paths[2] in utils._json_cache
+
+    def test_concurrent_readers_parse_once(self, tmp_path, parses):
+        f = tmp_path / "big.json"
+        f.write_text(json.dumps({"projects": {str(i): {} for i in range(20000)}}))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: read_json_file(f), range(8)))
+        assert all(r is results[0] for r in results)
+        assert parses == [f]
+
+
+class TestReadJsonPartial:
+    DOC = {
+        "numStartups": 3,
+        "big": [{"text": "tricky \\\"]}"}] * 50,
+        "projects": {
+            "/a": {"lastCost": 1.5, "history": [{"display": "x"}] * 20, "nested": {"k": [1]}},
+            "/b": {},
+        },
+        "flag": True,
+    }
+
+    def test_selected_sections_and_pruning(self, tmp_path):
+        f = tmp_path / "state.json"
+        f.write_text(json.dumps(self.DOC, indent=2))
+
+        data, skipped = read_json_partial(
+            f, ["numStartups", "projects", "flag", "missing"], ["projects.*.history"]
+        )
+
+        assert data == {
+            "numStartups": 3,
+            "projects": {"/a": {"lastCost": 1.5, "nested": {"k": [1]}}, "/b": {}},
+            "flag": True,
+        }
+        full = json.dumps(self.DOC, indent=2)
+        assert skipped > len(json.dumps(self.DOC["big"]))
+        assert skipped < len(full)
+
+    def test_matches_full_parse_without_pruning(self, tmp_path):
+        f = tmp_path / "state.json"
+        f.write_text(json.dumps(self.DOC))
+        data, skipped = read_json_partial(f, self.DOC.keys())
+        assert data == self.DOC
+        assert skipped == 0
+
+    @pytest.mark.parametrize("content", ["", "[1, 2]", '{"a": 1,', '{"a" 1}', "{invalid"])
+    def test_invalid(self, tmp_path, content):
+        f = tmp_path / "bad.json"
+        f.write_text(content)
+        assert read_json_partial(f, ["a"]) is None
+
+    def test_nonexistent(self, tmp_path):
+        assert read_json_partial(tmp_path / "missing.json", ["a"]) is None
+
+    def test_skipped_counts_utf8_bytes(self, tmp_path):
+        f = tmp_path / "state.json"
+        f.write_text('{"a": 1, "b": "\u00e9t\u00e9"}', encoding="utf-8")
+        data, skipped = read_json_partial(f, ["a"])
+        assert data == {"a": 1}
+        assert skipped == len('"\u00e9t\u00e9"'.encode("utf-8")) == 7
+
+
+# -- scan_tree ------------------------------------------------------------------
+
+class TestScanTree:
+    OLD = 1_600_000_000  # mtime far enough back to be memoized
+
+    def _tree(self, root):
+        (root / "a" / "deep").mkdir(parents=True)
+        (root / "b").mkdir()
+        (root / "top.txt").write_bytes(b"x" * 10)
+        (root / "a" / "one.bin").write_bytes(b"x" * 100)
+        (root / "a" / "deep" / "two.bin").write_bytes(b"x" * 1000)
+        (root / "b" / "three.bin").write_bytes(b"x" * 5)
+        for d in [root / "a" / "deep", root / "a", root / "b"]:
+            os.utime(d, (self.OLD, self.OLD))
+        return root
+
+    def test_subtrees_and_total(self, tmp_path):
+        root = self._tree(tmp_path / "tree")
+        os.utime(root / "a" / "deep" / "two.bin", (self.OLD, self.OLD + 5))
+
+        subtrees, top = scan_subtrees(root)
+
+        assert subtrees["a"].size_bytes == 1100
+        assert subtrees["a"].file_count == 2
+        assert subtrees["b"] == TreeStats(5, 1, (root / "b" / "three.bin").stat().st_mtime)
+        assert top.size_bytes == 10
+        total = scan_tree(root, jobs=1)
+        assert (total.size_bytes, total.file_count) == (1115, 4)
+        assert total.newest_mtime == max(
+            p.stat().st_mtime for p in root.rglob("*") if p.is_file()
+        )
+
+    def test_symlinks_followed_at_top_level_only(self, tmp_path):
+        root = self._tree(tmp_path / "tree")
+        (root / "link").symlink_to(root / "a", target_is_directory=True)
+        (root / "b" / "loop").symlink_to(root, target_is_directory=True)
+
+        subtrees, _ = scan_subtrees(root)
+        assert subtrees["link"] == subtrees["a"]
+        assert subtrees["b"].file_count == 1
+
+    def test_missing_directory(self, tmp_path):
+        assert scan_tree(tmp_path / "missing") == TreeStats()
+
+    def test_memo_skips_unchanged_directories(self, tmp_path, monkeypatch):
+        root = self._tree(tmp_path / "tree")
+        memo_path = tmp_path / "memo.json"
+        first = scan_tree(root, memo=DirStatsMemo(memo_path))
+
+        listed = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(utils.os, "scandir", lambda p: listed.append(p) or real_scandir(p))
+        # A new memo instance reads what the previous run persisted
+        assert scan_tree(root, memo=DirStatsMemo(memo_path)) == first
+        assert listed == [root]
+
+        (root / "b" / "new.bin").write_bytes(b"x" * 7)
+        listed.clear()
+        changed = scan_tree(root, memo=DirStatsMemo(memo_path))
+        assert changed.size_bytes == first.size_bytes + 7
+        assert str(root / "b") in listed
+
+    def test_file_names_from_the_same_walk(self, tmp_path, monkeypatch):
+        root = self._tree(tmp_path / "tree")
+        listed = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(utils.os, "scandir", lambda p: listed.append(p) or real_scandir(p))
+
+        names = {}
+        subtrees, _ = scan_subtrees(root, file_names=names)
+        assert names == {"a": ["one.bin"], "b": ["three.bin"]}
+        assert subtrees["a"].file_count == 2
+        assert len(listed) == len(set(map(str, listed))) == 4  # root, a, a/deep, b
+
+    def test_memo_forgets_removed_directories(self, tmp_path):
+        root = self._tree(tmp_path / "tree")
+        memo_path = tmp_path / "memo.json"
+        scan_tree(root, memo=DirStatsMemo(memo_path))
+        (root / "b" / "three.bin").unlink()
+        (root / "b").rmdir()
+
+        assert scan_tree(root, memo=DirStatsMemo(memo_path)).file_count == 3
+        assert str(root / "b") not in json.loads(memo_path.read_text())["dirs"]
+
+
+# -- read_files -----------------------------------------------------------------
+
+class TestReadFiles:
+    def test_results_in_input_order(self, tmp_path):
+        paths = []
+        for i in range(50):
+            paths.append(tmp_path / f"{i}.txt")
+            paths[-1].write_text(str(i))
+        assert read_files(paths, lambda p: int(p.read_text())) == list(range(50))
+
+    def test_concurrency_is_bounded(self, tmp_path):
+        lock = threading.Lock()
+        active = [0, 0]  # current, peak
+
+        def reader(path):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return path
+
+        paths = [tmp_path / str(i) for i in range(30)]
+        assert read_files(paths, reader, jobs=4) == paths
+        assert 1 < active[1] <= 4
+
+    def test_inside_running_loop(self, tmp_path):
+        paths = [tmp_path / str(i) for i in range(5)]
+
+        async def main():
+            return read_files(paths, lambda p: p.name)
+
+        assert asyncio.run(main()) == [p.name for p in paths]
+
+    def test_list_files_skips_directories(self, tmp_path):
+        (tmp_path / "a.json").write_text("{}")
+        (tmp_path / "b.txt").write_text("")
+        (tmp_path / "dir.json").mkdir()
+        assert list_files(tmp_path, ".json") == [tmp_path / "a.json"]
+        assert list_files(tmp_path / "missing") == []
+
+
 # -- read_jsonl_file ------------------------------------------------------------
 
 class TestReadJsonlFile:
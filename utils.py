@@ -2,9 +2,20 @@
 
 import json
 import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from json.decoder import scanstring
 from pathlib import Path
-from typing import Any, Dict, Generator, Iterator, List, Optional, Union
+from typing import (
+    Any, Callable, Dict, Generator, Iterable, Iterator, List, NamedTuple, Optional, Sequence,
+    Tuple, TypeVar, Union,
+)
+
+T = TypeVar("T")
 
 
 def get_claude_dir() -> Path:
@@ -27,15 +38,33 @@ def get_cache_dir() -> Path:
     return Path.home() / ".cache" / "claude-cli-nodejs"
 
 
+def get_snapshot_dir() -> Path:
+    """Get the claude-metrics snapshot directory (~/.cache/claude-metrics/).
+
+    Overridden by the CLAUDE_METRICS_CACHE_DIR environment variable.
+    """
+    override = os.environ.get("CLAUDE_METRICS_CACHE_DIR")
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "claude-metrics"
+
+
 def get_versions_dir() -> Path:
     """Get the Claude versions directory (~/.local/share/claude/versions/)."""
     return Path.home() / ".local" / "share" / "claude" / "versions"
 
 
-def read_json_file(path: Path) -> Optional[Dict[str, Any]]:
-    """Read and parse a JSON file, returning None if it doesn't exist or is invalid."""
-    if not path.exists():
-        return None
+# Parsed JSON files shared by all readers in the process, least recently
+# used first: path -> (mtime_ns, size, parsed value)
+JSON_CACHE_MAX_FILES = 64
+JSON_CACHE_MAX_BYTES = 256 * 1024 * 1024  # sum of file sizes
+_json_cache: "OrderedDict[Path, Tuple[int, int, Any]]" = OrderedDict()
+_json_cache_lock = threading.Lock()
+# Striped per-path locks: concurrent readers of one file parse it once
+_json_parse_locks = [threading.Lock() for _ in range(16)]
+
+
+def _parse_json_file(path: Path) -> Optional[Dict[str, Any]]:
     try:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -43,6 +72,207 @@ def read_json_file(path: Path) -> Optional[Dict[str, Any]]:
         return None
 
 
+def read_json_file(path: Path, cache: bool = True) -> Optional[Dict[str, Any]]:
+    """Read and parse a JSON file, returning None if it doesn't exist or is invalid.
+
+    Parsed files are memoized process-wide by (path, mtime_ns, size), so a
+    config read by several sources (e.g. ~/.claude.json) is parsed once.
+    The returned value is shared between callers and must not be modified.
+
+    Args:
+        path: JSON file to read
+        cache: False for files read once (e.g. one of many per-session
+            files), which then neither use nor evict cached entries
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not cache:
+        return _parse_json_file(path)
+
+    key = (st.st_mtime_ns, st.st_size)
+    with _json_parse_locks[hash(path) % len(_json_parse_locks)]:
+        with _json_cache_lock:
+            entry = _json_cache.get(path)
+            if entry is not None and entry[:2] == key:
+                _json_cache.move_to_end(path)
+                return entry[2]
+
+        data = _parse_json_file(path)
+
+        with _json_cache_lock:
+            _json_cache[path] = (*key, data)
+            _json_cache.move_to_end(path)
+            total = sum(size for _, size, _ in _json_cache.values())
+            while len(_json_cache) > 1 and (
+                len(_json_cache) > JSON_CACHE_MAX_FILES or total > JSON_CACHE_MAX_BYTES
+            ):
+                _, (_, size, _) = _json_cache.popitem(last=False)
+                total -= size
+    return data
+
+
+def clear_json_cache() -> None:
+    """Drop all memoized JSON files."""
+    with _json_cache_lock:
+        _json_cache.clear()
+
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def _decode_json_object(
+    text: str, pos: int, keys: Optional[set], prune: List[List[str]], skipped: List[int],
+) -> Tuple[Dict[str, Any], int]:
+    """Decode the object at ``pos``, keeping ``keys`` (None: all) minus ``prune``."""
+    result: Dict[str, Any] = {}
+    pos = _WS_RE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == "}":
+        return result, pos + 1
+    while True:
+        if text[pos:pos + 1] != '"':
+            raise ValueError(f"Expected a key at {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _WS_RE.match(text, pos).end()
+        if text[pos:pos + 1] != ":":
+            raise ValueError(f"Expected ':' at {pos}")
+        pos = _WS_RE.match(text, pos + 1).end()
+
+        matching = [p[1:] for p in prune if p[0] in ("*", key)]
+        if (keys is not None and key not in keys) or [] in matching:
+            # Decoded one value at a time and dropped at once; the C decoder
+            # steps over it faster than any pure-Python scanner could
+            _, end = _decoder.raw_decode(text, pos)
+            value = text[pos:end]
+            skipped[0] += len(value) if value.isascii() else len(value.encode("utf-8"))
+            pos = end
+        elif matching and text[pos:pos + 1] == "{":
+            result[key], pos = _decode_json_object(text, pos, None, matching, skipped)
+        else:
+            result[key], pos = _decoder.raw_decode(text, pos)
+
+        pos = _WS_RE.match(text, pos).end()
+        char = text[pos:pos + 1]
+        pos = _WS_RE.match(text, pos + 1).end()
+        if char == "}":
+            return result, pos
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' at {pos}")
+
+
+def read_json_partial(
+    path: Path, keys: Iterable[str], prune: Iterable[str] = (),
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Decode selected sections of a JSON object file, skipping the rest.
+
+    Skipped values are never kept: each is dropped as soon as it has been
+    stepped over, so memory holds the file text and the selected sections
+    rather than the whole document.
+
+    Args:
+        path: JSON file whose top level is an object
+        keys: Top-level keys to decode
+        prune: Dotted paths to leave out within those keys; ``*`` matches
+            any key (e.g. "projects.*.history")
+
+    Returns:
+        (decoded sections, UTF-8 bytes of JSON text skipped), or None if
+        the file doesn't exist or is invalid
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except (IOError, UnicodeDecodeError):
+        return None
+
+    skipped = [0]
+    try:
+        pos = _WS_RE.match(text).end()
+        if text[pos:pos + 1] != "{":
+            return None
+        data, _ = _decode_json_object(
+            text, pos, set(keys), [p.split(".") for p in prune], skipped
+        )
+    except (ValueError, IndexError):
+        return None
+    return data, skipped[0]
+
+
+# Sections of ~/.claude.json the sources read; per-project prompt history
+# grows without bound and is never used
+CLAUDE_JSON_SECTIONS = (
+    "numStartups", "promptQueueUseCount", "memoryUsageCount",
+    "hasCompletedOnboarding", "lastOnboardingVersion",
+    "hasSeenTasksHint", "hasSeenStashHint",
+    "tipsHistory", "cachedStatsigGates", "cachedDynamicConfigs", "projects",
+)
+CLAUDE_JSON_PRUNED = ("projects.*.history",)
+
+# Last partial read of ~/.claude.json: (path, mtime_ns, size, sections, skipped)
+_claude_json_sections: Optional[Tuple[Path, int, int, Dict[str, Any], int]] = None
+_claude_json_lock = threading.Lock()
+
+
+def read_claude_json_sections() -> Optional[Tuple[Dict[str, Any], int]]:
+    """Decode the used sections of ~/.claude.json once for all sources.
+
+    The result is memoized by (mtime_ns, size) and shared between callers,
+    so it must not be modified. If read_json_file() already holds the whole
+    current file, that parse is returned instead, with nothing skipped.
+
+    Returns:
+        (decoded sections, bytes of JSON text skipped), or None if the file
+        doesn't exist or is invalid
+    """
+    global _claude_json_sections
+    path = get_claude_json_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_mtime_ns, st.st_size)
+
+    with _json_cache_lock:
+        entry = _json_cache.get(path)
+        if entry is not None and entry[:2] == key[1:] and entry[2] is not None:
+            return entry[2], 0
+
+    with _claude_json_lock:
+        memo = _claude_json_sections
+        if memo is not None and memo[:3] == key:
+            return memo[3], memo[4]
+        partial = read_json_partial(path, CLAUDE_JSON_SECTIONS, CLAUDE_JSON_PRUNED)
+        if partial is not None:
+            _claude_json_sections = (*key, *partial)
+        return partial
+
+
+def write_json_atomic(path: Path, data: Any) -> bool:
+    """Write JSON so readers see the old or the new file, never a partial one.
+
+    Returns:
+        True if written, False on an OS error
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    except OSError:
+        return False
+    return True
+
+
 def read_jsonl_file(path: Path) -> Generator[Dict[str, Any], None, None]:
     """Stream records from a JSONL file."""
     if not path.exists():
@@ -113,6 +343,80 @@ def iter_markdown_files(directory: Path, pattern: str = "*.md") -> Iterator[Path
             yield path
 
 
+# Files read at once by read_files
+READ_JOBS = 16
+
+
+def list_files(directory: Path, suffix: str = "") -> List[Path]:
+    """Regular files directly in a directory, optionally by name suffix.
+
+    Uses one scandir, whose entries know their type, instead of a stat
+    per file.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.name.endswith(suffix) and entry.is_file()
+            ]
+    except OSError:
+        return []
+
+
+async def read_files_async(
+    paths: Sequence[Path],
+    reader: Callable[[Path], T],
+    jobs: int = READ_JOBS,
+) -> List[T]:
+    """Run a blocking reader over many files on a bounded thread pool.
+
+    Args:
+        paths: Files (or directories) to read
+        reader: Opens, reads and parses one path; should handle its own
+            errors
+        jobs: Maximum number of paths read at once
+
+    Returns:
+        Reader results, in the order of ``paths``
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        async def read(path: Path) -> T:
+            async with limit:
+                return await loop.run_in_executor(pool, reader, path)
+
+        return await asyncio.gather(*(read(path) for path in paths))
+
+
+def read_files(
+    paths: Sequence[Path],
+    reader: Callable[[Path], T],
+    jobs: int = READ_JOBS,
+) -> List[T]:
+    """Synchronous front end of read_files_async.
+
+    Small batches, and ``jobs=1``, are read in the calling thread. Inside a
+    running event loop (where a nested one cannot be started) the thread
+    pool is used directly.
+    """
+    if jobs <= 1 or len(paths) <= 1:
+        return [reader(path) for path in paths]
+    # Imported here: both are slow to import and most callers never get here
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(read_files_async(paths, reader, jobs))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(reader, paths))
+
+
 def parse_iso_timestamp(ts: str) -> Optional[datetime]:
     """Parse an ISO timestamp string to datetime."""
     if not ts:
@@ -182,7 +486,11 @@ def get_file_stats(path: Path) -> Dict[str, Any]:
     """Get file statistics (size, mtime, etc.)."""
     if not path.exists():
         return {}
-    stat = path.stat()
+    return file_stats_from_stat(path.stat())
+
+
+def file_stats_from_stat(stat: os.stat_result) -> Dict[str, Any]:
+    """get_file_stats fields from a stat result already at hand."""
     return {
         "size_bytes": stat.st_size,
         "size_human": format_bytes(stat.st_size),
@@ -191,6 +499,217 @@ def get_file_stats(path: Path) -> Dict[str, Any]:
     }
 
 
+class TreeStats(NamedTuple):
+    """Totals over the files of a directory tree."""
+
+    size_bytes: int = 0
+    file_count: int = 0
+    newest_mtime: Optional[float] = None  # st_mtime of the newest file
+
+    def __add__(self, other: "TreeStats") -> "TreeStats":
+        newest = [m for m in (self.newest_mtime, other.newest_mtime) if m is not None]
+        return TreeStats(
+            self.size_bytes + other.size_bytes,
+            self.file_count + other.file_count,
+            max(newest) if newest else None,
+        )
+
+
+class DirStatsMemo:
+    """Per-directory file totals, persisted between runs.
+
+    An entry holds the totals of the files directly in a directory and the
+    names of its subdirectories, valid while the directory's mtime_ns is
+    unchanged. A directory whose entries were not added, removed or renamed
+    is then accounted with one stat() instead of a listing plus one stat()
+    per file.
+
+    Appending to or rewriting a file does not change its directory's mtime,
+    so only use the memo for trees whose files are written once and never
+    modified in place (such as installed versions).
+    """
+
+    VERSION = 1
+    # Directories modified this recently may still change within the same
+    # mtime tick, so they are not memoized
+    RACY_SECONDS = 2.0
+
+    def __init__(self, path: Path):
+        """Initialize the memo.
+
+        Args:
+            path: JSON file to persist to, loaded on first use
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, list]] = None
+        self._visited: set = set()
+
+    def _load(self) -> Dict[str, list]:
+        # Caller holds the lock
+        if self._entries is None:
+            data = read_json_file(self.path, cache=False)
+            valid = isinstance(data, dict) and data.get("version") == self.VERSION
+            self._entries = data.get("dirs", {}) if valid else {}
+        return self._entries
+
+    def get(self, directory: str, mtime_ns: int) -> Optional[Tuple[TreeStats, List[str]]]:
+        with self._lock:
+            self._visited.add(directory)
+            entry = self._load().get(directory)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return TreeStats(*entry[1]), entry[2]
+
+    def put(self, directory: str, mtime_ns: int, files: TreeStats, subdirs: List[str]) -> None:
+        with self._lock:
+            entries = self._load()
+            if time.time() - mtime_ns / 1e9 < self.RACY_SECONDS:
+                entries.pop(directory, None)
+            else:
+                entries[directory] = [mtime_ns, list(files), subdirs]
+
+    def save(self, root: Optional[Path] = None) -> None:
+        """Write the memo, dropping directories under ``root`` the scan did not reach."""
+        with self._lock:
+            entries = self._load()
+            if root is not None:
+                prefix = str(root)
+                under = [d for d in entries if d == prefix or d.startswith(prefix + os.sep)]
+                for directory in under:
+                    if directory not in self._visited:
+                        del entries[directory]
+                self._visited.difference_update(under)
+            payload = {"version": self.VERSION, "dirs": entries}
+            # The memo only saves time; failing to write it is harmless
+            write_json_atomic(self.path, payload)
+
+
+def dir_stats_memo(name: str) -> DirStatsMemo:
+    """Persisted directory memo of one source, in the claude-metrics cache directory."""
+    return DirStatsMemo(get_snapshot_dir() / f"dir-stats-{name}.json")
+
+
+def _scan_dir_tree(
+    directory: str, memo: Optional[DirStatsMemo], names: Optional[List[str]] = None,
+) -> TreeStats:
+    """Totals of every file below ``directory`` (symlinked directories not followed).
+
+    If ``names`` is given, the names of the files directly in ``directory``
+    are appended to it (that directory is then always listed).
+    """
+    total = TreeStats()
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        want_names = names is not None and current == directory
+        mtime_ns = None
+        if memo is not None and not want_names:
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            cached = memo.get(current, mtime_ns)
+            if cached is not None:
+                files, subdirs = cached
+                total += files
+                stack.extend(os.path.join(current, name) for name in subdirs)
+                continue
+
+        size = count = 0
+        newest = None
+        subdirs = []
+        file_names = [] if want_names else None
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            # DirEntry caches this stat; no second syscall
+                            st = entry.stat()
+                            size += st.st_size
+                            count += 1
+                            if newest is None or st.st_mtime > newest:
+                                newest = st.st_mtime
+                            if file_names is not None:
+                                file_names.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+        files = TreeStats(size, count, newest)
+        if mtime_ns is not None:
+            memo.put(current, mtime_ns, files, subdirs)
+        if want_names:
+            names.extend(file_names)
+        total += files
+        stack.extend(os.path.join(current, name) for name in subdirs)
+    return total
+
+
+def scan_subtrees(
+    path: Path, jobs: int = 4, memo: Optional[DirStatsMemo] = None,
+    file_names: Optional[Dict[str, List[str]]] = None,
+) -> Tuple[Dict[str, TreeStats], TreeStats]:
+    """Size, file count and newest mtime of each subdirectory of ``path``.
+
+    Every file is visited once, and the subdirectories are walked in
+    parallel on a thread pool. Symlinked subdirectories of ``path`` are
+    walked too; symlinks further down are not followed.
+
+    Args:
+        path: Directory to scan
+        jobs: Number of subdirectories walked at once
+        memo: Optional per-directory memo, saved after the scan; only for
+            trees whose files are never modified in place (see DirStatsMemo)
+        file_names: Optional dict filled with the names of the files directly
+            in each subdirectory, so callers need not list them again
+
+    Returns:
+        (stats per subdirectory name, stats of the files directly in path)
+    """
+    subdirs: List[str] = []
+    top = TreeStats()
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        top += TreeStats(st.st_size, 1, st.st_mtime)
+                except OSError:
+                    continue
+    except OSError:
+        return {}, top
+
+    paths = [os.path.join(path, name) for name in subdirs]
+    if file_names is not None:
+        file_names.update((name, []) for name in subdirs)
+    names = [file_names[name] if file_names is not None else None for name in subdirs]
+    if jobs > 1 and len(paths) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(lambda p, n: _scan_dir_tree(p, memo, n), paths, names))
+    else:
+        results = [_scan_dir_tree(p, memo, n) for p, n in zip(paths, names)]
+
+    if memo is not None:
+        memo.save(root=path)
+    return dict(zip(subdirs, results)), top
+
+
+def scan_tree(path: Path, jobs: int = 4, memo: Optional[DirStatsMemo] = None) -> TreeStats:
+    """Size, file count and newest mtime of all files below ``path``."""
+    subtrees, top = scan_subtrees(path, jobs=jobs, memo=memo)
+    return sum(subtrees.values(), top)
+
+
 def ensure_dir(path: Path) -> Path:
     """Ensure a directory exists, creating it if necessary."""
     path.mkdir(parents=True, exist_ok=True)
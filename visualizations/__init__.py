@@ -5,7 +5,6 @@ for derived metrics.
 """
 
 from .terminal import TerminalReport, create_sparkline, create_bar_chart
-from .html import DashboardGenerator
 
 __all__ = [
     "TerminalReport",
@@ -13,3 +12,12 @@ __all__ = [
     "create_bar_chart",
     "DashboardGenerator",
 ]
+
+
+def __getattr__(name):
+    # The HTML generator needs jinja2; only import it when asked for
+    if name == "DashboardGenerator":
+        from .html import DashboardGenerator
+
+        return DashboardGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
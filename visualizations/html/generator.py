@@ -4,8 +4,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-
 from extraction.data_classes import ExtractedData30Day
 from metrics.definitions.base import MetricValue
 
@@ -40,7 +38,9 @@ class DashboardGenerator:
         self.data = data
         self.metrics = metrics
 
-        # Set up Jinja2 environment
+        # Set up Jinja2 environment (imported here, as it is slow to import)
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+
         if template_dir is None:
             template_dir = Path(__file__).parent / "templates"
 